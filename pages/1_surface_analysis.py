@@ -1,8 +1,14 @@
 import streamlit as st
 import os
-from PIL import Image
 import pandas as pd
-import plotly.express as px
+
+from utils import results
+from utils.assets import AssetLoader
+from utils.figures import cached_figure, model_bar, trend_line
+from utils.layout import fit_image, grid, image_width, track_viewport
+from utils.sections import (fragment, get_period_table, render_feature_curve, render_grid_explorer,
+                            render_timeseries_section, render_whatif_panel, run_reader, select_run,
+                            temporal_controls)
 
 # Page Configuration
 st.set_page_config(layout="wide", page_title="Soil Moisture Analysis")
@@ -41,25 +47,23 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 image_dir = f"images/{target}"
+# Model run to display; images and tables come from that run when one is selected
+run = select_run()
+
+# Image grids and sizes follow the client's screen
+track_viewport()
 
-def show_image(file, caption, col=None):
-    path = os.path.join(image_dir, file)
-    if os.path.exists(path):
-        img = Image.open(path)
-        if col:
-            with col:
-                st.image(img, caption=caption, use_column_width=True)
-        else:
-            st.image(img, caption=caption, use_column_width=True)
-    else:
-        st.warning(f"Image not found: {file}")
+# Images are read concurrently once the page layout is in place
+loader = AssetLoader(read=run_reader(run))
+
+def show_image(file, caption, col=None, count=2):
+    def render(img):
+        img = fit_image(img, image_width(2, count) if col is not None else image_width(1))
+        st.image(img, caption=caption, use_column_width=True)
+    loader.image(os.path.join(image_dir, file), render, col, missing=f"Image not found: {file}")
 
 # Model performance data (example - replace with your actual data)
-model_performance = {
-    "Model": ["XGBoost", "Gradient Boosting", "Random Forest", "Decision Tree", "Linear Regression"],
-    "RMSE": [0.0336, 0.0365, 0.0527, 0.0531, 0.0706],
-    "R²": [0.9177, 0.9029, 0.8249, 0.7944, 0.6361]
-}
+model_performance = results.model_performance(target, 5, run=run)
 
 # Performance Summary at the top
 with st.container():
@@ -76,168 +80,93 @@ with st.container():
         )
     
     with col2:
-        fig = px.bar(
-            pd.DataFrame(model_performance),
-            x='Model', 
-            y='R²',
-            title='Model Performance (R² Score)',
-            color='Model',
-            text='R²',
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        fig.update_traces(texttemplate='%{text:.3f}', textposition='outside')
+        fig = cached_figure(model_bar, pd.DataFrame(model_performance), 'Model Performance (R² Score)')
         st.plotly_chart(fig, use_column_width=True)
 
-# XGBoost Monthly Performance Section - Surface Soil Moisture
-with st.container():
-    st.markdown('<div class="section-header">📅 XGBoost Monthly Performance (Surface Soil Moisture)</div>', unsafe_allow_html=True)
-    
-    monthly_data = {
-        "Month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "Mean"],
-        "RMSE": [0.042857, 0.031591, 0.030722, 0.027974, 0.032437, 0.032745,
-                0.027635, 0.027368, 0.029675, 0.032624, 0.035653, 0.037435, 0.0324],
-        "R²": [0.748952, 0.870841, 0.886332, 0.913114, 0.905789, 0.925801,
-              0.92377, 0.927474, 0.925191, 0.915619, 0.866626, 0.844909, 0.8879]
-    }
-    
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown('<div class="subsection-header">Monthly Metrics</div>', unsafe_allow_html=True)
-        st.dataframe(
-            pd.DataFrame(monthly_data)
-            .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
-            .highlight_max(subset=['R²'], color='#d5f5e3')
-            .highlight_min(subset=['RMSE'], color='#d5f5e3')
-            .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
-        )
-    
-    with col2:
-        st.markdown('<div class="subsection-header">Monthly Performance Trends</div>', unsafe_allow_html=True)
-        tab1, tab2 = st.tabs(["R² Score", "RMSE"])
-        
-        with tab1:
-            fig = px.line(
-                pd.DataFrame(monthly_data).iloc[:-1],  # Exclude mean row
-                x='Month', 
-                y='R²',
-                markers=True,
-                text='R²',
-                color_discrete_sequence=['#3498db'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.3f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="R² Score",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.7, 0.95]  # Adjusted range for surface soil moisture
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab2:
-            fig = px.line(
-                pd.DataFrame(monthly_data).iloc[:-1],  # Exclude mean row
-                x='Month', 
-                y='RMSE',
-                markers=True,
-                text='RMSE',
-                color_discrete_sequence=['#e74c3c'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.5f}',  # More decimal places for RMSE
-                textposition='top center',
-                line_width=2
+# Monthly and yearly performance, rerun on their own when their inputs change
+@fragment
+def performance_breakdown():
+    # Model and filters for the monthly/yearly breakdowns; changing them only
+    # reruns this fragment
+    period_model_name, period_model_key, period_filters = temporal_controls(target, run)
+
+    # Monthly Performance Section - Surface Soil Moisture
+    with st.container():
+        st.markdown(f'<div class="section-header">📅 {period_model_name} Monthly Performance (Surface Soil Moisture)</div>', unsafe_allow_html=True)
+
+        monthly_data = results.monthly(target, run)
+        monthly_computed = get_period_table(target, period_model_key, "month", run, **period_filters)
+        if monthly_computed is not None:
+            monthly_data = results.with_mean(monthly_computed)
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown('<div class="subsection-header">Monthly Metrics</div>', unsafe_allow_html=True)
+            st.dataframe(
+                pd.DataFrame(monthly_data)
+                .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
+                .highlight_max(subset=['R²'], color='#d5f5e3')
+                .highlight_min(subset=['RMSE'], color='#d5f5e3')
+                .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
             )
-            fig.update_layout(
-                yaxis_title="RMSE",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.025, 0.045]  # Adjusted range for surface soil moisture
+
+        with col2:
+            st.markdown('<div class="subsection-header">Monthly Performance Trends</div>', unsafe_allow_html=True)
+            tab1, tab2 = st.tabs(["R² Score", "RMSE"])
+
+            with tab1:
+                fig = cached_figure(trend_line, monthly_data, 'Month', 'R²',
+                                    yaxis_range=None if monthly_computed is not None else [0.7, 0.95])  # Adjusted range for surface soil moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+            with tab2:
+                fig = cached_figure(trend_line, monthly_data, 'Month', 'RMSE',
+                                    yaxis_range=None if monthly_computed is not None else [0.025, 0.045])  # Adjusted range for surface soil moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+    # Yearly Performance Section - Surface Soil Moisture
+    with st.container():
+        st.markdown(f'<div class="section-header">📅 {period_model_name} Yearly Performance (Surface Soil Moisture)</div>', unsafe_allow_html=True)
+
+        yearly_data = results.yearly(target, run)
+        yearly_computed = get_period_table(target, period_model_key, "year", run, **period_filters)
+        if yearly_computed is not None:
+            yearly_data = results.with_mean(yearly_computed)
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown('<div class="subsection-header">Yearly Metrics</div>', unsafe_allow_html=True)
+            st.dataframe(
+                pd.DataFrame(yearly_data)
+                .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
+                .highlight_max(subset=['R²'], color='#d5f5e3')
+                .highlight_min(subset=['RMSE'], color='#d5f5e3')
+                .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
             )
-            st.plotly_chart(fig, use_container_width=True)
 
-# XGBoost Yearly Performance Section - Surface Soil Moisture
+        with col2:
+            st.markdown('<div class="subsection-header">Yearly Performance Trends</div>', unsafe_allow_html=True)
+            tab1, tab2 = st.tabs(["R² Score", "RMSE"])
+
+            with tab1:
+                fig = cached_figure(trend_line, yearly_data, 'Year', 'R²',
+                                    yaxis_range=None if yearly_computed is not None else [0.35, 0.8])  # Adjusted range for surface soil moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+            with tab2:
+                fig = cached_figure(trend_line, yearly_data, 'Year', 'RMSE',
+                                    yaxis_range=None if yearly_computed is not None else [0.045, 0.075])  # Adjusted range for surface soil moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+
+performance_breakdown()
+
+# Soil Moisture Time Series Section
 with st.container():
-    st.markdown('<div class="section-header">📅 XGBoost Yearly Performance (Surface Soil Moisture)</div>', unsafe_allow_html=True)
-    
-    yearly_data = {
-        "Year": [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, "Mean"],
-        "RMSE": [0.06259, 0.047557, 0.047202, 0.049984, 0.055594, 0.068118, 
-                0.056743, 0.071928, 0.052099, 0.048862, 0.0561],
-        "R²": [0.596767, 0.693501, 0.764806, 0.714968, 0.713004, 0.513201,
-              0.686846, 0.391223, 0.721574, 0.771139, 0.6567]
-    }
-    
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown('<div class="subsection-header">Yearly Metrics</div>', unsafe_allow_html=True)
-        st.dataframe(
-            pd.DataFrame(yearly_data)
-            .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
-            .highlight_max(subset=['R²'], color='#d5f5e3')
-            .highlight_min(subset=['RMSE'], color='#d5f5e3')
-            .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
-        )
-    
-    with col2:
-        st.markdown('<div class="subsection-header">Yearly Performance Trends</div>', unsafe_allow_html=True)
-        tab1, tab2 = st.tabs(["R² Score", "RMSE"])
-        
-        with tab1:
-            fig = px.line(
-                pd.DataFrame(yearly_data).iloc[:-1],  # Exclude mean row
-                x='Year', 
-                y='R²',
-                markers=True,
-                text='R²',
-                color_discrete_sequence=['#3498db'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.3f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="R² Score",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.35, 0.8]  # Adjusted range for surface soil moisture
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab2:
-            fig = px.line(
-                pd.DataFrame(yearly_data).iloc[:-1],  # Exclude mean row
-                x='Year', 
-                y='RMSE',
-                markers=True,
-                text='RMSE',
-                color_discrete_sequence=['#e74c3c'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.5f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="RMSE",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.045, 0.075]  # Adjusted range for surface soil moisture
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    render_timeseries_section(target, "Surface Soil Moisture")
 
-            
 # Tabs for detailed analysis
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "📊 Feature Importance", 
@@ -261,7 +190,7 @@ with tab1:
     
     for model_name, model_key in models:
         with st.expander(f"### {model_name}", expanded=True):
-            cols = st.columns(2)
+            cols = grid(2, 2)
             show_image(f"{model_key}_importance.png", f"{model_name} Feature Importance", cols[0])
             show_image(f"{model_key}_importance_%_pie_chart.png", f"{model_name} Feature Contribution", cols[1])
 
@@ -277,22 +206,22 @@ with tab2:
         ("Combined Analysis", "xgboost_actual_vs_pred_combined.png")
     ]
     
-    for i in range(0, len(feature_sets), 2):
-        cols = st.columns(2)
-        for j in range(2):
-            if i+j < len(feature_sets):
-                show_image(feature_sets[i+j][1], feature_sets[i+j][0], cols[j])
+    for col, (caption, file) in zip(grid(len(feature_sets), 2), feature_sets):
+        show_image(file, caption, col, len(feature_sets))
+
+    render_feature_curve(target, "Surface Soil Moisture")
+    render_whatif_panel(target, "Surface Soil Moisture")
 
 with tab3:
     st.header("Yearly Feature Analysis")
     
     st.subheader("Top Features Across Years (XGBoost)")
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("top15_yearly_bar.png", "Top 15 Features - Bar Chart", cols[0])
     show_image("top10_yearly_pie.png", "Top 10 Features - Pie Chart", cols[1])
     
     st.subheader("Feature Importance Trends")
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("yearly_heatmap.png", "Feature Importance Heatmap (Years)", cols[0])
     show_image("yearly_stacked_bar.png", "Top 10 Feature Contributions (Stacked Bar)", cols[1])
 
@@ -300,12 +229,12 @@ with tab4:
     st.header("Monthly Feature Analysis")
     
     st.subheader("Top Features Across Months (XGBoost)")
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("top15_monthly_bar.png", "Top 15 Features - Bar Chart", cols[0])
     show_image("top10_monthly_pie.png", "Top 10 Features - Pie Chart", cols[1])
     
     st.subheader("Feature Importance Trends")
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("monthly_heatmap.png", "Feature Importance Heatmap (Months)", cols[0])
     show_image("monthly_stacked_bar.png", "Top 10 Feature Contributions (Stacked Bar)", cols[1])
 
@@ -313,12 +242,12 @@ with tab5:
     st.header("SHAP Analysis")
     
     st.subheader("XGBoost Model Interpretability")
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("shap_with_10year_Summary_Plot.png", "SHAP Summary Plot (10 Years Data)", cols[0])
     show_image("shap_with_10year_Waterfall_Plot.png", "SHAP Waterfall Plot (10 Years Data)", cols[1])
     
     st.subheader("Temporal SHAP Analysis")
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("shap_yearly.png", "Yearly SHAP Values", cols[0])
     show_image("shap_monthly.png", "Monthly SHAP Values", cols[1])
 
@@ -338,6 +267,11 @@ with tab6:
             show_image(f"{model_key} R2score Performance ({target}_soil_moisture).png", 
                      f"{model_name} R² Score Distribution")
 
+    render_grid_explorer(target, "Surface Soil Moisture")
+
+# Fill the image placeholders
+loader.flush()
+
 # Footer
 st.markdown("---")
 st.caption("Soil Moisture Analysis Dashboard | Created with Streamlit")
\ No newline at end of file
@@ -1,8 +1,14 @@
 import streamlit as st
 import os
-from PIL import Image
 import pandas as pd
-import plotly.express as px
+
+from utils import results
+from utils.assets import AssetLoader
+from utils.figures import cached_figure, model_bar, trend_line
+from utils.layout import fit_image, grid, image_width, track_viewport
+from utils.sections import (fragment, get_period_table, render_feature_curve, render_grid_explorer,
+                            render_timeseries_section, render_whatif_panel, run_reader, select_run,
+                            temporal_controls)
 
 # Page Configuration
 st.set_page_config(layout="wide", page_title="Root Zone Soil Moisture Analysis")
@@ -65,31 +71,28 @@ st.markdown("""
 
 # Image directory
 image_dir = f"images/root_zone"
+# Model run to display; images and tables come from that run when one is selected
+run = select_run()
+
+# Image grids and sizes follow the client's screen
+track_viewport()
 
-def show_image(file, caption, col=None):
-    path = os.path.join(image_dir, file)
-    if os.path.exists(path):
-        img = Image.open(path)
-        if col:
-            with col:
-                st.image(img, caption=caption, use_column_width=True)
-                st.markdown(f'<p class="image-caption">{caption}</p>', unsafe_allow_html=True)
-        else:
-            st.image(img, caption=caption, use_column_width=True)
-            st.markdown(f'<p class="image-caption">{caption}</p>', unsafe_allow_html=True)
-    else:
-        st.warning(f"Image not found: {file}")
+# Images are read concurrently once the page layout is in place
+loader = AssetLoader(read=run_reader(run))
+
+def show_image(file, caption, col=None, count=2):
+    def render(img):
+        img = fit_image(img, image_width(2, count) if col is not None else image_width(1))
+        st.image(img, caption=caption, use_column_width=True)
+        st.markdown(f'<p class="image-caption">{caption}</p>', unsafe_allow_html=True)
+    loader.image(os.path.join(image_dir, file), render, col, missing=f"Image not found: {file}")
 
 # Model Performance Summary Card
 with st.container():
     st.markdown('<div class="header-style">📊 Model Performance Summary</div>', unsafe_allow_html=True)
     
     # Sample data - replace with your actual model performance metrics
-    model_data = {
-        "Model": ["XGBoost", "Gradient Boosting", "Random Forest", "Decision Tree", "Linear Regression"],
-        "RMSE": [0.03132, 0.03421, 0.05028, 0.05258, 0.06915],
-        "R²": [0.90477, 0.88641, 0.75459, 0.73157, 0.53577]
-    }
+    model_data = results.model_performance("root_zone", 5, run=run)
     
     col1, col2 = st.columns([1, 2])
     
@@ -105,167 +108,93 @@ with st.container():
     
     with col2:
         st.markdown('<div class="subheader-style">R² Score Comparison</div>', unsafe_allow_html=True)
-        fig = px.bar(
-            pd.DataFrame(model_data),
-            x='Model', 
-            y='R²',
-            color='Model',
-            text='R²',
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        fig.update_traces(texttemplate='%{text:.3f}', textposition='outside')
-        fig.update_layout(showlegend=False, yaxis_title="R² Score")
+        fig = cached_figure(model_bar, pd.DataFrame(model_data))
         st.plotly_chart(fig, use_column_width=True)
 
-# XGBoost Monthly Performance Section - Root Zone Soil Moisture
-with st.container():
-    st.markdown('<div class="section-header">📅 XGBoost Monthly Performance (Root Zone Soil Moisture)</div>', unsafe_allow_html=True)
-    
-    monthly_data = {
-        "Month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "Mean"],
-        "RMSE": [0.02517, 0.0234, 0.02182, 0.02261, 0.02765, 0.0335,
-                0.04522, 0.03431, 0.03085, 0.02935, 0.02825, 0.02808, 0.0292],
-        "R²": [0.8715, 0.8927, 0.9163, 0.9267, 0.9065, 0.8949,
-              0.8155, 0.8644, 0.8878, 0.888, 0.863, 0.8548, 0.8818]
-    }
-    
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown('<div class="subsection-header">Monthly Metrics</div>', unsafe_allow_html=True)
-        st.dataframe(
-            pd.DataFrame(monthly_data)
-            .style.format({'RMSE': '{:.5f}', 'R²': '{:.4f}'})  # Adjusted decimal places
-            .highlight_max(subset=['R²'], color='#d5f5e3')
-            .highlight_min(subset=['RMSE'], color='#d5f5e3')
-            .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
-        )
-    
-    with col2:
-        st.markdown('<div class="subsection-header">Monthly Performance Trends</div>', unsafe_allow_html=True)
-        tab1, tab2 = st.tabs(["R² Score", "RMSE"])
-        
-        with tab1:
-            fig = px.line(
-                pd.DataFrame(monthly_data).iloc[:-1],  # Exclude mean row
-                x='Month', 
-                y='R²',
-                markers=True,
-                text='R²',
-                color_discrete_sequence=['#3498db'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.3f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="R² Score",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.8, 0.94]  # Adjusted range for root zone moisture
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab2:
-            fig = px.line(
-                pd.DataFrame(monthly_data).iloc[:-1],  # Exclude mean row
-                x='Month', 
-                y='RMSE',
-                markers=True,
-                text='RMSE',
-                color_discrete_sequence=['#e74c3c'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.5f}', 
-                textposition='top center',
-                line_width=2
+# Monthly and yearly performance, rerun on their own when their inputs change
+@fragment
+def performance_breakdown():
+    # Model and filters for the monthly/yearly breakdowns; changing them only
+    # reruns this fragment
+    period_model_name, period_model_key, period_filters = temporal_controls("root_zone", run)
+
+    # Monthly Performance Section - Root Zone Soil Moisture
+    with st.container():
+        st.markdown(f'<div class="section-header">📅 {period_model_name} Monthly Performance (Root Zone Soil Moisture)</div>', unsafe_allow_html=True)
+
+        monthly_data = results.monthly("root_zone", run)
+        monthly_computed = get_period_table("root_zone", period_model_key, "month", run, **period_filters)
+        if monthly_computed is not None:
+            monthly_data = results.with_mean(monthly_computed)
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown('<div class="subsection-header">Monthly Metrics</div>', unsafe_allow_html=True)
+            st.dataframe(
+                pd.DataFrame(monthly_data)
+                .style.format({'RMSE': '{:.5f}', 'R²': '{:.4f}'})  # Adjusted decimal places
+                .highlight_max(subset=['R²'], color='#d5f5e3')
+                .highlight_min(subset=['RMSE'], color='#d5f5e3')
+                .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
             )
-            fig.update_layout(
-                yaxis_title="RMSE",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.02, 0.047]  # Adjusted range for root zone moisture
+
+        with col2:
+            st.markdown('<div class="subsection-header">Monthly Performance Trends</div>', unsafe_allow_html=True)
+            tab1, tab2 = st.tabs(["R² Score", "RMSE"])
+
+            with tab1:
+                fig = cached_figure(trend_line, monthly_data, 'Month', 'R²',
+                                    yaxis_range=None if monthly_computed is not None else [0.8, 0.94])  # Adjusted range for root zone moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+            with tab2:
+                fig = cached_figure(trend_line, monthly_data, 'Month', 'RMSE',
+                                    yaxis_range=None if monthly_computed is not None else [0.02, 0.047])  # Adjusted range for root zone moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+    # Yearly Performance Section - Root Zone Soil Moisture
+    with st.container():
+        st.markdown(f'<div class="section-header">📅 {period_model_name} Yearly Performance (Root Zone Soil Moisture)</div>', unsafe_allow_html=True)
+
+        yearly_data = results.yearly("root_zone", run)
+        yearly_computed = get_period_table("root_zone", period_model_key, "year", run, **period_filters)
+        if yearly_computed is not None:
+            yearly_data = results.with_mean(yearly_computed)
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown('<div class="subsection-header">Yearly Metrics</div>', unsafe_allow_html=True)
+            st.dataframe(
+                pd.DataFrame(yearly_data)
+                .style.format({'RMSE': '{:.5f}', 'R²': '{:.4f}'})  # Adjusted decimal places
+                .highlight_max(subset=['R²'], color='#d5f5e3')
+                .highlight_min(subset=['RMSE'], color='#d5f5e3')
+                .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
             )
-            st.plotly_chart(fig, use_container_width=True)
 
-# XGBoost Yearly Performance Section - Root Zone Soil Moisture
+        with col2:
+            st.markdown('<div class="subsection-header">Yearly Performance Trends</div>', unsafe_allow_html=True)
+            tab1, tab2 = st.tabs(["R² Score", "RMSE"])
+
+            with tab1:
+                fig = cached_figure(trend_line, yearly_data, 'Year', 'R²',
+                                    yaxis_range=None if yearly_computed is not None else [0.6, 0.75])  # Adjusted range for root zone moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+            with tab2:
+                fig = cached_figure(trend_line, yearly_data, 'Year', 'RMSE',
+                                    yaxis_range=None if yearly_computed is not None else [0.04, 0.05])  # Adjusted range for root zone moisture
+                st.plotly_chart(fig, use_container_width=True)
+
+
+performance_breakdown()
+
+# Soil Moisture Time Series Section
 with st.container():
-    st.markdown('<div class="section-header">📅 XGBoost Yearly Performance (Root Zone Soil Moisture)</div>', unsafe_allow_html=True)
-    
-    yearly_data = {
-        "Year": [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, "Mean"],
-        "RMSE": [0.04654, 0.04667, 0.04548, 0.04418, 0.04526, 0.04891, 
-                0.04634, 0.04423, 0.04557, 0.04176, 0.0455],
-        "R²": [0.6731, 0.6281, 0.7047, 0.6821, 0.7195, 0.6516,
-              0.6851, 0.6745, 0.6583, 0.7201, 0.6797]
-    }
-    
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown('<div class="subsection-header">Yearly Metrics</div>', unsafe_allow_html=True)
-        st.dataframe(
-            pd.DataFrame(yearly_data)
-            .style.format({'RMSE': '{:.5f}', 'R²': '{:.4f}'})  # Adjusted decimal places
-            .highlight_max(subset=['R²'], color='#d5f5e3')
-            .highlight_min(subset=['RMSE'], color='#d5f5e3')
-            .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
-        )
-    
-    with col2:
-        st.markdown('<div class="subsection-header">Yearly Performance Trends</div>', unsafe_allow_html=True)
-        tab1, tab2 = st.tabs(["R² Score", "RMSE"])
-        
-        with tab1:
-            fig = px.line(
-                pd.DataFrame(yearly_data).iloc[:-1],  # Exclude mean row
-                x='Year', 
-                y='R²',
-                markers=True,
-                text='R²',
-                color_discrete_sequence=['#3498db'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.3f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="R² Score",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.6, 0.75]  # Adjusted range for root zone moisture
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab2:
-            fig = px.line(
-                pd.DataFrame(yearly_data).iloc[:-1],  # Exclude mean row
-                x='Year', 
-                y='RMSE',
-                markers=True,
-                text='RMSE',
-                color_discrete_sequence=['#e74c3c'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.5f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="RMSE",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.04, 0.05]  # Adjusted range for root zone moisture
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
+    render_timeseries_section("root_zone", "Root Zone Soil Moisture")
+
 # Main Analysis Tabs
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "📊 Feature Importance", 
@@ -289,7 +218,7 @@ with tab1:
     
     for model_name, model_key in models:
         with st.expander(f"### {model_name}", expanded=True):
-            cols = st.columns(2)
+            cols = grid(2, 2)
             show_image(f"{model_key}_importance.png", f"{model_name} Feature Importance", cols[0])
             show_image(f"{model_key}_importance_%_pie_chart.png", f"{model_name} Feature Contribution", cols[1])
 
@@ -305,31 +234,31 @@ with tab2:
         ("Combined Analysis", "xgboost_actual_vs_pred_combined.png")
     ]
     
-    for i in range(0, len(feature_sets), 2):
-        cols = st.columns(2)
-        for j in range(2):
-            if i+j < len(feature_sets):
-                show_image(feature_sets[i+j][1], feature_sets[i+j][0], cols[j])
+    for col, (caption, file) in zip(grid(len(feature_sets), 2), feature_sets):
+        show_image(file, caption, col, len(feature_sets))
+
+    render_feature_curve("root_zone", "Root Zone Soil Moisture")
+    render_whatif_panel("root_zone", "Root Zone Soil Moisture")
 
 with tab3:
     st.markdown('<div class="header-style">Yearly Feature Patterns</div>', unsafe_allow_html=True)
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("top15_yearly_bar.png", "Top 15 Features - Bar Chart", cols[0])
     show_image("top10_yearly_pie.png", "Top 10 Features - Pie Chart", cols[1])
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("yearly_heatmap.png", "Yearly Feature Importance Heatmap", cols[0])
     show_image("yearly_stacked_bar.png", "Top 10 Feature Contributions", cols[1])
 
 with tab4:
     st.markdown('<div class="header-style">Monthly Feature Patterns</div>', unsafe_allow_html=True)
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("top15_monthly_bar.png", "Top 15 Features - Bar Chart", cols[0])
     show_image("top10_monthly_pie.png", "Top 10 Features - Pie Chart", cols[1])
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("monthly_heatmap.png", "Monthly Feature Importance Heatmap", cols[0])
     show_image("monthly_stacked_bar.png", "Top 10 Feature Contributions", cols[1])
 
@@ -337,12 +266,12 @@ with tab5:
     st.markdown('<div class="header-style">SHAP Value Analysis</div>', unsafe_allow_html=True)
     
     st.markdown('<div class="subheader-style">Model Interpretability</div>', unsafe_allow_html=True)
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("shap_with_10year_Summary_Plot.png", "SHAP Summary Plot (10 Years)", cols[0])
     show_image("shap_with_10year_Waterfall_Plot.png", "SHAP Waterfall Plot (10 Years)", cols[1])
     
     st.markdown('<div class="subheader-style">Temporal Patterns</div>', unsafe_allow_html=True)
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("shap_yearly.png", "Yearly SHAP Values", cols[0])
     show_image("shap_monthly.png", "Monthly SHAP Values", cols[1])
 
@@ -362,6 +291,11 @@ with tab6:
             show_image(f"{model_key} R2score Performance (root_zone_soil_moisture).png", 
                       f"{model_name} R² Spatial Distribution")
 
+    render_grid_explorer("root_zone", "Root Zone Soil Moisture")
+
+# Fill the image placeholders
+loader.flush()
+
 # Footer
 st.markdown("---")
 st.markdown("""
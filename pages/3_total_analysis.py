@@ -1,8 +1,14 @@
 import streamlit as st
 import os
-from PIL import Image
 import pandas as pd
-import plotly.express as px
+
+from utils import results
+from utils.assets import AssetLoader
+from utils.figures import cached_figure, model_bar, trend_line
+from utils.layout import fit_image, grid, image_width, track_viewport
+from utils.sections import (fragment, get_period_table, render_feature_curve, render_grid_explorer,
+                            render_timeseries_section, render_whatif_panel, run_reader, select_run,
+                            temporal_controls)
 
 # Page Configuration
 st.set_page_config(
@@ -108,36 +114,30 @@ with st.container():
 
 # Image directory
 image_dir = f"images/total"
+# Model run to display; images and tables come from that run when one is selected
+run = select_run()
+
+# Image grids and sizes follow the client's screen
+track_viewport()
+
+# Images are read concurrently once the page layout is in place
+loader = AssetLoader(read=run_reader(run))
 
-def show_image(file, caption, col=None):
-    path = os.path.join(image_dir, file)
-    if os.path.exists(path):
-        img = Image.open(path)
-        if col:
-            with col:
-                st.markdown(f'<div class="visual-card">', unsafe_allow_html=True)
-                st.image(img, use_column_width=True)
-                st.markdown(f'<p class="image-caption">{caption}</p>', unsafe_allow_html=True)
-                st.markdown(f'</div>', unsafe_allow_html=True)
-        else:
-            st.markdown(f'<div class="visual-card">', unsafe_allow_html=True)
-            st.image(img, use_column_width=True)
-            st.markdown(f'<p class="image-caption">{caption}</p>', unsafe_allow_html=True)
-            st.markdown(f'</div>', unsafe_allow_html=True)
-    else:
-        st.warning(f"Image not found: {file}")
+def show_image(file, caption, col=None, count=2):
+    def render(img):
+        img = fit_image(img, image_width(2, count) if col is not None else image_width(1))
+        st.markdown(f'<div class="visual-card">', unsafe_allow_html=True)
+        st.image(img, use_column_width=True)
+        st.markdown(f'<p class="image-caption">{caption}</p>', unsafe_allow_html=True)
+        st.markdown(f'</div>', unsafe_allow_html=True)
+    loader.image(os.path.join(image_dir, file), render, col, missing=f"Image not found: {file}")
 
 # Model Performance Summary Section
 with st.container():
     st.markdown('<div class="section-header">📊 Model Performance Summary</div>', unsafe_allow_html=True)
     
     # Performance data - replace with your actual metrics
-    model_data = {
-        "Model": ["XGBoost", "Gradient Boosting", "Random Forest", 
-                 "Decision Tree", "Linear Regression", "CNN-LSTM"],
-        "RMSE": [0.02694, 0.02991, 0.06261, 0.04772, 0.06615, 0.06882],
-        "R²": [0.91110, 0.89046, 0.79556, 0.72112, 0.46417, 0.89974]
-    }
+    model_data = results.model_performance("total", 6, run=run)
     
     col1, col2 = st.columns([1, 2])
     
@@ -158,201 +158,96 @@ with st.container():
         tab1, tab2 = st.tabs(["R² Score", "RMSE"])
         
         with tab1:
-            fig = px.bar(
-                pd.DataFrame(model_data),
-                x='Model', 
-                y='R²',
-                color='Model',
-                text='R²',
-                color_discrete_sequence=px.colors.qualitative.Pastel,
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.3f}', 
-                textposition='outside',
-                marker_line_color='rgb(8,48,107)',
-                marker_line_width=1
-            )
-            fig.update_layout(
-                showlegend=False, 
-                yaxis_title="R² Score",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
+            fig = cached_figure(model_bar, pd.DataFrame(model_data))
             st.plotly_chart(fig, use_column_width=True)
         
         with tab2:
-            fig = px.bar(
-                pd.DataFrame(model_data),
-                x='Model', 
-                y='RMSE',
-                color='Model',
-                text='RMSE',
-                color_discrete_sequence=px.colors.qualitative.Pastel,
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.4f}', 
-                textposition='outside',
-                marker_line_color='rgb(8,48,107)',
-                marker_line_width=1
-            )
-            fig.update_layout(
-                showlegend=False, 
-                yaxis_title="RMSE",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
+            fig = cached_figure(model_bar, pd.DataFrame(model_data), y='RMSE')
             st.plotly_chart(fig, use_column_width=True)
 
-# XGBoost Monthly Performance Section
-with st.container():
-    st.markdown('<div class="section-header">📅 XGBoost Monthly Performance</div>', unsafe_allow_html=True)
-    
-    monthly_data = {
-        "Month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec", "Mean"],
-        "RMSE": [0.02361, 0.02271, 0.02156, 0.0211, 0.02315, 0.02509,
-                0.0305, 0.03109, 0.03017, 0.02582, 0.02456, 0.02572, 0.0254],
-        "R²": [0.91031, 0.91371, 0.92066, 0.92892, 0.91878, 0.91649,
-              0.89804, 0.8973, 0.90285, 0.92343, 0.9166, 0.8967, 0.912]
-    }
-    
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown('<div class="subsection-header">Monthly Metrics</div>', unsafe_allow_html=True)
-        st.dataframe(
-            pd.DataFrame(monthly_data)
-            .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
-            .highlight_max(subset=['R²'], color='#d5f5e3')
-            .highlight_min(subset=['RMSE'], color='#d5f5e3')
-            .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
-        )
-    
-    with col2:
-        st.markdown('<div class="subsection-header">Monthly Performance Trends</div>', unsafe_allow_html=True)
-        tab1, tab2 = st.tabs(["R² Score", "RMSE"])
-        
-        with tab1:
-            fig = px.line(
-                pd.DataFrame(monthly_data).iloc[:-1],  # Exclude mean row
-                x='Month', 
-                y='R²',
-                markers=True,
-                text='R²',
-                color_discrete_sequence=['#3498db'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.3f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="R² Score",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.88, 0.94]  # Adjusted for better visualization
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab2:
-            fig = px.line(
-                pd.DataFrame(monthly_data).iloc[:-1],  # Exclude mean row
-                x='Month', 
-                y='RMSE',
-                markers=True,
-                text='RMSE',
-                color_discrete_sequence=['#e74c3c'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.4f}', 
-                textposition='top center',
-                line_width=2
+# Monthly and yearly performance, rerun on their own when their inputs change
+@fragment
+def performance_breakdown():
+    # Model and filters for the monthly/yearly breakdowns; changing them only
+    # reruns this fragment
+    period_model_name, period_model_key, period_filters = temporal_controls("total", run)
+
+    # Monthly Performance Section
+    with st.container():
+        st.markdown(f'<div class="section-header">📅 {period_model_name} Monthly Performance</div>', unsafe_allow_html=True)
+
+        monthly_data = results.monthly("total", run)
+        monthly_computed = get_period_table("total", period_model_key, "month", run, **period_filters)
+        if monthly_computed is not None:
+            monthly_data = results.with_mean(monthly_computed)
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown('<div class="subsection-header">Monthly Metrics</div>', unsafe_allow_html=True)
+            st.dataframe(
+                pd.DataFrame(monthly_data)
+                .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
+                .highlight_max(subset=['R²'], color='#d5f5e3')
+                .highlight_min(subset=['RMSE'], color='#d5f5e3')
+                .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
             )
-            fig.update_layout(
-                yaxis_title="RMSE",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.02, 0.032]  # Adjusted for better visualization
+
+        with col2:
+            st.markdown('<div class="subsection-header">Monthly Performance Trends</div>', unsafe_allow_html=True)
+            tab1, tab2 = st.tabs(["R² Score", "RMSE"])
+
+            with tab1:
+                fig = cached_figure(trend_line, monthly_data, 'Month', 'R²',
+                                    yaxis_range=None if monthly_computed is not None else [0.88, 0.94])  # Adjusted for better visualization
+                st.plotly_chart(fig, use_container_width=True)
+
+            with tab2:
+                fig = cached_figure(trend_line, monthly_data, 'Month', 'RMSE',
+                                    yaxis_range=None if monthly_computed is not None else [0.02, 0.032])  # Adjusted for better visualization
+                st.plotly_chart(fig, use_container_width=True)
+
+    # Yearly Performance Section
+    with st.container():
+        st.markdown(f'<div class="section-header">📅 {period_model_name} Yearly Performance</div>', unsafe_allow_html=True)
+
+        yearly_data = results.yearly("total", run)
+        yearly_computed = get_period_table("total", period_model_key, "year", run, **period_filters)
+        if yearly_computed is not None:
+            yearly_data = results.with_mean(yearly_computed)
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown('<div class="subsection-header">Yearly Metrics</div>', unsafe_allow_html=True)
+            st.dataframe(
+                pd.DataFrame(yearly_data)
+                .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
+                .highlight_max(subset=['R²'], color='#d5f5e3')
+                .highlight_min(subset=['RMSE'], color='#d5f5e3')
+                .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
             )
-            st.plotly_chart(fig, use_container_width=True)
 
-# XGBoost Yearly Performance Section
+        with col2:
+            st.markdown('<div class="subsection-header">Yearly Performance Trends</div>', unsafe_allow_html=True)
+            tab1, tab2 = st.tabs(["R² Score", "RMSE"])
+
+            with tab1:
+                fig = cached_figure(trend_line, yearly_data, 'Year', 'R²',
+                                    yaxis_range=None if yearly_computed is not None else [0.75, 0.88])  # Adjusted for better visualization
+                st.plotly_chart(fig, use_container_width=True)
+
+            with tab2:
+                fig = cached_figure(trend_line, yearly_data, 'Year', 'RMSE',
+                                    yaxis_range=None if yearly_computed is not None else [0.03, 0.042])  # Adjusted for better visualization
+                st.plotly_chart(fig, use_container_width=True)
+
+
+performance_breakdown()
+
+# Soil Moisture Time Series Section
 with st.container():
-    st.markdown('<div class="section-header">📅 XGBoost Yearly Performance</div>', unsafe_allow_html=True)
-    
-    yearly_data = {
-        "Year": [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, "Mean"],
-        "RMSE": [0.0381, 0.03999, 0.03469, 0.03465, 0.03447, 0.03943, 
-                0.03612, 0.03342, 0.03539, 0.03272, 0.0359],
-        "R²": [0.7895, 0.78494, 0.84115, 0.83321, 0.85489, 0.80275,
-              0.83417, 0.84762, 0.83013, 0.84774, 0.8266]
-    }
-    
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown('<div class="subsection-header">Yearly Metrics</div>', unsafe_allow_html=True)
-        st.dataframe(
-            pd.DataFrame(yearly_data)
-            .style.format({'RMSE': '{:.5f}', 'R²': '{:.5f}'})
-            .highlight_max(subset=['R²'], color='#d5f5e3')
-            .highlight_min(subset=['RMSE'], color='#d5f5e3')
-            .set_properties(**{'background-color': '#f8f9fa', 'border': '1px solid #dee2e6'})
-        )
-    
-    with col2:
-        st.markdown('<div class="subsection-header">Yearly Performance Trends</div>', unsafe_allow_html=True)
-        tab1, tab2 = st.tabs(["R² Score", "RMSE"])
-        
-        with tab1:
-            fig = px.line(
-                pd.DataFrame(yearly_data).iloc[:-1],  # Exclude mean row
-                x='Year', 
-                y='R²',
-                markers=True,
-                text='R²',
-                color_discrete_sequence=['#3498db'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.3f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="R² Score",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.75, 0.88]  # Adjusted for better visualization
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab2:
-            fig = px.line(
-                pd.DataFrame(yearly_data).iloc[:-1],  # Exclude mean row
-                x='Year', 
-                y='RMSE',
-                markers=True,
-                text='RMSE',
-                color_discrete_sequence=['#e74c3c'],
-                template='plotly_white'
-            )
-            fig.update_traces(
-                texttemplate='%{text:.4f}', 
-                textposition='top center',
-                line_width=2
-            )
-            fig.update_layout(
-                yaxis_title="RMSE",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis_range=[0.03, 0.042]  # Adjusted for better visualization
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    render_timeseries_section("total", "Total Soil Moisture")
 
 # Main Analysis Tabs
 tab_names = [
@@ -379,7 +274,7 @@ with tab1:
     
     for model_name, model_key in models:
         with st.expander(f"### {model_name}", expanded=False):
-            cols = st.columns(2)
+            cols = grid(2, 2)
             show_image(f"{model_key}_importance.png", f"{model_name} Feature Importance", cols[0])
             show_image(f"{model_key}_importance_%_pie_chart.png", f"{model_name} Feature Contribution", cols[1])
 
@@ -395,31 +290,31 @@ with tab2:
         ("Combined Analysis", "xgboost_actual_vs_pred_combined.png")
     ]
     
-    for i in range(0, len(feature_sets), 2):
-        cols = st.columns(2)
-        for j in range(2):
-            if i+j < len(feature_sets):
-                show_image(feature_sets[i+j][1], feature_sets[i+j][0], cols[j])
+    for col, (caption, file) in zip(grid(len(feature_sets), 2), feature_sets):
+        show_image(file, caption, col, len(feature_sets))
+
+    render_feature_curve("total", "Total Soil Moisture")
+    render_whatif_panel("total", "Total Soil Moisture")
 
 with tab3:
     st.markdown('<div class="section-header">Temporal Analysis - Yearly Patterns</div>', unsafe_allow_html=True)
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("top15_yearly_bar.png", "Top 15 Features (Bar Chart)", cols[0])
     show_image("top10_yearly_pie.png", "Top 10 Features (Pie Chart)", cols[1])
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("yearly_heatmap.png", "Feature Importance Heatmap", cols[0])
     show_image("yearly_stacked_bar.png", "Top Feature Contributions", cols[1])
 
 with tab4:
     st.markdown('<div class="section-header">Temporal Analysis - Monthly Patterns</div>', unsafe_allow_html=True)
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("top15_monthly_bar.png", "Top 15 Features (Bar Chart)", cols[0])
     show_image("top10_monthly_pie.png", "Top 10 Features (Pie Chart)", cols[1])
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("monthly_heatmap.png", "Feature Importance Heatmap", cols[0])
     show_image("monthly_stacked_bar.png", "Top Feature Contributions", cols[1])
 
@@ -427,12 +322,12 @@ with tab5:
     st.markdown('<div class="section-header">Model Interpretation</div>', unsafe_allow_html=True)
     st.markdown('<div class="subsection-header">SHAP Value Analysis</div>', unsafe_allow_html=True)
     
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("shap_with_10year_Summary_Plot.png", "SHAP Summary Plot (10 Years)", cols[0])
     show_image("shap_with_10year_Waterfall_Plot.png", "SHAP Waterfall Plot (10 Years)", cols[1])
     
     st.markdown('<div class="subsection-header">Temporal SHAP Patterns</div>', unsafe_allow_html=True)
-    cols = st.columns(2)
+    cols = grid(2, 2)
     show_image("shap_yearly.png", "Yearly SHAP Values", cols[0])
     show_image("shap_monthly.png", "Monthly SHAP Values", cols[1])
 
@@ -453,6 +348,11 @@ with tab6:
             show_image(f"{model_key} R2score Performance (total_soil_moisture).png", 
                       f"{model_name} R² Spatial Distribution")
 
+    render_grid_explorer("total", "Total Soil Moisture")
+
+# Fill the image placeholders
+loader.flush()
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -3,64 +3,124 @@ import pandas as pd
 import plotly.express as px
 import os
 
+from utils.assets import AssetLoader
+from utils.clustering import (agreement_matrix, load_cluster_features,
+                              load_cluster_labels, silhouette_estimate)
+from utils.figures import cached_figure, cluster_bar, compact_figure, silhouette_bar
+from utils.layout import fit_image, grid, image_width, track_viewport
+from utils import results
+from utils.sections import fragment, get_spatial_index, run_reader, select_run
+
 st.set_page_config(layout="wide")
 st.title("🌍 Clustering Analysis - All India Region")
 
 # Define main variables
 target_variables = {
     "Surface Soil Moisture": {
-        "scores": {
-            "Hierarchical": 0.3016,
-            "GMM": 0.4127,
-            "HMM": 0.2494,
-            "K-Shape": 0.0932,
-            "TS-KMeans": 0.3039,
-        },
-        "xgboost": [
-            ("Without Cluster", 0.0336, 0.91766),
-            ("Cluster 0", 0.02389, 0.94181),
-            ("Cluster 1", 0.02917, 0.91871),
-            ("Cluster 2", 0.03181, 0.92861),
-            ("Cluster 3", 0.03088, 0.89771),
-        ],
         "folder": "surface"
     },
     "Root Zone Soil Moisture": {
-        "scores": {
-            "Hierarchical": 0.3016,
-            "GMM": 0.5211,
-            "HMM": 0.2842,
-            "K-Shape": -0.0544,
-            "TS-KMeans": 0.3466,
-        },
-        "xgboost": [
-            ("Without Cluster", 0.03132, 0.90477),
-            ("Cluster 0", 0.02572, 0.95751),
-            ("Cluster 1", 0.02808, 0.89228),
-            ("Cluster 2", 0.02728, 0.9492),
-            ("Cluster 3", 0.03084, 0.88797),
-        ],
         "folder": "root_zone"
     },
     "Total Soil Moisture": {
-        "scores": {
-            "Hierarchical": 0.3025,
-            "GMM": 0.4226,
-            "HMM": 0.3089,
-            "K-Shape": -0.0452,
-            "TS-KMeans": 0.2984,
-        },
-        "xgboost": [
-            ("Without Cluster", 0.02694, 0.9111),
-            ("Cluster 0", 0.02297, 0.93182),
-            ("Cluster 1", 0.0194, 0.96853),
-            ("Cluster 2", 0.02638, 0.89768),
-            ("Cluster 3", 0.03061, 0.89561),
-        ],
         "folder": "total"
     },
 }
 
+# Model run to display; images and tables come from that run when one is selected
+run = select_run()
+
+# Image grids and sizes follow the client's screen
+track_viewport()
+
+# Images are read concurrently once the page layout is in place
+loader = AssetLoader(read=run_reader(run))
+
+def show_image(path, caption, col, columns=2, count=None):
+    def render(img):
+        st.image(fit_image(img, image_width(columns, count)), caption=caption, use_column_width=True)
+    loader.image(path, render, col)
+
+@st.cache_data
+def get_agreement_matrix(folder):
+    labels = load_cluster_labels(folder)
+    if len(labels) < 2:
+        return None
+    return agreement_matrix(labels)
+
+@st.cache_data
+def get_silhouette_scores(folder, sample_size):
+    features = load_cluster_features(folder)
+    labels = load_cluster_labels(folder)
+    if features is None or not labels:
+        return None
+    rows = []
+    for method, method_labels in labels.items():
+        estimate = silhouette_estimate(features, method_labels, sample_size=sample_size, random_state=0)
+        rows.append((method, estimate.score, estimate.ci_low, estimate.ci_high))
+    return pd.DataFrame(rows, columns=['Method', 'Silhouette Score', 'CI Low', 'CI High'])
+
+@fragment
+def clustering_performance(variable, data):
+    """Silhouette table and chart; the sampling inputs rerun only this section."""
+    folder = data["folder"]
+    with st.expander("⚙️ Silhouette evaluation"):
+        use_sampling = st.checkbox("Estimate from stratified sample", value=True, key=f"{folder}_sil_sampling")
+        sample_size = st.number_input("Sample size", min_value=100, value=2000, step=500,
+                                      disabled=not use_sampling, key=f"{folder}_sil_sample_size")
+
+    # Prefer scores computed from stored features/labels over the offline values
+    scores_df = get_silhouette_scores(folder, int(sample_size) if use_sampling else None)
+    if scores_df is None:
+        scores_df = results.silhouette(folder, run)
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.dataframe(
+            scores_df.style.format({'Silhouette Score': '{:.4f}', 'CI Low': '{:.4f}', 'CI High': '{:.4f}'})
+            .highlight_max(subset=['Silhouette Score'], color='#90EE90')
+            .highlight_min(subset=['Silhouette Score'], color='#FFCCCB'),
+            use_container_width=True
+        )
+    
+    with col2:
+        fig = cached_figure(silhouette_bar, scores_df, f'Silhouette Scores - {variable}')
+        st.plotly_chart(fig, use_column_width=True)
+
+@fragment
+def regional_composition(variable, folder):
+    """Cluster membership of the grid cells inside a lat/lon box."""
+    index = get_spatial_index(folder)
+    labels = load_cluster_labels(folder)
+    if index is None or not labels:
+        st.info(f"No stored grid cells or cluster labels found for {variable}.")
+        return
+
+    col1, col2 = st.columns(2)
+    lat_lo, lat_hi = float(index.lat.min()), float(index.lat.max())
+    lon_lo, lon_hi = float(index.lon.min()), float(index.lon.max())
+    with col1:
+        lat_range = st.slider("Latitude", lat_lo, lat_hi, (lat_lo, lat_hi), key=f"{folder}_region_lat")
+    with col2:
+        lon_range = st.slider("Longitude", lon_lo, lon_hi, (lon_lo, lon_hi), key=f"{folder}_region_lon")
+
+    cells = index.query_bbox(*lat_range, *lon_range)
+    composition = pd.concat([
+        pd.Series(method_labels[cells]).value_counts().rename_axis('Cluster').reset_index(name='Cells')
+        .assign(Method=method)
+        for method, method_labels in labels.items()
+    ])
+    composition['Cluster'] = composition['Cluster'].astype(str)
+    fig = px.bar(
+        composition,
+        x='Method',
+        y='Cells',
+        color='Cluster',
+        title=f'Cluster Membership of {len(cells)} Cells in Region - {variable}',
+        color_discrete_sequence=px.colors.qualitative.Set2
+    )
+    st.plotly_chart(compact_figure(fig), use_container_width=True)
+
 # Create tabs for each target variable
 tabs = st.tabs(list(target_variables.keys()))
 
@@ -68,50 +128,45 @@ for tab, (variable, data) in zip(tabs, target_variables.items()):
     with tab:
         # Section 1: Clustering Performance
         st.header("📊 Clustering Performance")
+        clustering_performance(variable, data)
         
-        # Convert scores to dataframe for better visualization
-        scores_df = pd.DataFrame.from_dict(data["scores"], orient='index', columns=['Silhouette Score'])
-        scores_df = scores_df.reset_index().rename(columns={'index': 'Method'})
-        
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.dataframe(
-                scores_df.style.format({'Silhouette Score': '{:.4f}'})
-                .highlight_max(subset=['Silhouette Score'], color='#90EE90')
-                .highlight_min(subset=['Silhouette Score'], color='#FFCCCB'),
-                use_container_width=True
-            )
-        
-        with col2:
-            fig = px.bar(
-                scores_df, 
-                x='Method', 
-                y='Silhouette Score',
-                title=f'Silhouette Scores - {variable}',
-                color='Method',
-                text='Silhouette Score',
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            fig.update_traces(texttemplate='%{text:.3f}', textposition='outside')
-            fig.update_layout(showlegend=False)
-            st.plotly_chart(fig, use_column_width=True)
+        # Method agreement: how similarly the methods partition the grid
+        st.header("🤝 Clustering Method Agreement")
+        agreement = get_agreement_matrix(data["folder"])
+        if agreement is None:
+            st.info(f"No stored cluster labels found for {variable}.")
+        else:
+            ari_tab, nmi_tab = st.tabs(["Adjusted Rand Index", "Normalized Mutual Information"])
+            for agreement_tab, matrix, metric in zip((ari_tab, nmi_tab), agreement, ("ARI", "NMI")):
+                with agreement_tab:
+                    fig = px.imshow(
+                        matrix,
+                        text_auto='.3f',
+                        color_continuous_scale='Blues',
+                        zmin=min(0, matrix.values.min()),
+                        zmax=1,
+                        title=f'{metric} Between Clustering Methods - {variable}'
+                    )
+                    st.plotly_chart(compact_figure(fig), use_container_width=True)
         
         # Section 2: Cluster Maps
         st.header("🗺️ India Cluster Maps")
         image_folder = f"images/{data['folder']}/"
         
         # Display cluster maps in columns
-        cols = st.columns(3)
+        cols = grid(5, 3)
         for i in range(1, 6):
             img_path = os.path.join(image_folder, f"{variable.split('(')[0].strip().replace(' ', '_').lower()}_cluster_{i}.png")
-            with cols[(i-1)%3]:
-                st.image(img_path, caption=f"Cluster {i-1}" if i>1 else "All India", use_column_width=True)
+            show_image(img_path, f"Cluster {i-1}" if i>1 else "All India", cols[i-1], columns=3, count=5)
+        
+        st.subheader("🧭 Regional Cluster Composition")
+        regional_composition(variable, data["folder"])
         
         # Section 3: XGBoost Performance by Cluster
         st.header("⚡ XGBoost Performance by Cluster")
         
         # Convert xgboost data to dataframe
-        xgb_df = pd.DataFrame(data["xgboost"], columns=['Cluster', 'RMSE', 'R²'])
+        xgb_df = results.cluster_xgboost(data["folder"], run)
         
         col1, col2 = st.columns([1, 2])
         with col1:
@@ -123,16 +178,7 @@ for tab, (variable, data) in zip(tabs, target_variables.items()):
             )
         
         with col2:
-            fig = px.bar(
-                xgb_df, 
-                x='Cluster', 
-                y='R²',
-                title=f'XGBoost R² by Cluster - {variable}',
-                color='Cluster',
-                text='R²',
-                color_discrete_sequence=px.colors.qualitative.Set2
-            )
-            fig.update_traces(texttemplate='%{text:.3f}', textposition='outside')
+            fig = cached_figure(cluster_bar, xgb_df, f'XGBoost R² by Cluster - {variable}')
             st.plotly_chart(fig, use_column_width=True)
         
         # Section 4: Feature Importance
@@ -143,13 +189,14 @@ for tab, (variable, data) in zip(tabs, target_variables.items()):
         
         for i, cluster_tab in enumerate(cluster_tabs, 1):
             with cluster_tab:
-                col1, col2 = st.columns(2)
+                col1, col2 = grid(2, 2)
                 bar_path = os.path.join(image_folder, f"{variable.split('(')[0].strip().replace(' ', '_').lower()}_feature_bar_cluster_{i}.png")
                 pie_path = os.path.join(image_folder, f"{variable.split('(')[0].strip().replace(' ', '_').lower()}_feature_pie_cluster_{i}.png")
                 
-                with col1:
-                    st.image(bar_path, caption=f"Feature Importance (Bar) - Cluster {i-1}", use_column_width=True)
-                with col2:
-                    st.image(pie_path, caption=f"Feature Contribution (Pie) - Cluster {i-1}", use_column_width=True)
+                show_image(bar_path, f"Feature Importance (Bar) - Cluster {i-1}", col1)
+                show_image(pie_path, f"Feature Contribution (Pie) - Cluster {i-1}", col2)
+
+        st.markdown("---")
 
-        st.markdown("---")
\ No newline at end of file
+# Fill the image placeholders
+loader.flush()
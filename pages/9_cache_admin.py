@@ -0,0 +1,103 @@
+import hmac
+import os
+
+import streamlit as st
+import pandas as pd
+
+from utils import results
+from utils.caches import cache_stats, invalidate, invalidate_all, stats_json
+from utils.sections import (get_available_models, get_date_range, get_error_raster, get_feature_curve,
+                            get_feature_spec, get_home_summary, get_model_registry, get_period_table,
+                            get_predictions, get_run_diff, get_run_ids, get_spatial_index,
+                            get_timeseries_store)
+
+st.set_page_config(layout="wide", page_title="Cache Administration")
+
+# Streamlit caches keyed by target folder, and those keyed by run
+TARGET_CACHES = [get_timeseries_store, get_predictions, get_error_raster, get_spatial_index,
+                 get_feature_spec, get_feature_curve, get_available_models, get_date_range,
+                 get_period_table, get_home_summary]
+RUN_CACHES = [get_run_ids, get_run_diff, get_home_summary]
+
+st.title("🛠️ Cache Administration")
+
+# Invalidation affects every session, so the page is only served to admins
+admin_password = os.environ.get("DASHBOARD_ADMIN_PASSWORD")
+if not admin_password:
+    st.info("Cache administration is disabled. Set `DASHBOARD_ADMIN_PASSWORD` to enable it.")
+    st.stop()
+if not st.session_state.get("cache_admin"):
+    password = st.text_input("Admin password", type="password")
+    if not password:
+        st.stop()
+    if not hmac.compare_digest(password.encode(), admin_password.encode()):
+        st.error("Wrong password")
+        st.stop()
+    st.session_state["cache_admin"] = True
+
+prediction_cache = get_model_registry().cache
+
+# --- Statistics ---
+st.header("📊 Cache Statistics")
+stats = pd.DataFrame(cache_stats(prediction_cache))
+st.dataframe(stats.style.format({"hit_rate": "{:.1%}", "bytes": "{:,.0f}"}, na_rep="–"),
+             use_container_width=True, hide_index=True)
+col1, col2 = st.columns([1, 5])
+with col1:
+    if st.button("🔄 Refresh"):
+        st.rerun()
+with col2:
+    st.download_button("⬇️ Download JSON", stats_json(prediction_cache),
+                       file_name="cache_stats.json", mime="application/json")
+st.caption("Streamlit's own `st.cache_data` / `st.cache_resource` entries are not counted. "
+           "They cannot be dropped for a single target or run, so the options below "
+           "clear them for all targets and runs.")
+
+
+def report(removed):
+    st.success("Removed " + ", ".join(f"{n} from {name}" for name, n in removed.items()) if removed
+               else "Nothing to remove")
+
+
+# --- Invalidation ---
+st.header("🧹 Invalidate")
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    st.subheader("By target")
+    target = st.selectbox("Target", list(results.TARGETS), format_func=results.TARGETS.get)
+    clear_pages = st.checkbox("Also clear page caches of all targets", value=True, key="clear_target_pages")
+    if st.button("Invalidate target", key="invalidate_target"):
+        if clear_pages:
+            for func in TARGET_CACHES:
+                func.clear()
+        report(invalidate(target=target, prediction_cache=prediction_cache))
+
+with col2:
+    st.subheader("By asset prefix")
+    prefix = st.text_input("Prefix", placeholder="images/surface/")
+    if st.button("Invalidate prefix", key="invalidate_prefix", disabled=not prefix):
+        report(invalidate(prefix=prefix))
+
+with col3:
+    st.subheader("By run")
+    runs = get_run_ids()
+    if runs:
+        run = st.selectbox("Run", runs[::-1])
+        clear_pages = st.checkbox("Also clear page caches of all runs", value=True, key="clear_run_pages")
+        if st.button("Invalidate run", key="invalidate_run"):
+            if clear_pages:
+                for func in RUN_CACHES:
+                    func.clear()
+            report(invalidate(run=run))
+    else:
+        st.info("No model runs recorded.")
+
+st.markdown("---")
+if st.button("Clear all caches", type="primary"):
+    removed = invalidate_all(prediction_cache)
+    # The registry is a cache_resource entry; stop its batcher threads before dropping it
+    get_model_registry().close()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    report(removed)
@@ -0,0 +1,25 @@
+import time
+
+from utils.assets import AssetLoader
+
+
+def _read(path):
+    if path == "hang":
+        time.sleep(3)
+    if path == "missing":
+        raise FileNotFoundError(path)
+    if path == "broken":
+        raise RuntimeError("backend error")
+    return b"data"
+
+
+def test_flush_does_not_wait_for_hung_reads():
+    rendered = []
+    loader = AssetLoader(read=_read, timeout=0.3)
+    for path in ("hang", "missing", "broken", "ok"):
+        loader.image(path, rendered.append)
+
+    start = time.perf_counter()
+    loader.flush()
+    assert time.perf_counter() - start < 1.5
+    assert rendered == [b"data"]
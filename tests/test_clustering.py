@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from utils import clustering
+
+metrics = pytest.importorskip("sklearn.metrics")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_agreement_scores_match_sklearn(seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 5, 500)
+    b = np.where(rng.random(500) < 0.6, a, rng.integers(0, 7, 500)) + 10
+    assert clustering.adjusted_rand_index(a, b) == pytest.approx(metrics.adjusted_rand_score(a, b), abs=1e-12)
+    assert clustering.normalized_mutual_info(a, b) == pytest.approx(
+        metrics.normalized_mutual_info_score(a, b), abs=1e-12)
+
+
+def test_agreement_scores_of_identical_labelings():
+    labels = np.array([3, 3, 1, 1, 2, 2, 2])
+    assert clustering.adjusted_rand_index(labels, labels + 5) == pytest.approx(1.0)
+    assert clustering.normalized_mutual_info(labels, labels + 5) == pytest.approx(1.0)
+
+
+def test_contingency_table_matches_sklearn():
+    rng = np.random.default_rng(0)
+    a, b = rng.integers(0, 4, 300), rng.choice([-1, 7, 9], 300)
+    from sklearn.metrics.cluster import contingency_matrix
+
+    np.testing.assert_array_equal(clustering.contingency_table(a, b), contingency_matrix(a, b))
+    with pytest.raises(ValueError):
+        clustering.contingency_table(a, b[:-1])
+
+
+def test_agreement_matrix():
+    labels = {"kmeans": np.array([0, 0, 1, 1, 2, 2]), "gmm": np.array([1, 1, 0, 0, 2, 2]),
+              "dbscan": np.array([0, 0, 0, 1, 1, 1])}
+    ari, nmi = clustering.agreement_matrix(labels)
+    assert list(ari.index) == list(ari.columns) == list(labels)
+    np.testing.assert_allclose(np.diag(ari), 1.0)
+    np.testing.assert_allclose(ari.to_numpy(), ari.to_numpy().T)
+    assert ari.loc["kmeans", "gmm"] == pytest.approx(1.0)
+    assert nmi.loc["kmeans", "dbscan"] == pytest.approx(
+        metrics.normalized_mutual_info_score(labels["kmeans"], labels["dbscan"]))
+
+
+@pytest.fixture
+def blobs():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0, 0, 0], [4, 0, 1], [0, 5, -2], [3, 3, 3]])
+    labels = rng.integers(0, len(centers), 600)
+    features = centers[labels] + rng.normal(scale=1.2, size=(600, 3))
+    return features, labels
+
+
+
+@pytest.mark.parametrize("block_bytes", [4096, clustering.DEFAULT_BLOCK_BYTES])
+def test_silhouette_matches_sklearn(blobs, block_bytes):
+    features, labels = blobs
+    expected = metrics.silhouette_samples(features, labels)
+    np.testing.assert_allclose(clustering.silhouette_samples(features, labels, block_bytes=block_bytes),
+                               expected, atol=1e-10)
+    assert clustering.silhouette_score(features, labels, block_bytes=block_bytes) == pytest.approx(
+        metrics.silhouette_score(features, labels), abs=1e-10)
+
+
+def test_silhouette_of_a_row_subset(blobs):
+    features, labels = blobs
+    rows = np.array([5, 0, 599, 42])
+    np.testing.assert_allclose(clustering.silhouette_samples(features, labels, rows=rows, block_bytes=4096),
+                               metrics.silhouette_samples(features, labels)[rows], atol=1e-10)
+
+
+def test_singleton_clusters_score_zero(blobs):
+    features, labels = blobs
+    labels = labels.copy()
+    labels[7] = 99
+    values = clustering.silhouette_samples(features, labels)
+    assert values[7] == 0.0
+    np.testing.assert_allclose(values, metrics.silhouette_samples(features, labels), atol=1e-10)
+
+
+def test_silhouette_estimate(blobs):
+    features, labels = blobs
+    exact = clustering.silhouette_score(features, labels)
+    estimate = clustering.silhouette_estimate(features, labels, sample_size=200, random_state=0)
+    assert estimate.ci_low <= estimate.score <= estimate.ci_high
+    assert estimate.ci_low - 0.02 <= exact <= estimate.ci_high + 0.02
+    full = clustering.silhouette_estimate(features, labels, sample_size=len(labels))
+    assert full.score == full.ci_low == full.ci_high == pytest.approx(exact)
+    assert full.n_samples == len(labels)
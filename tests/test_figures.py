@@ -0,0 +1,68 @@
+import base64
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.figures import FigureCache, figure_key, model_bar, trend_line
+
+
+def frame():
+    return pd.DataFrame({"Model": ["A", "B"], "RMSE": [0.031234567, 0.04], "R²": [0.81, 0.9]})
+
+
+def test_cache_is_keyed_on_builder_inputs():
+    cache = FigureCache()
+    builds = []
+
+    def build(df, y):
+        builds.append(y)
+        return model_bar(df, y=y)
+
+    spec = cache.spec(figure_key(model_bar, frame(), y="R²"), lambda: build(frame(), "R²"))
+    # An equal table rebuilt from scratch is a hit, and no figure is built
+    assert cache.spec(figure_key(model_bar, frame(), y="R²"), lambda: build(frame(), "R²")) is spec
+    assert cache.figure(figure_key(model_bar, frame(), y="R²"), lambda: build(frame(), "R²")) is \
+        cache.figure(figure_key(model_bar, frame(), y="R²"), lambda: build(frame(), "R²"))
+    # Another figure kind or another table is a miss
+    cache.spec(figure_key(model_bar, frame(), y="RMSE"), lambda: build(frame(), "RMSE"))
+    cache.spec(figure_key(model_bar, frame().assign(**{"R²": [0.8, 0.9]}), y="R²"), lambda: build(frame(), "R²"))
+    assert builds == ["R²", "RMSE", "R²"]
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert figure_key(model_bar, frame()) != figure_key(trend_line, frame())
+
+
+def test_rmse_labels_use_five_decimals():
+    fig = model_bar(frame(), y="RMSE")
+    assert fig.data[0].texttemplate == "%{text:.5f}"
+    assert model_bar(frame()).data[0].texttemplate == "%{text:.3f}"
+
+
+def _values(array):
+    """Plain values of a figure JSON array, decoding plotly's typed arrays."""
+    if isinstance(array, dict):
+        return np.frombuffer(base64.b64decode(array["bdata"]), dtype=array["dtype"]).tolist()
+    return list(array)
+
+
+def test_minimized_figure_is_smaller_and_keeps_the_data():
+    import json
+
+    import plotly.graph_objects as go
+
+    from utils.figures import minimize_figure, silhouette_bar
+
+    df = pd.DataFrame({"Method": ["KMeans", "GMM", "DBSCAN"], "Silhouette Score": [0.412345678912, 0.3, 0.25]})
+    fig = silhouette_bar(df, "Silhouette")
+    spec = minimize_figure(fig, digits=4)
+    assert len(json.dumps(spec)) < len(fig.to_json()) / 2
+    # Styling shared by the three bars lives once in the template
+    shared = spec["layout"]["template"]["data"]["bar"][0]
+    assert shared["textposition"] == "outside" and shared["texttemplate"] == "%{text:.3f}"
+    assert all("textposition" not in t for t in spec["data"])
+    # Bar charts need no colorscales
+    assert "colorscale" not in spec["layout"]["template"]["layout"]
+    rebuilt = go.Figure(spec)
+    assert [t.x[0] for t in rebuilt.data] == ["KMeans", "GMM", "DBSCAN"]
+    assert [_values(t["y"])[0] for t in spec["data"]] == pytest.approx([0.4123, 0.3, 0.25], rel=1e-3)
+    assert rebuilt.layout.title.text == "Silhouette"
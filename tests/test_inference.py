@@ -0,0 +1,137 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.inference import MicroBatcher, ModelRegistry, feature_rows
+from utils.prediction_cache import PredictionCache
+
+
+def test_cache_key_includes_the_quantization_step():
+    cache = PredictionCache()
+    calls = []
+
+    def compute(rows):
+        calls.append(len(rows))
+        return rows.sum(axis=1)
+
+    rows = np.array([[0.123, 0.456]])
+    cache.get_or_compute("m", rows, compute, step=0.1)
+    cache.get_or_compute("m", rows, compute, step=0.1)
+    # Both rows quantize to (2, 4); without the step in the key the second
+    # would return the first one's prediction
+    cache.get_or_compute("m", np.array([[2.0, 4.0]]), compute, step=1.0)
+    cache.get_or_compute("m", np.array([[0.2, 0.4]]), compute, step=0.1)
+    assert calls == [1, 1, 1]
+
+
+def test_models_load_outside_the_registry_lock(monkeypatch):
+    registry = ModelRegistry()
+    loads = []
+
+    def slow_load(folder, model_key, k):
+        loads.append(model_key)
+        time.sleep(0.3)
+        return object()
+
+    monkeypatch.setattr(registry, "_load", slow_load)
+    results = {}
+
+    def get(model_key):
+        results.setdefault(model_key, []).append(registry.batcher("surface", model_key, 5))
+
+    threads = [threading.Thread(target=get, args=(key,)) for key in ("xgboost", "xgboost", "random_forest")]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Two models load in parallel, and one model is loaded once
+    assert time.perf_counter() - start < 0.55
+    assert sorted(loads) == ["random_forest", "xgboost"]
+    assert results["xgboost"][0] is results["xgboost"][1]
+
+
+def test_close_serves_queued_requests_and_stops_the_workers():
+    registry = ModelRegistry()
+    batchers = []
+
+    def load(folder, model_key, k):
+        batchers.append(MicroBatcher(lambda rows: rows.sum(axis=1), max_wait=0.05))
+        return batchers[-1]
+
+    registry._load = load
+    futures = [registry.batcher("surface", key, 5).submit([[1.0, 2.0]]) for key in ("xgboost", "lstm")]
+    registry.close()
+    assert [f.result(1).tolist() for f in futures] == [[3.0], [3.0]]
+    assert not any(b._worker.is_alive() for b in batchers)
+    with pytest.raises(RuntimeError):
+        batchers[0].submit([[1.0, 2.0]])
+    # Closed models load again on next use
+    assert registry.batcher("surface", "xgboost", 5) is batchers[2]
+    registry.close()
+
+
+def test_batch_waits_at_most_max_wait_after_the_first_request():
+    batches = []
+
+    def predict(rows):
+        batches.append((len(rows), time.monotonic()))
+        return rows[:, 0]
+
+    batcher = MicroBatcher(predict, max_wait=0.2)
+    start = time.monotonic()
+    futures = [batcher.submit([[0.0]])]
+    # A steady trickle of requests, each within max_wait of the previous one
+    for i in range(1, 10):
+        time.sleep(0.05)
+        futures.append(batcher.submit([[float(i)]]))
+    assert [f.result(1).tolist() for f in futures] == [[float(i)] for i in range(10)]
+    batcher.close()
+    size, served = batches[0]
+    assert served - start < 0.3 and size < 10
+
+
+def test_feature_rows_follow_the_spec():
+    spec = {"features": {"a": {"min": 10.0, "max": 20.0, "mean": 12.0},
+                         "b": {"min": -1.0, "max": 1.0, "mean": 0.0},
+                         "c": {"min": 5.0, "max": 5.0, "mean": 5.0}},
+            "feature_sets": {"2": ["b", "a"], "3": ["a", "b", "c"]}}
+    rows = feature_rows(spec, 3, n=5000)
+    assert rows.shape == (5000, 3)
+    assert (rows.min(axis=0) >= [10, -1, 5]).all() and (rows.max(axis=0) <= [20, 1, 5]).all()
+    # Median of a triangular(10, 12, 20) distribution: 20 - sqrt(40)
+    assert abs(np.median(rows[:, 0]) - 13.675) < 0.2
+    assert feature_rows(spec, 2, n=10).shape == (10, 2)
+
+
+def test_concurrent_requests_are_batched():
+    calls = []
+    release = threading.Event()
+
+    def predict(rows):
+        release.wait(1)
+        calls.append(len(rows))
+        return rows.sum(axis=1)
+
+    batcher = MicroBatcher(predict, max_batch=64, max_wait=0.05)
+    futures = [batcher.submit(np.full((2, 3), i)) for i in range(20)]
+    release.set()
+    assert [f.result(1).tolist() for f in futures] == [[3.0 * i] * 2 for i in range(20)]
+    batcher.close()
+    assert sum(calls) == 40 and len(calls) < 20
+
+
+def test_model_errors_reach_every_caller_in_the_batch():
+    def predict(rows):
+        raise ValueError("bad input")
+
+    batcher = MicroBatcher(predict, max_wait=0.05)
+    futures = [batcher.submit([[1.0]]) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError, match="bad input"):
+            future.result(1)
+    # The worker keeps serving after a failed batch
+    assert batcher.submit([[1.0]]).exception(1) is not None
+    batcher.close()
@@ -0,0 +1,41 @@
+import pytest
+
+from utils import layout
+
+
+@pytest.fixture
+def width(monkeypatch):
+    def set_width(value):
+        monkeypatch.setattr(layout, "viewport", lambda: {"width": value, "dpr": 1.0})
+    return set_width
+
+
+@pytest.mark.parametrize("viewport, preferred, count, expected", [
+    (360, 3, 5, 1),
+    (800, 3, 5, 2),
+    (800, 1, 5, 1),
+    (1400, 2, 5, 2),
+    (1920, 2, 5, 2),      # the layout the pages were written for
+    (2560, 2, 5, 2),
+    (3840, 2, 5, 4),      # 4K: cells as wide as at 1080p
+    (3840, 3, 5, 5),
+    (3840, 3, 4, 4),      # never more cells than images
+    (3840, 2, 2, 2),
+])
+def test_columns_for(width, viewport, preferred, count, expected):
+    width(viewport)
+    assert layout.columns_for(preferred, count) == expected
+
+
+@pytest.mark.parametrize("viewport", [360, 800, 1400, 1920, 3840])
+@pytest.mark.parametrize("preferred", [1, 2, 3])
+def test_columns_never_exceed_preferred_without_a_count(width, viewport, preferred):
+    width(viewport)
+    assert 1 <= layout.columns_for(preferred) <= preferred
+
+
+def test_image_width_follows_the_columns_used(width):
+    width(3840)
+    # 3440 px of content: 2 columns of 1720 px, or 4 of 860 px
+    assert layout.image_width(2) == 2400
+    assert layout.image_width(2, 5) == 1200
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import metrics
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(0)
+    n = 4000
+    actual = rng.random(n)
+    return {
+        "date": np.datetime64("2019-11-20") + rng.integers(0, 3 * 365, n).astype("timedelta64[D]"),
+        "cell": rng.integers(0, 30, n),
+        "actual": actual,
+        "predicted": actual + rng.normal(scale=0.05, size=n),
+    }
+
+
+def reference_table(predictions, period, mask=None):
+    df = pd.DataFrame(predictions)
+    if mask is not None:
+        df = df[mask]
+    dates = pd.DatetimeIndex(df["date"])
+    key = dates.month if period == "month" else dates.year
+    rows = []
+    for k, group in df.groupby(key.to_numpy()):
+        error = group["predicted"] - group["actual"]
+        sse = (error ** 2).sum()
+        sst = ((group["actual"] - group["actual"].mean()) ** 2).sum()
+        rows.append((metrics.MONTH_NAMES[k - 1] if period == "month" else k, np.sqrt(sse / len(group)), 1 - sse / sst))
+    return pd.DataFrame(rows, columns=["Month" if period == "month" else "Year", "RMSE", "R²"])
+
+
+@pytest.mark.parametrize("period", ["month", "year"])
+def test_period_table_matches_groupby(predictions, period):
+    pd.testing.assert_frame_equal(metrics.period_table(predictions, period), reference_table(predictions, period),
+                                  check_dtype=False, rtol=1e-9)
+
+
+def test_period_table_of_a_date_range_and_cluster(predictions):
+    cell_labels = np.arange(30) % 4
+    mask = metrics.filter_mask(predictions, "2020-03-01", "2021-02-28", cell_labels, 2)
+    dates = predictions["date"]
+    expected = ((dates >= np.datetime64("2020-03-01")) & (dates <= np.datetime64("2021-02-28"))
+                & (cell_labels[predictions["cell"]] == 2))
+    np.testing.assert_array_equal(mask, expected)
+    table = metrics.period_table(predictions, "year", mask)
+    assert table["Year"].tolist() == [2020, 2021]
+    pd.testing.assert_frame_equal(table, reference_table(predictions, "year", mask), check_dtype=False, rtol=1e-9)
+
+
+def test_unknown_period():
+    with pytest.raises(ValueError):
+        metrics.period_keys(np.array(["2020-01-01"], dtype="datetime64[D]"), "week")
+
+
+def test_load_predictions_memory_maps_the_columns(predictions, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "data" / "surface" / "predictions" / "xgboost"
+    root.mkdir(parents=True)
+    for col in metrics.COLUMNS:
+        np.save(root / f"{col}.npy", predictions[col])
+    loaded = metrics.load_predictions("surface", "xgboost")
+    assert all(isinstance(loaded[col], np.memmap) for col in metrics.COLUMNS)
+    np.testing.assert_array_equal(loaded["actual"], predictions["actual"])
+    assert metrics.load_predictions("surface", "lstm") is None
+    assert metrics.available_models("surface") == [("XGBoost", "xgboost")]
+
+
+def test_feature_curve_covers_the_stored_subsets(predictions, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    noise = {5: 0.08, 8: 0.05, 15: 0.03}
+    for k, scale in noise.items():
+        root = tmp_path / "data" / "surface" / "predictions" / metrics.feature_subset_key("xgboost", k)
+        root.mkdir(parents=True)
+        subset = dict(predictions, predicted=predictions["actual"] + scale)
+        for col in metrics.COLUMNS:
+            np.save(root / f"{col}.npy", subset[col])
+    curve = metrics.feature_curve("surface")
+    assert curve["Features"].tolist() == [5, 8, 15]
+    np.testing.assert_allclose(curve["RMSE"], list(noise.values()))
+    assert curve["R²"].is_monotonic_increasing
+    assert metrics.feature_curve("surface", "random_forest").empty
@@ -0,0 +1,41 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from utils.publish import IMAGE_ROOT, MANIFEST, publish_images
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def save_plot(path, seed):
+    pixels = np.random.default_rng(seed).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+
+
+def test_superseded_files_are_kept_until_the_grace_period(tmp_path):
+    src, out = tmp_path / "images", tmp_path / "site"
+    (src / "surface").mkdir(parents=True)
+    save_plot(src / "surface" / "map.png", 0)
+    (src / "surface" / "notes.txt").write_text("retrained 2025-06")
+
+    urls, counts = publish_images(str(out), str(src))
+    first = urls["surface"]["map.png"]
+    assert first.endswith(".webp") and counts["published"] == 2
+    # Non-image files are copied unchanged under a content-hash name
+    assert urls["surface"]["notes.txt"].endswith(".txt")
+    assert (out / urls["surface"]["notes.txt"]).read_text() == "retrained 2025-06"
+
+    save_plot(src / "surface" / "map.png", 1)
+    urls, counts = publish_images(str(out), str(src))
+    assert urls["surface"]["map.png"] != first
+    assert counts["removed"] == 0 and os.path.exists(out / first)
+    manifest = json.loads((out / IMAGE_ROOT / MANIFEST).read_text())
+    assert list(manifest["stale"]) == [first]
+
+    _, counts = publish_images(str(out), str(src), prune_after=3600)
+    assert counts["removed"] == 0 and os.path.exists(out / first)
+    _, counts = publish_images(str(out), str(src), prune_after=0)
+    assert counts["removed"] == 1 and not os.path.exists(out / first)
+    assert json.loads((out / IMAGE_ROOT / MANIFEST).read_text())["stale"] == {}
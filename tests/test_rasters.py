@@ -0,0 +1,61 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from utils.rasters import ErrorRaster, build_raster
+
+
+@pytest.fixture
+def raster(tmp_path):
+    # 10 x 20 cells of 1 degree from (8N, 68E)
+    data = np.arange(3 * 10 * 20, dtype=np.float32).reshape(3, 10, 20)
+    np.save(tmp_path / "xgboost.npy", data)
+    (tmp_path / "grid.json").write_text(json.dumps({"lat0": 8.0, "lon0": 68.0, "step": 1.0, "shape": [10, 20]}))
+    return ErrorRaster(str(tmp_path / "grid.json"), str(tmp_path / "xgboost.npy"))
+
+
+@pytest.mark.parametrize("box, shape", [
+    ((8, 17, 68, 87), (3, 10, 20)),     # whole grid
+    ((0, 100, 0, 200), (3, 10, 20)),    # larger than the grid
+    ((10, 12, 70, 75), (3, 3, 6)),      # inside
+    ((5, 9, 60, 69), (3, 2, 2)),        # overlapping a corner
+    ((0, 2, 70, 75), (3, 0, 0)),        # south of the grid
+    ((20, 30, 70, 75), (3, 0, 0)),      # north of the grid
+    ((10, 12, 90, 95), (3, 0, 0)),      # east of the grid
+    ((10, 12, 40, 50), (3, 0, 0)),      # west of the grid
+    ((12, 10, 70, 75), (3, 0, 0)),      # inverted box
+])
+def test_window_is_clipped_to_the_grid(raster, box, shape):
+    assert raster.window(*box).shape == shape
+
+
+def test_window_values_and_empty_region_stats(raster):
+    np.testing.assert_array_equal(raster.window(10, 12, 70, 75), raster.data[:, 2:5, 2:8])
+    stats = raster.region_stats(0, 2, 70, 75)
+    assert stats["Cells"].tolist() == [0, 0, 0]
+
+
+def test_build_raster_from_predictions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # 3 x 4 grid of 0.5 degree cells, one of them without a grid cell
+    lat, lon = np.meshgrid(8.0 + 0.5 * np.arange(3), 68.0 + 0.5 * np.arange(4), indexing="ij")
+    coords = np.c_[lat.ravel(), lon.ravel()][:-1]
+    os.makedirs("data/surface/predictions/xgboost")
+    np.save("data/surface/cells.npy", coords)
+    cells = np.repeat(np.arange(len(coords)), 5)
+    actual = np.linspace(0, 1, len(cells))
+    columns = {"date": np.full(len(cells), np.datetime64("2020-01-01")), "cell": cells,
+               "actual": actual, "predicted": actual + 0.1}
+    for col, values in columns.items():
+        np.save(f"data/surface/predictions/xgboost/{col}.npy", values)
+
+    path = build_raster("surface", "xgboost")
+    assert path == os.path.join("data", "surface", "rasters", "xgboost.npy")
+    assert sorted(os.listdir("data/surface/rasters")) == ["grid.json", "xgboost.npy"]
+    raster = ErrorRaster.open("surface", "xgboost")
+    assert raster.shape == (3, 4) and raster.step == 0.5
+    point = raster.point(8.5, 69.0)
+    assert (point["RMSE"], point["Bias"]) == pytest.approx((0.1, 0.1))
+    assert np.isnan(raster.point(9.0, 69.5)["RMSE"])
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import results
+
+
+@pytest.mark.parametrize("target", list(results.TARGETS))
+@pytest.mark.parametrize("name", list(results.TABLES))
+def test_every_table_builds(target, name):
+    df = results.TABLES[name](target)
+    assert len(df) > 0
+    assert df.columns[0] in ("Model", "Month", "Year", "Method", "Cluster")
+    assert not df.drop(columns=df.columns[0]).isna().any().any()
+
+
+@pytest.mark.parametrize("target", list(results.TARGETS))
+def test_period_tables_keep_integer_years_and_compute_mean(target):
+    raw = results.yearly(target, summary=False)
+    assert raw["Year"].tolist() == list(range(2015, 2025))
+    assert pd.api.types.is_integer_dtype(raw["Year"])
+
+    shown = results.yearly(target)
+    assert shown["Year"].iloc[-1] == "Mean"
+    assert shown["RMSE"].iloc[-1] == pytest.approx(raw["RMSE"].mean())
+    assert len(results.monthly(target)) == 13
+
+
+def test_compact_metrics_types_and_size():
+    compact = results.compact_metrics()
+    for column in ("target", "table", "row", "metric"):
+        assert isinstance(compact[column].dtype, pd.CategoricalDtype)
+    assert compact["value"].dtype == np.float32
+    assert "Mean" not in compact["row"].cat.categories
+
+    report = results.memory_report().set_index("Representation")["Bytes"]
+    assert report["Compact long frame"] < report["Long frame, object labels"]
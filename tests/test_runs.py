@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import runs, storage
+from utils.metrics import load_predictions
+
+
+def test_list_runs_reads_only_manifests(tmp_path):
+    backend = storage.LocalBackend(str(tmp_path))
+    store = runs.RunStore(backend)
+    store.commit("first", {"metrics/a.json": b"1"})
+    store.commit("second", {"metrics/a.json": b"2"}, parent="first")
+    # A run directory without a manifest (an interrupted commit) is skipped
+    backend.write("runs/partial/notes.txt", b"")
+    listed = []
+    backend.list = lambda prefix="": listed.append(prefix) or []
+    assert runs.RunStore(backend).list_runs() == ["first", "second"]
+    assert listed == []
+
+
+def test_object_cache_is_bounded_by_bytes(monkeypatch):
+    blobs = {runs.object_key(d): bytes(size) for d, size in (("aa", 40), ("bb", 40), ("cc", 40), ("dd", 500))}
+    monkeypatch.setattr(runs.storage, "read", lambda key: blobs[key])
+    cache = runs.ObjectCache(max_bytes=100)
+    for digest in ("aa", "bb", "cc"):
+        cache.get(digest)
+    assert (len(cache), cache.bytes, cache.evictions) == (2, 80, 1)
+    assert len(cache.get("dd")) == 500
+    assert (len(cache), cache.bytes) == (2, 80)
+
+
+def test_diff_sorts_by_relative_change():
+    def frame(rmse, r2):
+        return pd.DataFrame({"target": "surface", "table": "model_performance", "row": "XGBoost",
+                             "metric": ["RMSE", "R²"], "value": [rmse, r2]})
+
+    diff = runs.diff_metrics(frame(0.040, 0.80), frame(0.048, 0.79))
+    # RMSE moved 0.008 (20% worse), R² moved 0.01 (1.25% worse)
+    assert diff["metric"].tolist() == ["RMSE", "R²"]
+    assert diff["relative"].round(4).tolist() == [-0.2, -0.0125]
+    assert runs.regressions(diff, 0.005).tolist() == [True, True]
+
+
+def test_run_predictions_are_streamed_in_and_memory_mapped(tmp_path):
+    arrays = {"date": np.array(["2020-01-01"], dtype="datetime64[D]"), "cell": np.array([3]),
+              "actual": np.array([0.2]), "predicted": np.array([0.25])}
+    artifacts = {}
+    for col, values in arrays.items():
+        path = str(tmp_path / f"{col}.npy")
+        np.save(path, values)
+        artifacts[f"data/surface/predictions/xgboost/{col}.npy"] = path
+    store = runs.RunStore(storage.LocalBackend(str(tmp_path / "store")))
+    assert store.commit("r1", artifacts) == 4
+    assert store.commit("r2", artifacts) == 0
+
+    loaded = load_predictions("surface", "xgboost", resolve=lambda path: store.local_path("r1", path))
+    assert all(isinstance(loaded[col], np.memmap) for col in arrays)
+    assert {col: loaded[col].tolist() for col in arrays} == {col: v.tolist() for col, v in arrays.items()}
+    assert load_predictions("surface", "lstm", resolve=lambda path: store.local_path("r1", path)) is None
+
+
+def test_diff_signs_changes_by_metric_direction():
+    base = pd.DataFrame({"target": "surface", "table": "monthly", "row": ["Jan", "Jan", "Feb", "Mar"],
+                         "metric": ["RMSE", "R²", "R²", "R²"], "value": [0.05, 0.70, 0.0, 0.8]})
+    head = pd.DataFrame({"target": "surface", "table": "monthly", "row": ["Jan", "Jan", "Feb", "Apr"],
+                         "metric": ["RMSE", "R²", "R²", "R²"], "value": [0.04, 0.63, 0.1, 0.8]})
+    diff = runs.diff_metrics(base, head).set_index(["row", "metric"])
+    # Rows in only one run are dropped
+    assert sorted(diff.index) == [("Feb", "R²"), ("Jan", "RMSE"), ("Jan", "R²")]
+    # Lower RMSE is better, lower R² is worse
+    assert diff.loc[("Jan", "RMSE"), "change"] == pytest.approx(0.01)
+    assert diff.loc[("Jan", "R²"), "change"] == pytest.approx(-0.07)
+    assert diff.loc[("Feb", "R²"), "relative"] == np.inf
+    mask = runs.regressions(runs.diff_metrics(base, head), 0.05)
+    assert runs.diff_metrics(base, head)[mask]["row"].tolist() == ["Jan"]
+
+
+def test_offline_results_do_not_differ_from_themselves():
+    from utils.results import compact_metrics
+
+    diff = runs.diff_metrics(compact_metrics(), compact_metrics())
+    assert len(diff) and (diff["change"] == 0).all() and not runs.regressions(diff).any()
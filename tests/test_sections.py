@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+import streamlit as st
+
+from utils import sections
+from utils.timeseries import build_store
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+
+def test_sections_run_as_fragments():
+    assert sections.fragment is st.fragment
+
+
+def two_sections():
+    from utils.sections import render_timeseries_section
+
+    render_timeseries_section("frag_a", "A")
+    render_timeseries_section("frag_b", "B")
+
+
+def test_section_state_is_kept_per_target(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for folder in ("frag_a", "frag_b"):
+        build_store(f"data/{folder}/timeseries", "2020-01-01", np.random.default_rng(0).random((5, 60)))
+
+    at = AppTest.from_function(two_sections).run()
+    assert not at.exception
+    assert len(at.get("plotly_chart")) == 2
+    at.number_input(key="frag_a_ts_cell").set_value(3).run()
+    assert not at.exception
+    assert at.session_state["frag_a_ts_cell"] == 3
+    assert at.session_state["frag_b_ts_cell"] == 0
+
+
+def test_home_summary_is_built_once_per_target():
+    first = sections.get_home_summary("surface")
+    assert all(a is b for a, b in zip(first, sections.get_home_summary("surface")))
+    assert sections.get_home_summary("total")[0] is not first[0]
+
+
+def test_home_page_sections_switch_targets_independently():
+    at = AppTest.from_file("../Home.py", default_timeout=60).run()
+    assert not at.exception
+    at.radio(key="home_model_target").set_value("total").run()
+    assert not at.exception
+    assert at.session_state["home_model_target"] == "total"
+    assert at.session_state["home_cluster_target"] == "surface"
+    assert [link.label for link in at.sidebar.get("page_link")] == [label for _, label in sections.NAV_PAGES]
@@ -0,0 +1,28 @@
+import os
+
+from utils.snapshot import PageWriter, fingerprint, write_plotly
+
+
+def test_fingerprint_follows_content_not_mtime(tmp_path):
+    source = tmp_path / "images"
+    source.mkdir()
+    plot = source / "plot.png"
+    plot.write_bytes(b"one")
+    first = fingerprint([str(source)])
+    os.utime(plot, ns=(1, 1))
+    assert fingerprint([str(source)]) == first
+    plot.write_bytes(b"two")
+    os.utime(plot, ns=(1, 1))
+    assert fingerprint([str(source)]) != first
+
+
+def test_plotly_is_written_once_and_referenced(tmp_path):
+    tag = write_plotly(str(tmp_path))
+    name, = os.listdir(tmp_path)
+    assert name.startswith("plotly.") and name.endswith(".min.js")
+    assert tag == f'<script src="{name}"></script>'
+    mtime = os.stat(tmp_path / name).st_mtime_ns
+    assert write_plotly(str(tmp_path)) == tag and os.stat(tmp_path / name).st_mtime_ns == mtime
+
+    html = PageWriter("Home", {}).render(tag)
+    assert tag in html and len(html) < 10_000
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from utils.spatial import GridIndex
+
+
+@pytest.fixture(params=[0.25, 1.0, 7.0])
+def index(request):
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(8, 37, 3000)
+    lon = rng.uniform(68, 97, 3000)
+    # Cells on bin edges and at the grid corners
+    lat[:4] = [8, 37, 10, 8]
+    lon[:4] = [68, 97, 70, 97]
+    return GridIndex(lat, lon, request.param)
+
+
+def test_query_matches_brute_force(index):
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        lat_min, lon_min = rng.uniform(0, 45), rng.uniform(60, 105)
+        box = (lat_min, lat_min + rng.uniform(0, 10), lon_min, lon_min + rng.uniform(0, 10))
+        np.testing.assert_array_equal(index.query_bbox(*box), index.brute_force(*box))
+
+
+@pytest.mark.parametrize("box", [
+    (8, 37, 68, 97),        # whole grid
+    (0, 90, 0, 180),        # larger than the grid
+    (10, 10, 70, 70),       # a single point on a bin edge
+    (0, 5, 70, 75),         # south of the grid
+    (40, 45, 70, 75),       # north of the grid
+    (10, 12, 100, 110),     # east of the grid
+    (10, 12, 50, 60),       # west of the grid
+    (12, 10, 70, 75),       # inverted latitudes
+    (10, 12, 75, 70),       # inverted longitudes
+])
+def test_query_edges(index, box):
+    result = index.query_bbox(*box)
+    np.testing.assert_array_equal(result, index.brute_force(*box))
+    assert result.dtype.kind == "i"
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils import storage
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+
+@pytest.fixture
+def s3():
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="test",
+                              aws_secret_access_key="test")
+        client.create_bucket(Bucket="assets")
+        backend = storage.S3Backend("assets", "dashboard", client=client)
+        for name, size in (("a", 400), ("b", 400), ("c", 400)):
+            backend.write(f"images/surface/{name}.png", bytes([ord(name)]) * size)
+        yield backend
+
+
+def test_s3_backend(s3):
+    assert s3.read("images/surface/a.png") == b"a" * 400
+    assert s3.exists("images/surface/a.png")
+    assert not s3.exists("images/surface/missing.png")
+    assert s3.list("images") == ["images/surface/a.png", "images/surface/b.png", "images/surface/c.png"]
+    assert s3.list_dirs("") == ["images"] and s3.list_dirs("images") == ["surface"]
+    with pytest.raises(FileNotFoundError):
+        s3.read("images/surface/missing.png")
+
+
+def test_s3_write_file(s3, tmp_path):
+    source = tmp_path / "big.npy"
+    source.write_bytes(b"x" * 1000)
+    s3.write_file("data/surface/big.npy", str(source))
+    assert s3.read("data/surface/big.npy") == b"x" * 1000
+
+
+def test_s3_exists_raises_errors_other_than_not_found(s3):
+    from botocore.stub import Stubber
+
+    with Stubber(s3.client) as stub:
+        stub.add_client_error("head_object", service_error_code="403", http_status_code=403)
+        with pytest.raises(Exception, match="403"):
+            s3.exists("images/surface/a.png")
+
+
+def test_cache_streams_to_disk_and_evicts_least_recently_used(s3, tmp_path):
+    cache = storage.CachedBackend(s3, str(tmp_path), max_bytes=1000)
+    assert cache.read("images/surface/a.png") == b"a" * 400
+    assert cache.read("images/surface/b.png") == b"b" * 400
+    assert cache.read("images/surface/a.png") == b"a" * 400
+    # Over budget: b is the least recently used
+    assert cache.read("images/surface/c.png") == b"c" * 400
+    assert not os.path.exists(cache.cache.path("images/surface/b.png"))
+    assert (len(cache), cache.bytes, cache.evictions) == (2, 800, 1)
+    assert cache.local_path("images/surface/missing.png") is None
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(storage.TEMP_SUFFIX)]
+
+
+def test_local_path_files_are_evicted_while_in_use(s3, tmp_path):
+    cache = storage.CachedBackend(s3, str(tmp_path), max_bytes=1000)
+    path = cache.local_path("images/surface/a.png")
+    with open(path, "rb") as f:
+        cache.read("images/surface/b.png")
+        cache.read("images/surface/c.png")
+        # The budget holds: a is evicted although it is still open
+        assert not os.path.exists(path)
+        assert (len(cache), cache.bytes, cache.evictions) == (2, 800, 1)
+        assert f.read() == b"a" * 400
+    assert cache.local_path("images/surface/a.png") == path and os.path.exists(path)
+
+
+def test_failed_download_leaves_no_cached_file(tmp_path):
+    class Broken(storage.LocalBackend):
+        def download(self, key, fileobj):
+            fileobj.write(b"partial")
+            raise OSError("connection reset")
+
+    source = Broken(str(tmp_path / "remote"))
+    source.write("data/surface/cells.npy", b"x" * 10)
+    cache = storage.CachedBackend(source, str(tmp_path / "cache"))
+    with pytest.raises(OSError):
+        cache.read("data/surface/cells.npy")
+    assert len(cache) == 0 and os.listdir(tmp_path / "cache" / "data" / "surface") == []
+
+
+def test_memory_mapped_file_survives_invalidation(tmp_path):
+    source = storage.LocalBackend(str(tmp_path / "remote"))
+    np.save(tmp_path / "remote.npy", np.arange(5))
+    source.write("data/x.npy", (tmp_path / "remote.npy").read_bytes())
+    cache = storage.CachedBackend(source, str(tmp_path / "cache"))
+    mapped = np.load(cache.local_path("data/x.npy"), mmap_mode="r")
+    assert cache.invalidate("data/") == 1
+    assert mapped.tolist() == [0, 1, 2, 3, 4]
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from utils import metrics
+from utils.streaming import StreamingEvaluator
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(0)
+    n = 5000
+    actual = rng.random(n)
+    return pd.DataFrame({
+        "date": np.datetime64("2019-11-20") + rng.integers(0, 3 * 365, n).astype("timedelta64[D]"),
+        "cell": rng.integers(0, 40, n),
+        "actual": actual,
+        "predicted": actual + rng.normal(scale=0.05, size=n),
+    })
+
+
+def stream(predictions, chunk_rows, **kwargs):
+    evaluator = StreamingEvaluator(**kwargs)
+    for start in range(0, len(predictions), chunk_rows):
+        evaluator.update(predictions.iloc[start:start + chunk_rows])
+    assert evaluator.rows == len(predictions)
+    return evaluator
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 333, 5000])
+@pytest.mark.parametrize("period", ["month", "year"])
+def test_streaming_matches_batch_period_table(predictions, chunk_rows, period):
+    if chunk_rows == 1:
+        predictions = predictions.iloc[:300]
+    evaluator = stream(predictions, chunk_rows)
+    pdt.assert_frame_equal(evaluator.table(period), metrics.period_table(predictions, period),
+                           check_dtype=False, rtol=1e-9)
+
+
+def test_streaming_overall_and_clusters(predictions):
+    cell_labels = np.arange(40) % 3
+    evaluator = stream(predictions, 700, cell_labels=cell_labels)
+    overall = evaluator.table("overall")
+    assert overall[["RMSE", "R²"]].iloc[0].tolist() == pytest.approx(metrics.overall_metrics(predictions))
+    clusters = evaluator.table("cluster")
+    assert clusters["Cluster"].tolist() == ["Cluster 0", "Cluster 1", "Cluster 2"]
+    for k, row in clusters.iterrows():
+        mask = cell_labels[predictions["cell"].to_numpy()] == k
+        assert [row["RMSE"], row["R²"]] == pytest.approx(metrics.overall_metrics(predictions, mask))
+
+
+def test_cluster_group_needs_labels():
+    assert "cluster" not in StreamingEvaluator().groups
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_consume_reads_files_in_chunks(predictions, tmp_path, suffix):
+    path = str(tmp_path / f"predictions{suffix}")
+    if suffix == ".csv":
+        predictions.to_csv(path, index=False)
+    else:
+        pytest.importorskip("pyarrow")
+        predictions.to_parquet(path, index=False)
+    evaluator = StreamingEvaluator(groups=("month",)).consume(path, chunk_rows=777)
+    assert evaluator.rows == len(predictions)
+    pdt.assert_frame_equal(evaluator.table("month"), metrics.period_table(predictions, "month"),
+                           check_dtype=False, rtol=1e-9)
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.timeseries import build_store, lttb
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.arange(2000)
+    return x, np.sin(x / 50) + rng.normal(scale=0.1, size=len(x))
+
+
+@pytest.mark.parametrize("n_out", [3, 10, 257, 1999])
+def test_keeps_endpoints_and_order(series, n_out):
+    x, y = series
+    xs, ys = lttb(x, y, n_out)
+    assert len(xs) == len(ys) == n_out
+    assert xs[0] == x[0] and xs[-1] == x[-1]
+    assert (np.diff(xs) > 0).all()
+    np.testing.assert_array_equal(ys, y[xs])
+
+
+@pytest.mark.parametrize("n_out", [2, 2000, 5000])
+def test_short_series_and_tiny_targets_are_returned_whole(series, n_out):
+    x, y = series
+    xs, ys = lttb(x, y, n_out)
+    np.testing.assert_array_equal(xs, x)
+    np.testing.assert_array_equal(ys, y)
+
+
+def test_keeps_spikes(series):
+    x, y = series
+    y = y.copy()
+    y[1234], y[456] = 50.0, -50.0
+    xs, _ = lttb(x, y, 100)
+    assert {1234, 456} <= set(xs.tolist())
+
+
+def test_datetime_x(series):
+    _, y = series
+    dates = np.datetime64("2020-01-01") + np.arange(len(y)).astype("timedelta64[D]")
+    xs, ys = lttb(dates, y, 100)
+    assert xs.dtype == dates.dtype
+    assert xs[0] == dates[0] and xs[-1] == dates[-1]
+    np.testing.assert_array_equal(xs, dates[lttb(np.arange(len(y)), y, 100)[0]])
+
+
+def test_missing_values(series):
+    x, y = series
+    y = y.copy()
+    y[500:900] = np.nan
+    xs, ys = lttb(x, y, 100)
+    assert len(xs) == 100 and (np.diff(xs) > 0).all()
+
+
+@pytest.fixture
+def store(tmp_path):
+    rng = np.random.default_rng(0)
+    values = rng.random((7, 100)).astype(np.float32)
+    values[2, 10:20] = np.nan
+    values[4, :] = np.nan
+    # 2020-01-01 was a Wednesday, so the first week is partial
+    return values, build_store(str(tmp_path), "2020-01-01", values, chunk_cells=3)
+
+
+@pytest.mark.parametrize("resolution, freq", [("weekly", "W-SUN"), ("monthly", "M")])
+def test_rollups_match_pandas(store, resolution, freq):
+    values, ts = store
+    dates = pd.date_range("2020-01-01", periods=values.shape[1])
+    for cell in (0, 2, 5):
+        expected = pd.Series(values[cell], index=dates).groupby(dates.to_period(freq)).mean()
+        got_dates, got = ts.read_cell(cell, resolution)
+        # Periods are labelled by their first day in the store
+        starts = np.maximum(expected.index.start_time.to_numpy().astype("datetime64[D]"), dates[0].to_datetime64())
+        np.testing.assert_array_equal(got_dates, starts)
+        np.testing.assert_allclose(got, expected.to_numpy(), rtol=1e-6)
+    assert np.isnan(ts.read_cell(4, resolution)[1]).all()
+
+
+def test_read_cell_and_mean(store):
+    values, ts = store
+    dates, daily = ts.read_cell(5)
+    assert dates[0] == np.datetime64("2020-01-01") and len(dates) == 100
+    np.testing.assert_array_equal(daily, values[5])
+    with np.errstate(invalid="ignore"):
+        expected = np.nanmean(values[[1, 2, 4, 6]], axis=0)
+    np.testing.assert_allclose(ts.read_mean([6, 2, 1, 4, 2])[1], expected, rtol=1e-6)
+    with pytest.raises(IndexError):
+        ts.read_cell(7)
+
+
+def test_resolution_for(store):
+    _, ts = store
+    assert ts.resolution_for("2020-01-01", "2020-04-09", 100) == "daily"
+    assert ts.resolution_for("2020-01-01", "2020-04-09", 20) == "weekly"
+    assert ts.resolution_for("2020-01-01", "2020-04-09", 5) == "monthly"
+    assert ts.resolution_for("2020-01-01", "2020-04-09", 1) == "monthly"
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from utils.trees import compile_model, fastest_predictor, reference_predict
+
+
+def _data(n=2000, d=6, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, d))
+    y = 2 * X[:, 0] + np.sin(5 * X[:, 1]) + rng.normal(0, 0.1, n)
+    return X, y
+
+
+def _at_thresholds(compiled, X):
+    """Rows whose features sit exactly on (float64) split thresholds."""
+    X = X.copy()
+    splits = np.flatnonzero(compiled.left != np.arange(len(compiled.left)))
+    for row, node in enumerate(splits[:len(X)]):
+        X[row, compiled.feature[node]] = compiled.threshold[node] + 1e-12
+    return X
+
+
+SKLEARN_MODELS = [
+    DecisionTreeRegressor(random_state=0),
+    RandomForestRegressor(20, random_state=0),
+    ExtraTreesRegressor(20, random_state=0),
+    GradientBoostingRegressor(n_estimators=50, random_state=0),
+]
+
+
+@pytest.mark.parametrize("model", SKLEARN_MODELS, ids=lambda m: type(m).__name__)
+def test_sklearn_models_match_predict(model):
+    X, y = _data()
+    model.fit(X, y)
+    compiled = compile_model(model)
+    X_test = np.vstack([_data(500, seed=1)[0], _at_thresholds(compiled, _data(500, seed=2)[0])])
+    np.testing.assert_allclose(compiled.predict(X_test), model.predict(X_test), rtol=0, atol=1e-12)
+
+
+def test_xgboost_matches_predict_and_honours_best_iteration():
+    xgboost = pytest.importorskip("xgboost")
+    X, y = _data()
+    model = xgboost.XGBRegressor(n_estimators=200, max_depth=4, learning_rate=0.3, early_stopping_rounds=5)
+    model.fit(X[:1500], y[:1500], eval_set=[(X[1500:], y[1500:])], verbose=False)
+    assert model.best_iteration < 199
+
+    compiled = compile_model(model)
+    X_test = np.vstack([_data(500, seed=1)[0], _at_thresholds(compiled, _data(500, seed=2)[0])])
+    np.testing.assert_allclose(compiled.predict(X_test), model.predict(X_test), rtol=1e-6, atol=1e-6)
+
+
+def test_xgboost_dart_is_not_compiled():
+    xgboost = pytest.importorskip("xgboost")
+    X, y = _data(300)
+    model = xgboost.XGBRegressor(booster="dart", n_estimators=5).fit(X, y)
+    assert compile_model(model) is None
+    assert fastest_predictor(model) == reference_predict(model)
+
+
+@pytest.mark.parametrize("model", SKLEARN_MODELS[:2], ids=lambda m: type(m).__name__)
+def test_fastest_predictor_agrees_with_model(model):
+    X, y = _data()
+    model.fit(X, y)
+    predict = fastest_predictor(model, X[:2000])
+    np.testing.assert_allclose(predict(X), model.predict(X), atol=1e-12)
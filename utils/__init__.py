@@ -0,0 +1 @@
+"""Shared helpers for the Soil Moisture Dashboard pages."""
@@ -0,0 +1,63 @@
+"""Concurrent image loading for the pages.
+
+``AssetLoader.image`` reserves a placeholder where the image belongs and
+returns immediately; ``flush`` then reads every requested file concurrently
+on worker threads and fills each placeholder as its data arrives. A slow,
+missing or failing file only affects its own placeholder.
+
+Reads run on a process-wide thread pool that is never shut down by a
+page, so a read that hangs past its timeout keeps its worker thread but
+does not hold up the rest of the page.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils import storage
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="asset-read")
+
+
+class AssetLoader:
+    def __init__(self, read=None, timeout=10.0, max_concurrency=16):
+        self.read = read or storage.read
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._pending = []
+
+    def image(self, path, render, container=None, missing=None):
+        """Queue ``path``; ``render(data)`` is called inside its placeholder once loaded."""
+        placeholder = (container or st).empty()
+        placeholder.caption("⏳ Loading…")
+        self._pending.append((placeholder, path, render, missing or f"Image not found: {path}"))
+
+    async def _fetch(self, semaphore, entry):
+        async with semaphore:
+            read = asyncio.get_running_loop().run_in_executor(_executor, self.read, entry[1])
+            try:
+                data = await asyncio.wait_for(read, self.timeout)
+                return entry, data, None
+            except FileNotFoundError:
+                return entry, None, entry[3]
+            except asyncio.TimeoutError:
+                return entry, None, f"Timed out loading {entry[1]}"
+            except Exception as exc:  # any backend error (e.g. botocore) stays in its placeholder
+                return entry, None, f"Could not load {entry[1]}: {exc}"
+
+    async def _load_all(self):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [self._fetch(semaphore, entry) for entry in self._pending]
+        for next_done in asyncio.as_completed(tasks):
+            (placeholder, _, render, _), data, error = await next_done
+            if error:
+                placeholder.warning(error)
+            else:
+                with placeholder.container():
+                    render(data)
+
+    def flush(self):
+        """Load everything queued so far, filling placeholders as reads complete."""
+        if self._pending:
+            asyncio.run(self._load_all())
+            self._pending = []
@@ -0,0 +1,79 @@
+"""Statistics and targeted invalidation for the process-wide caches.
+
+Covers the caches that live outside Streamlit: the storage read-through
+cache (only when a remote backend is configured), minimized figures, run
+objects and tables, and model predictions. Streamlit's own ``st.cache_*``
+functions are cleared by the admin page itself.
+"""
+import json
+
+from utils import runs, storage
+from utils.figures import figure_cache
+
+TARGET_PREFIXES = ("data", "images", "models")
+
+
+def _row(name, entries, nbytes, hits, misses, evictions):
+    total = hits + misses
+    return {"cache": name, "entries": entries, "bytes": nbytes, "hits": hits, "misses": misses,
+            "evictions": evictions, "hit_rate": hits / total if total else None}
+
+
+def cache_stats(prediction_cache=None):
+    """One dict per cache with entries, bytes, hits, misses, evictions and hit rate."""
+    rows = []
+    backend = storage.get_storage()
+    if isinstance(backend, storage.CachedBackend):
+        rows.append(_row("storage", len(backend), backend.bytes,
+                         backend.hits, backend.misses, backend.evictions))
+    rows.append(_row("figures", len(figure_cache), figure_cache.nbytes(),
+                     figure_cache.hits, figure_cache.misses, figure_cache.evictions))
+    rows.extend(_row(name, **stats) for name, stats in runs.cache_stats().items())
+    if prediction_cache is not None:
+        stats = prediction_cache.stats.values()
+        rows.append(_row("predictions", len(prediction_cache), None,
+                         sum(s["hits"] for s in stats), sum(s["misses"] for s in stats),
+                         sum(s["evictions"] for s in stats)))
+    return rows
+
+
+def invalidate(target=None, prefix=None, run=None, prediction_cache=None):
+    """Drop cached entries for a target, an asset prefix or a run.
+
+    Returns ``{cache: entries removed}``. Caches that are not keyed by the
+    requested dimension are cleared whole.
+    """
+    removed = {}
+    backend = storage.get_storage()
+    prefixes = [prefix] if prefix else []
+    if target:
+        prefixes += [f"{root}/{target}/" for root in TARGET_PREFIXES]
+    if isinstance(backend, storage.CachedBackend):
+        removed["storage"] = sum(backend.invalidate(p) for p in prefixes)
+    if target or prefix:
+        removed["figures"] = len(figure_cache)
+        figure_cache.clear()
+    if target and prediction_cache is not None:
+        removed["predictions"] = prediction_cache.clear(lambda key: key[0][0] == target)
+    if run:
+        removed["run manifests"] = int(runs.get_run_store().forget(run))
+        removed.update(runs.clear_caches())
+    return removed
+
+
+def invalidate_all(prediction_cache=None):
+    """Empty every cache; returns ``{cache: entries removed}``."""
+    removed = {}
+    backend = storage.get_storage()
+    if isinstance(backend, storage.CachedBackend):
+        removed["storage"] = backend.invalidate()
+    removed["figures"] = len(figure_cache)
+    figure_cache.clear()
+    removed.update(runs.clear_caches())
+    if prediction_cache is not None:
+        removed["predictions"] = prediction_cache.clear()
+    return removed
+
+
+def stats_json(prediction_cache=None):
+    return json.dumps({"caches": cache_stats(prediction_cache)}, indent=2)
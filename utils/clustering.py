@@ -0,0 +1,204 @@
+"""Clustering evaluation helpers for the cluster analysis page.
+
+Label arrays are stored per target under ``data/<folder>/cluster_labels.npz``
+with one integer array per clustering method, all aligned on the same grid
+cell order. The feature matrix the methods were fitted on lives next to them
+in ``cluster_features.npy`` (one row per grid cell).
+"""
+import os
+from collections import namedtuple
+from itertools import combinations
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils.storage import local_path
+
+DATA_DIR = "data"
+LABELS_FILE = "cluster_labels.npz"
+FEATURES_FILE = "cluster_features.npy"
+
+# Upper bound on the size of one block of the distance matrix
+DEFAULT_BLOCK_BYTES = 64 * 1024 ** 2
+
+SilhouetteEstimate = namedtuple("SilhouetteEstimate", ["score", "ci_low", "ci_high", "n_samples"])
+
+
+def load_cluster_labels(folder, data_dir=DATA_DIR):
+    """Return ``{method: labels}`` for a target folder, or ``{}`` if none stored."""
+    path = local_path(os.path.join(data_dir, folder, LABELS_FILE))
+    if path is None:
+        return {}
+    with np.load(path) as archive:
+        return {method: np.asarray(archive[method]).ravel() for method in archive.files}
+
+
+def load_cluster_features(folder, data_dir=DATA_DIR):
+    """Return the memory-mapped feature matrix for a target, or ``None``."""
+    path = local_path(os.path.join(data_dir, folder, FEATURES_FILE))
+    if path is None:
+        return None
+    features = np.load(path, mmap_mode="r")
+    return features.reshape(len(features), -1)
+
+
+def contingency_table(labels_a, labels_b):
+    """Dense contingency table between two labelings, built with one bincount."""
+    labels_a = np.asarray(labels_a).ravel()
+    labels_b = np.asarray(labels_b).ravel()
+    if labels_a.shape != labels_b.shape:
+        raise ValueError("Label arrays must have the same length")
+    _, codes_a = np.unique(labels_a, return_inverse=True)
+    classes_b, codes_b = np.unique(labels_b, return_inverse=True)
+    n_a = codes_a.max() + 1 if codes_a.size else 0
+    n_b = len(classes_b)
+    counts = np.bincount(codes_a * n_b + codes_b, minlength=n_a * n_b)
+    return counts.reshape(n_a, n_b)
+
+
+def _comb2(x):
+    x = np.asarray(x, dtype=np.float64)
+    return x * (x - 1) / 2
+
+
+def adjusted_rand_index(labels_a, labels_b):
+    table = contingency_table(labels_a, labels_b)
+    n = table.sum()
+    if n < 2:
+        return 1.0
+    sum_cells = _comb2(table).sum()
+    sum_rows = _comb2(table.sum(axis=1)).sum()
+    sum_cols = _comb2(table.sum(axis=0)).sum()
+    expected = sum_rows * sum_cols / _comb2(n)
+    maximum = (sum_rows + sum_cols) / 2
+    if maximum == expected:
+        # Both labelings are trivial (single cluster or all singletons)
+        return 1.0
+    return float((sum_cells - expected) / (maximum - expected))
+
+
+def _entropy(counts, n):
+    p = counts[counts > 0] / n
+    return float(-(p * np.log(p)).sum())
+
+
+def normalized_mutual_info(labels_a, labels_b):
+    """NMI with arithmetic-mean normalisation (the scikit-learn default)."""
+    table = contingency_table(labels_a, labels_b).astype(np.float64)
+    n = table.sum()
+    rows = table.sum(axis=1)
+    cols = table.sum(axis=0)
+    h_a = _entropy(rows, n)
+    h_b = _entropy(cols, n)
+    if h_a == 0 and h_b == 0:
+        return 1.0
+    nz_r, nz_c = np.nonzero(table)
+    n_ij = table[nz_r, nz_c]
+    mutual_info = (n_ij / n * np.log(n_ij * n / (rows[nz_r] * cols[nz_c]))).sum()
+    return float(max(mutual_info, 0.0) / ((h_a + h_b) / 2))
+
+
+def agreement_matrix(labels):
+    """Pairwise ARI and NMI between every clustering method.
+
+    ``labels`` maps method name to a label array. Returns two square
+    DataFrames ``(ari, nmi)`` indexed by method with ones on the diagonal.
+    """
+    methods = list(labels)
+    ari = pd.DataFrame(np.eye(len(methods)), index=methods, columns=methods)
+    nmi = ari.copy()
+    for a, b in combinations(methods, 2):
+        ari.loc[a, b] = ari.loc[b, a] = adjusted_rand_index(labels[a], labels[b])
+        nmi.loc[a, b] = nmi.loc[b, a] = normalized_mutual_info(labels[a], labels[b])
+    return ari, nmi
+
+
+def silhouette_samples(features, labels, rows=None, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Silhouette value of each point in ``rows`` (default: every point).
+
+    Distances are computed block-wise against the full data set so that at
+    most ``block_bytes`` of the distance matrix is held at once. Per-cluster
+    distance sums come from one matrix product with a one-hot label matrix.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    _, codes = np.unique(np.asarray(labels).ravel(), return_inverse=True)
+    n = len(features)
+    if len(codes) != n:
+        raise ValueError("Labels and features must have the same number of rows")
+    rows = np.arange(n) if rows is None else np.asarray(rows)
+    counts = np.bincount(codes).astype(np.float64)
+    if len(counts) < 2:
+        raise ValueError("Silhouette needs at least two clusters")
+
+    one_hot = np.zeros((n, len(counts)))
+    one_hot[np.arange(n), codes] = 1.0
+    sq_norms = np.einsum("ij,ij->i", features, features)
+    block = max(1, int(block_bytes // (8 * n)))
+    buffer = np.empty((min(block, len(rows)), n))
+
+    values = np.empty(len(rows))
+    for start in range(0, len(rows), block):
+        idx = rows[start:start + block]
+        # Built in place in one reused buffer: the (block, n) distance matrix
+        # is the only large array
+        dist = np.matmul(features[idx], features.T, out=buffer[:len(idx)])
+        dist *= -2
+        dist += sq_norms[idx, None]
+        dist += sq_norms[None, :]
+        np.maximum(dist, 0.0, out=dist)
+        np.sqrt(dist, out=dist)
+        cluster_sums = dist @ one_hot
+        own = codes[idx]
+        own_count = counts[own]
+        a = cluster_sums[np.arange(len(idx)), own] / np.maximum(own_count - 1, 1)
+        means = cluster_sums / counts
+        means[np.arange(len(idx)), own] = np.inf
+        b = means.min(axis=1)
+        s = (b - a) / np.maximum(a, b)
+        # Singleton clusters score zero by convention
+        values[start:start + block] = np.where(own_count > 1, np.nan_to_num(s), 0.0)
+    return values
+
+
+def silhouette_score(features, labels, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Exact mean silhouette coefficient with bounded memory."""
+    return float(silhouette_samples(features, labels, block_bytes=block_bytes).mean())
+
+
+def silhouette_estimate(features, labels, sample_size=2000, confidence=0.95,
+                        random_state=None, block_bytes=DEFAULT_BLOCK_BYTES):
+    """Stratified-sample estimate of the mean silhouette with a confidence interval.
+
+    Points are sampled from each cluster in proportion to its size and scored
+    exactly against the full data set, so the estimate is unbiased for the
+    full-data score. Falls back to the exact score when ``sample_size`` covers
+    every point.
+    """
+    labels = np.asarray(labels).ravel()
+    n = len(labels)
+    if sample_size is None or sample_size >= n:
+        score = silhouette_score(features, labels, block_bytes=block_bytes)
+        return SilhouetteEstimate(score, score, score, n)
+
+    rng = np.random.default_rng(random_state)
+    classes, codes = np.unique(labels, return_inverse=True)
+    sizes = np.bincount(codes)
+    per_cluster = np.maximum(np.round(sample_size * sizes / n).astype(int), 2)
+    per_cluster = np.minimum(per_cluster, sizes)
+
+    strata = [rng.choice(np.flatnonzero(codes == k), per_cluster[k], replace=False)
+              for k in range(len(classes))]
+    values = silhouette_samples(features, labels, rows=np.concatenate(strata),
+                                block_bytes=block_bytes)
+
+    weights = sizes / n
+    bounds = np.cumsum(per_cluster)[:-1]
+    means = np.array([v.mean() for v in np.split(values, bounds)])
+    variances = np.array([v.var(ddof=1) if len(v) > 1 else 0.0
+                          for v in np.split(values, bounds)])
+    fpc = 1 - per_cluster / sizes
+    std_err = np.sqrt((weights ** 2 * variances / per_cluster * fpc).sum())
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    score = float((weights * means).sum())
+    return SilhouetteEstimate(score, score - z * std_err, score + z * std_err, len(values))
@@ -0,0 +1,88 @@
+"""Bulk export of every dashboard metric table, and optionally its figures.
+
+Usage::
+
+    python -m utils.export exports/ --format parquet --figures png --workers 4
+
+Tables are written once per name with a ``Target`` column covering all
+three targets. Figures are rendered in a process pool; static formats need
+``kaleido``, ``html`` does not.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from utils import results
+
+TABLE_FORMATS = ("csv", "parquet")
+FIGURE_FORMATS = ("png", "svg", "pdf", "html")
+
+
+def collect_tables():
+    """``{name: DataFrame}`` with all targets stacked under a ``Target`` column."""
+    tables = {}
+    for name, build in results.TABLES.items():
+        frames = [build(target).assign(Target=label) for target, label in results.TARGETS.items()]
+        df = pd.concat(frames, ignore_index=True)
+        tables[name] = df[["Target"] + [c for c in df.columns if c != "Target"]]
+    return tables
+
+
+def write_tables(tables, out_dir, fmt="csv"):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, df in tables.items():
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        if fmt == "parquet":
+            # Period columns mix years with the "Mean" label
+            df = df.astype({c: str for c in df.columns if df[c].dtype == object})
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def _render(job):
+    import plotly.io as pio
+
+    fig_json, path, fmt = job
+    fig = pio.from_json(fig_json)
+    if fmt == "html":
+        fig.write_html(path, include_plotlyjs="cdn")
+    else:
+        fig.write_image(path, format=fmt)
+    return path
+
+
+def write_figures(out_dir, fmt="png", workers=None):
+    from utils.figures import target_figures
+
+    jobs = []
+    for target, label in results.TARGETS.items():
+        target_dir = os.path.join(out_dir, "figures", target)
+        os.makedirs(target_dir, exist_ok=True)
+        for name, fig in target_figures(target, label).items():
+            jobs.append((fig.to_json(), os.path.join(target_dir, f"{name}.{fmt}"), fmt))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render, jobs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export all dashboard metrics (and figures).")
+    parser.add_argument("out_dir", nargs="?", default="exports")
+    parser.add_argument("--format", choices=TABLE_FORMATS, default="csv")
+    parser.add_argument("--figures", choices=FIGURE_FORMATS, help="also render figures in this format")
+    parser.add_argument("--workers", type=int, help="figure rendering processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    written = write_tables(collect_tables(), args.out_dir, args.format)
+    if args.figures:
+        written += write_figures(args.out_dir, args.figures, args.workers)
+    print(f"Wrote {len(written)} files to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Plotly figure builders, the shared ``dashboard`` template and payload trimming.
+
+Importing this module registers the ``dashboard`` template (``plotly_white``
+on a transparent background). :func:`minimize_figure` shrinks the JSON that
+``st.plotly_chart`` sends to the browser. :func:`cached_figure` and
+:func:`cached_spec` keep the minimized result of a builder call in
+:data:`figure_cache`, keyed by the builder and its inputs, which the live
+pages, the snapshot and the report generator share; run
+``python -m utils.figures`` for a bytes-per-figure report.
+"""
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+pio.templates["dashboard"] = go.layout.Template(pio.templates["plotly_white"])
+pio.templates["dashboard"].layout.update(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+
+# Trace types whose appearance depends on the template colorscales
+COLORSCALE_TRACES = {"heatmap", "contour", "histogram2d", "histogram2dcontour", "surface",
+                     "choropleth", "choroplethmapbox", "densitymapbox"}
+# Per-trace data that must stay on the trace even when shared
+TRACE_DATA_KEYS = {"type", "name", "x", "y", "z", "text", "customdata", "ids", "uid"}
+# Values equal to plotly.js defaults
+TRACE_DEFAULTS = {"xaxis": "x", "yaxis": "y"}
+
+
+def _text_format(y):
+    return '%{text:.5f}' if y == 'RMSE' else '%{text:.3f}'
+
+
+def _axis_title(y):
+    return "R² Score" if y == 'R²' else y
+
+
+def model_bar(df, title=None, y='R²', palette=px.colors.qualitative.Pastel):
+    fig = px.bar(
+        df,
+        x='Model',
+        y=y,
+        title=title,
+        color='Model',
+        text=y,
+        color_discrete_sequence=palette,
+        template='dashboard'
+    )
+    fig.update_traces(texttemplate=_text_format(y), textposition='outside')
+    fig.update_layout(showlegend=False, yaxis_title=_axis_title(y))
+    return fig
+
+
+def trend_line(data, x, y, title=None, color=None, yaxis_range=None):
+    """Monthly/yearly trend; a trailing ``Mean`` summary row is left out."""
+    df = pd.DataFrame(data)
+    df = df[df[x].astype(str) != "Mean"]
+    fig = px.line(
+        df,
+        x=x,
+        y=y,
+        title=title,
+        markers=True,
+        text=y,
+        color_discrete_sequence=[color or ('#e74c3c' if y == 'RMSE' else '#3498db')],
+        template='dashboard'
+    )
+    fig.update_traces(
+        texttemplate=_text_format(y),
+        textposition='top center',
+        line_width=2
+    )
+    fig.update_layout(
+        yaxis_title=_axis_title(y),
+        yaxis_range=yaxis_range
+    )
+    return fig
+
+
+def silhouette_bar(df, title=None, palette=px.colors.qualitative.Pastel):
+    fig = px.bar(
+        df,
+        x='Method',
+        y='Silhouette Score',
+        title=title,
+        color='Method',
+        text='Silhouette Score',
+        color_discrete_sequence=palette,
+        template='dashboard'
+    )
+    fig.update_traces(texttemplate='%{text:.3f}', textposition='outside')
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def cluster_bar(df, title=None):
+    fig = px.bar(
+        df,
+        x='Cluster',
+        y='R²',
+        title=title,
+        color='Cluster',
+        text='R²',
+        color_discrete_sequence=px.colors.qualitative.Set2,
+        template='dashboard'
+    )
+    fig.update_traces(texttemplate='%{text:.3f}', textposition='outside')
+    fig.update_layout(yaxis_title=_axis_title('R²'))
+    return fig
+
+
+def target_charts(target, label, run=None):
+    """Every summary figure for one target as ``{name: (builder, *args)}``.
+
+    The calls are cheap to key, so :func:`cached_spec` can look a figure up
+    without building it.
+    """
+    from utils import results
+
+    monthly, yearly = results.monthly(target, run), results.yearly(target, run)
+    return {
+        "model_performance_r2": (model_bar, results.model_performance(target, run=run),
+                                 f"{label} - Model Performance (R² Score)"),
+        "monthly_r2": (trend_line, monthly, 'Month', 'R²', f"{label} - Monthly R²"),
+        "monthly_rmse": (trend_line, monthly, 'Month', 'RMSE', f"{label} - Monthly RMSE"),
+        "yearly_r2": (trend_line, yearly, 'Year', 'R²', f"{label} - Yearly R²"),
+        "yearly_rmse": (trend_line, yearly, 'Year', 'RMSE', f"{label} - Yearly RMSE"),
+        "cluster_silhouette": (silhouette_bar, results.silhouette(target, run),
+                               f"Silhouette Scores - {label}"),
+        "cluster_xgboost_r2": (cluster_bar, results.cluster_xgboost(target, run),
+                               f"XGBoost R² by Cluster - {label}"),
+    }
+
+
+def target_figures(target, label, run=None):
+    """Every summary figure for one target, keyed by a file-friendly name."""
+    return {name: builder(*args) for name, (builder, *args) in target_charts(target, label, run).items()}
+
+
+def _round(value, digits):
+    if isinstance(value, float):
+        if value == 0 or not math.isfinite(value):
+            return value
+        return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+    if isinstance(value, list):
+        return [_round(v, digits) for v in value]
+    if isinstance(value, dict):
+        return {k: _round(v, digits) for k, v in value.items()}
+    return value
+
+
+def minimize_figure(fig, digits=6):
+    """Figure JSON with floats rounded, defaults stripped and shared styling hoisted.
+
+    Trace properties that are identical on every trace of a type move into
+    the template's per-type defaults, and the template keeps only the trace
+    types and colorscales the figure actually uses. Numeric arrays that
+    plotly serializes as typed arrays (``bdata``) are already compact and
+    are left unrounded.
+    """
+    spec = _round(json.loads(fig.to_json()), digits)
+    traces = spec.get("data", [])
+    layout = spec.setdefault("layout", {})
+    template = layout.get("template", {})
+
+    for trace in traces:
+        for key, default in TRACE_DEFAULTS.items():
+            if trace.get(key) == default:
+                del trace[key]
+
+    by_type = {}
+    for trace in traces:
+        by_type.setdefault(trace.get("type", "scatter"), []).append(trace)
+    template_data = {}
+    for trace_type, group in by_type.items():
+        shared = {}
+        if len(group) > 1:
+            shared = {k: v for k, v in group[0].items()
+                      if k not in TRACE_DATA_KEYS and all(t.get(k) == v for t in group[1:])}
+            for trace in group:
+                for key in shared:
+                    del trace[key]
+        base = template.get("data", {}).get(trace_type, [{}])[0]
+        template_data[trace_type] = [{**base, **shared}]
+    template["data"] = template_data
+
+    uses_colorscale = "coloraxis" in layout or COLORSCALE_TRACES & set(by_type)
+    if not uses_colorscale:
+        for key in ("colorscale", "coloraxis"):
+            template.get("layout", {}).pop(key, None)
+    layout["template"] = template
+    return spec
+
+
+def _input_key(value):
+    """Hashable stand-in for a builder argument; tables are keyed by content."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest = hashlib.sha1(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        columns = tuple(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        return type(value).__name__, columns, digest.hexdigest()
+    if isinstance(value, (dict, list, tuple)):
+        return repr(value)
+    return value
+
+
+def figure_key(builder, *args, **kwargs):
+    """Cache key for ``builder(*args, **kwargs)``: the figure kind plus its inputs."""
+    return (builder.__name__, tuple(_input_key(a) for a in args),
+            tuple(sorted((k, _input_key(v)) for k, v in kwargs.items())))
+
+
+class FigureCache:
+    """Bounded LRU of minimized figures, keyed by the builder and its inputs.
+
+    A hit costs one hash of the (small) input tables; the figure is neither
+    built nor serialized again. Each entry keeps the minimized spec, for
+    static pages and reports, and a ``go.Figure`` made from it on first use,
+    for ``st.plotly_chart``. Entries are shared by every session and must
+    not be modified.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _entry(self, key, build, digits):
+        key = (digits, key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        entry = {"spec": minimize_figure(build(), digits), "figure": None}
+        with self._lock:
+            self.misses += 1
+            entry = self._entries.setdefault(key, entry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def spec(self, key, build, digits=6):
+        """Minimized JSON dict for ``key``; ``build()`` makes the figure on a miss."""
+        return self._entry(key, build, digits)["spec"]
+
+    def figure(self, key, build, digits=6):
+        """The minimized figure for ``key`` as a ``go.Figure``, built once per entry."""
+        entry = self._entry(key, build, digits)
+        if entry["figure"] is None:
+            entry["figure"] = go.Figure(entry["spec"])
+        return entry["figure"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def nbytes(self):
+        """Serialized size of the cached specs."""
+        with self._lock:
+            specs = [entry["spec"] for entry in self._entries.values()]
+        return sum(len(json.dumps(spec)) for spec in specs)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(builder, *args, **kwargs):
+    """``builder(*args, **kwargs)`` minimized and cached, for ``st.plotly_chart``."""
+    return figure_cache.figure(figure_key(builder, *args, **kwargs), lambda: builder(*args, **kwargs))
+
+
+def cached_spec(builder, *args, **kwargs):
+    """``builder(*args, **kwargs)`` as a cached, minimized JSON dict."""
+    return figure_cache.spec(figure_key(builder, *args, **kwargs), lambda: builder(*args, **kwargs))
+
+
+def compact_figure(fig, digits=6):
+    """A one-off figure minimized for ``st.plotly_chart``; not cached."""
+    return go.Figure(minimize_figure(fig, digits))
+
+
+def payload_report(figures, digits=6):
+    """Serialized size of each figure before and after :func:`minimize_figure`."""
+    rows = []
+    for name, fig in figures.items():
+        before = len(fig.to_json().encode())
+        after = len(json.dumps(minimize_figure(fig, digits)).encode())
+        rows.append((name, before, after, 100 * (1 - after / before)))
+    return pd.DataFrame(rows, columns=["Figure", "Bytes Before", "Bytes After", "Saved %"])
+
+
+if __name__ == "__main__":
+    from utils.results import TARGETS
+
+    report = pd.concat(
+        [payload_report(target_figures(t, label)).assign(Target=t) for t, label in TARGETS.items()],
+        ignore_index=True,
+    )
+    print(report.to_string(index=False))
+    print(f"\nTotal: {report['Bytes Before'].sum():,} -> {report['Bytes After'].sum():,} bytes")
@@ -0,0 +1,198 @@
+"""Process-wide model serving for the what-if panels.
+
+Serialized models live under ``models/<folder>/``::
+
+    features.json                  feature ranges and the top-k feature sets
+    <model_key>_<k>.joblib         estimator trained on the top-k features
+
+``features.json`` looks like ``{"features": {"name": {"min": .., "max": ..,
+"mean": ..}}, "feature_sets": {"5": [...], "8": [...], ...}}``.
+
+Concurrent requests for the same model are micro-batched: callers enqueue
+rows and a single worker thread runs one ``predict`` call per batch.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from utils import storage
+from utils.prediction_cache import PredictionCache
+from utils.trees import fastest_predictor
+
+MODEL_DIR = "models"
+FEATURE_SET_SIZES = (5, 8, 15, 28)
+
+
+def load_feature_spec(folder, model_dir=MODEL_DIR):
+    path = storage.local_path(os.path.join(model_dir, folder, "features.json"))
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def feature_rows(spec, k, n=4096, seed=0):
+    """``n`` synthetic rows for the top-``k`` features, drawn within each
+    feature's range and peaking at its mean."""
+    stats = [spec["features"][name] for name in spec["feature_sets"][str(k)]]
+    low, mode, high = (np.array([s[field] for s in stats], dtype=np.float64) for field in ("min", "mean", "max"))
+    spread = high > low
+    rows = np.tile(mode, (n, 1))
+    rows[:, spread] = np.random.default_rng(seed).triangular(
+        low[spread], np.clip(mode, low, high)[spread], high[spread], (n, int(spread.sum())))
+    return rows
+
+
+def model_path(folder, model_key, k, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, folder, f"{model_key}_{k}.joblib")
+
+
+def available_model_files(folder, models, k, model_dir=MODEL_DIR):
+    """``(name, key)`` pairs from ``models`` that have a serialized top-k model."""
+    return [(name, key) for name, key in models
+            if storage.exists(model_path(folder, key, k, model_dir))]
+
+
+class MicroBatcher:
+    """Coalesces concurrent ``submit`` calls into batched ``predict_fn`` calls.
+
+    The worker waits up to ``max_wait`` seconds after the first queued request
+    for more to arrive, up to ``max_batch`` rows, then predicts them together.
+    """
+
+    def __init__(self, predict_fn, max_batch=512, max_wait=0.005):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, rows):
+        """Queue a ``(n, features)`` array; the Future resolves to ``n`` predictions."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((np.atleast_2d(np.asarray(rows, dtype=np.float32)), future))
+        return future
+
+    def predict(self, rows, timeout=None):
+        return self.submit(rows).result(timeout)
+
+    def close(self, timeout=None):
+        """Stop the worker thread once the requests already queued are served."""
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+    def _collect(self):
+        """The next batch, or ``None`` once closed; ``None`` in the queue marks the close."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        pending = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                # Serve this batch first, then stop
+                self._queue.put(None)
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            if pending is None:
+                return
+            try:
+                predictions = np.asarray(self.predict_fn(np.vstack([rows for rows, _ in pending])))
+            except Exception as exc:
+                for _, future in pending:
+                    future.set_exception(exc)
+                continue
+            start = 0
+            for rows, future in pending:
+                future.set_result(predictions[start:start + len(rows)])
+                start += len(rows)
+
+
+class ModelRegistry:
+    """Loads each serialized model once and hands out its shared batcher.
+
+    Tree ensembles are served through their compiled :class:`FlatForest`
+    form when that measures faster on load, benchmarked on rows drawn from
+    the feature ranges in ``features.json``; otherwise, and for other
+    models, their own ``predict`` is used.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, cache=None):
+        self.model_dir = model_dir
+        self.cache = PredictionCache() if cache is None else cache
+        self._batchers = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def _load(self, folder, model_key, k):
+        import joblib
+
+        model = joblib.load(storage.local_path(model_path(folder, model_key, k, self.model_dir)))
+        spec = load_feature_spec(folder, self.model_dir)
+        X = feature_rows(spec, k) if spec and str(k) in spec["feature_sets"] else None
+        return MicroBatcher(fastest_predictor(model, X))
+
+    def batcher(self, folder, model_key, k):
+        """The model's batcher, loading it on first use.
+
+        Loading happens outside the registry lock, so other models stay
+        available meanwhile; concurrent first calls for one model share a
+        single load.
+        """
+        key = (folder, model_key, k)
+        with self._lock:
+            if key in self._batchers:
+                return self._batchers[key]
+            loading = self._loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self._loading[key] = Future()
+        if not owner:
+            return loading.result()
+        try:
+            batcher = self._load(folder, model_key, k)
+        except BaseException as exc:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(exc)
+            raise
+        with self._lock:
+            self._batchers[key] = batcher
+            del self._loading[key]
+        loading.set_result(batcher)
+        return batcher
+
+    def close(self):
+        """Stop every batcher's worker thread; models load again on next use."""
+        with self._lock:
+            batchers = list(self._batchers.values())
+            self._batchers.clear()
+        for batcher in batchers:
+            batcher.close()
+
+    def predict(self, folder, model_key, k, rows, timeout=30, step=None):
+        """Cached predictions; only unseen quantized rows reach the model."""
+        batcher = self.batcher(folder, model_key, k)
+        return self.cache.get_or_compute((folder, model_key, k), rows,
+                                         lambda missing: batcher.predict(missing, timeout), step)
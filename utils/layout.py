@@ -0,0 +1,98 @@
+"""Viewport-aware layout for the image grids.
+
+A zero-height component reports the browser width and device pixel ratio
+(once per session, and again after a resize). :func:`grid` uses them to
+choose how many images go side by side: fewer than the page asks for on
+narrow screens, and on screens wider than :data:`WIDE_WIDTH` as many more
+(up to the number of images) as fit at the cell width the page was laid
+out for. :func:`image_width` picks the resized variant that covers one
+grid cell, so a phone gets one column of small images and a large monitor
+more of them side by side.
+"""
+import io
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_viewport = components.declare_component(
+    "viewport", path=os.path.join(os.path.dirname(__file__), "components", "viewport"))
+
+# Assumed until the browser has reported its viewport
+DEFAULT_VIEWPORT = {"width": 1400, "dpr": 1.0}
+# Horizontal space taken by the sidebar and page padding on wide screens
+CHROME_WIDTH = 400
+# Image widths served; the smallest one covering the cell is used
+VARIANT_WIDTHS = (480, 800, 1200, 1600, 2400)
+# Denser screens gain little visible detail beyond 2x
+MAX_DPR = 2.0
+# Widest viewport the pages' column counts were chosen for; wider ones get extra columns
+WIDE_WIDTH = 1920
+
+
+def track_viewport():
+    """Render the viewport reporter; call once near the top of each page."""
+    known = st.session_state.get("client_viewport")
+    value = _viewport(known=known, key="viewport_reporter", default=None)
+    if value and value != known:
+        st.session_state["client_viewport"] = value
+    return viewport()
+
+
+def viewport():
+    return st.session_state.get("client_viewport") or DEFAULT_VIEWPORT
+
+
+def columns_for(preferred, count=None):
+    """How many images go side by side in a group of ``count`` laid out ``preferred`` to a row.
+
+    Narrow screens get fewer than ``preferred`` columns. Screens wider than
+    :data:`WIDE_WIDTH` get as many cells as fit at the width ``preferred``
+    columns have at :data:`WIDE_WIDTH`, but never more than ``count`` (by
+    default ``preferred``).
+    """
+    width = viewport()["width"]
+    if width < 640:
+        return 1
+    if width < 1100:
+        return min(preferred, 2)
+    count = preferred if count is None else count
+    if width <= WIDE_WIDTH or count <= preferred:
+        return preferred
+    cell = (WIDE_WIDTH - CHROME_WIDTH) / preferred
+    return max(preferred, min(count, int((width - CHROME_WIDTH) // cell)))
+
+
+def grid(count, preferred):
+    """``count`` containers, in reading order, laid out ``columns_for(preferred, count)`` to a row."""
+    n = columns_for(preferred, count)
+    if n == 1:
+        return [st.container() for _ in range(count)]
+    cells = []
+    for _ in range(0, count, n):
+        cells.extend(st.columns(n))
+    return cells[:count]
+
+
+def image_width(preferred, count=None):
+    """Pixel width of the image variant for one cell of ``grid(count, preferred)``."""
+    vp = viewport()
+    content = vp["width"] - CHROME_WIDTH if vp["width"] >= 1100 else vp["width"]
+    needed = content / columns_for(preferred, count) * min(vp["dpr"], MAX_DPR)
+    return next((w for w in VARIANT_WIDTHS if w >= needed), VARIANT_WIDTHS[-1])
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def fit_image(data, width):
+    """Image bytes re-encoded as WebP at most ``width`` pixels wide."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        if img.width <= width:
+            return data
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, "WEBP", quality=85, method=4)
+        return out.getvalue()
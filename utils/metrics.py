@@ -0,0 +1,145 @@
+"""Vectorised RMSE/R² reductions over stored model predictions.
+
+Predictions for each model are stored as one ``.npy`` file per column under
+``data/<folder>/predictions/<model_key>/``: ``date`` (datetime64[D]),
+``cell`` (int grid-cell index), ``actual`` and ``predicted``.
+"""
+import calendar
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils import storage
+
+DATA_DIR = "data"
+COLUMNS = ("date", "cell", "actual", "predicted")
+
+MODELS = [
+    ("XGBoost", "xgboost"),
+    ("Gradient Boosting", "gradient_boosting"),
+    ("Random Forest", "random_forest"),
+    ("Decision Tree", "decision_tree"),
+    ("Linear Regression", "linear_regression"),
+    ("CNN-LSTM", "cnn_lstm"),
+    ("LSTM", "lstm"),
+    ("CNN-GRU", "cnn_gru"),
+    ("CNN 1D", "cnn_1d"),
+]
+
+MONTH_NAMES = list(calendar.month_abbr)[1:]
+
+
+def load_predictions(folder, model_key, data_dir=DATA_DIR, resolve=None):
+    """Memory-mapped prediction columns for one model, or ``None`` if absent.
+
+    ``resolve`` maps an asset path to a local file (or ``None``), such as a
+    run's :meth:`~utils.runs.RunStore.local_path`; by default the working
+    tree's :func:`utils.storage.local_path`.
+    """
+    root = os.path.join(data_dir, folder, "predictions", model_key)
+    resolve = resolve or storage.local_path
+    paths = {col: resolve(os.path.join(root, f"{col}.npy")) for col in COLUMNS}
+    if None in paths.values():
+        return None
+    return {col: np.load(p, mmap_mode="r") for col, p in paths.items()}
+
+
+def available_models(folder, data_dir=DATA_DIR, exists=None):
+    root = os.path.join(data_dir, folder, "predictions")
+    exists = exists or storage.exists
+    return [(name, key) for name, key in MODELS if exists(os.path.join(root, key, "date.npy"))]
+
+
+def sufficient_stats(codes, actual, predicted, n_groups):
+    """Per-group ``(n, Σe², Σy, Σy²)`` from one bincount per statistic."""
+    actual = np.asarray(actual, dtype=np.float64)
+    error = np.asarray(predicted, dtype=np.float64) - actual
+    return np.stack([
+        np.bincount(codes, minlength=n_groups).astype(np.float64),
+        np.bincount(codes, weights=error * error, minlength=n_groups),
+        np.bincount(codes, weights=actual, minlength=n_groups),
+        np.bincount(codes, weights=actual * actual, minlength=n_groups),
+    ], axis=1)
+
+
+def metrics_from_stats(stats):
+    """RMSE and R² arrays from ``(n, Σe², Σy, Σy²)`` rows."""
+    n, sse, sum_y, sum_y2 = np.asarray(stats, dtype=np.float64).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rmse = np.sqrt(sse / n)
+        r2 = 1 - sse / (sum_y2 - sum_y * sum_y / n)
+    return rmse, r2
+
+
+def overall_metrics(predictions, mask=None):
+    """Single ``(rmse, r2)`` pair over all (or the masked) predictions."""
+    actual = np.asarray(predictions["actual"])
+    predicted = np.asarray(predictions["predicted"])
+    if mask is not None:
+        actual, predicted = actual[mask], predicted[mask]
+    codes = np.zeros(len(actual), dtype=np.int64)
+    rmse, r2 = metrics_from_stats(sufficient_stats(codes, actual, predicted, 1))
+    return float(rmse[0]), float(r2[0])
+
+
+def feature_subset_key(model_key, k):
+    """Prediction folder for a model trained on its top-``k`` features."""
+    return f"{model_key}_top{k}"
+
+
+def feature_curve(folder, model_key="xgboost", max_features=28, data_dir=DATA_DIR):
+    """RMSE/R² for every stored top-k feature subset of a model, ordered by k."""
+    rows = []
+    for k in range(1, max_features + 1):
+        predictions = load_predictions(folder, feature_subset_key(model_key, k), data_dir)
+        if predictions is not None:
+            rows.append((k, *overall_metrics(predictions)))
+    return pd.DataFrame(rows, columns=["Features", "RMSE", "R²"])
+
+
+def period_keys(dates, period):
+    """Month number (1-12) or calendar year for each date."""
+    dates = np.asarray(dates).astype("datetime64[D]")
+    if period == "month":
+        return dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    if period == "year":
+        return dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    raise ValueError(f"Unknown period: {period!r}")
+
+
+def filter_mask(predictions, start=None, end=None, cell_labels=None, cluster=None):
+    """Boolean row mask for a date range and/or a cluster of grid cells."""
+    dates = np.asarray(predictions["date"]).astype("datetime64[D]")
+    mask = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        mask &= dates >= np.datetime64(start, "D")
+    if end is not None:
+        mask &= dates <= np.datetime64(end, "D")
+    if cell_labels is not None and cluster is not None:
+        mask &= np.asarray(cell_labels)[np.asarray(predictions["cell"])] == cluster
+    return mask
+
+
+def period_table(predictions, period, mask=None):
+    """Monthly or yearly RMSE/R² table, one row per period present.
+
+    The pages append the ``Mean`` summary row with
+    :func:`utils.results.with_mean` when displaying it.
+    """
+    dates = np.asarray(predictions["date"])
+    actual = np.asarray(predictions["actual"])
+    predicted = np.asarray(predictions["predicted"])
+    if mask is not None:
+        dates, actual, predicted = dates[mask], actual[mask], predicted[mask]
+
+    keys, codes = np.unique(period_keys(dates, period), return_inverse=True)
+    return period_frame(period, keys, sufficient_stats(codes, actual, predicted, len(keys)))
+
+
+def period_frame(period, keys, stats):
+    """Build the page table from sorted period keys and their sufficient statistics."""
+    rmse, r2 = metrics_from_stats(stats)
+    label = "Month" if period == "month" else "Year"
+    names = [MONTH_NAMES[k - 1] for k in keys] if period == "month" else list(keys)
+    return pd.DataFrame({label: names, "RMSE": rmse, "R²": r2})
@@ -0,0 +1,98 @@
+"""Size- and age-bounded cache of model predictions shared across sessions.
+
+Feature vectors are quantized before hashing, so slider positions that differ
+only below display precision reuse the same prediction.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+
+class PredictionCache:
+    """LRU cache with a time-to-live, keyed on ``(model, step, quantized features)``.
+
+    ``step`` is the quantization grid, either a scalar or one value per
+    feature. Hit, miss and eviction counts are kept per model.
+    """
+
+    def __init__(self, max_entries=50_000, ttl=3600.0, step=1e-4, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.step = step
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = defaultdict(lambda: {"hits": 0, "misses": 0, "evictions": 0})
+
+    def keys_for(self, model, rows, step=None):
+        """``(model, step, quantized row)`` keys; the same row quantized on another grid is another key."""
+        step = np.asarray(self.step if step is None else step, dtype=np.float64)
+        quantized = np.round(np.atleast_2d(np.asarray(rows, dtype=np.float64)) / step).astype(np.int64)
+        grid = step.tobytes()
+        return [(model, grid, row.tobytes()) for row in quantized]
+
+    def get_many(self, keys):
+        """Cached value per key, or ``None`` for misses and expired entries."""
+        now = self.clock()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    self.stats[key[0]]["evictions"] += 1
+                    entry = None
+                if entry is None:
+                    self.stats[key[0]]["misses"] += 1
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats[key[0]]["hits"] += 1
+                    values.append(entry[0])
+        return values
+
+    def put_many(self, keys, values):
+        now = self.clock()
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                key, _ = self._entries.popitem(last=False)
+                self.stats[key[0]]["evictions"] += 1
+
+    def get_or_compute(self, model, rows, compute, step=None):
+        """Predictions for ``rows``, calling ``compute`` only on the uncached ones."""
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        keys = self.keys_for(model, rows, step)
+        values = self.get_many(keys)
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            computed = np.asarray(compute(rows[missing]))
+            self.put_many([keys[i] for i in missing], computed.tolist())
+            for i, value in zip(missing, computed.tolist()):
+                values[i] = value
+        return np.asarray(values)
+
+    def hit_rate(self, model):
+        stats = self.stats[model]
+        total = stats["hits"] + stats["misses"]
+        return stats["hits"] / total if total else 0.0
+
+    def clear(self, predicate=None):
+        """Drop every entry, or only those whose key satisfies ``predicate``."""
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                doomed = [key for key in self._entries if predicate(key)]
+                for key in doomed:
+                    del self._entries[key]
+                removed = len(doomed)
+        return removed
+
+    def __len__(self):
+        return len(self._entries)
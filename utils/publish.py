@@ -0,0 +1,181 @@
+"""Publish ``images/`` under content-hash names, skipping perceptually unchanged plots.
+
+Usage::
+
+    python -m utils.publish site/ [--threshold 4] [--max-width 1600] [--prune-after 7]
+
+Every image is re-encoded as WebP and written as ``<name>.<hash>.webp``;
+other files are copied unchanged as ``<name>.<hash><ext>``. Retraining
+regenerates every PNG even when the plot looks the same, so each source
+is also fingerprinted with a 64-bit perceptual hash (DCT of a 32x32
+greyscale thumbnail). When a regenerated image is within ``threshold``
+bits of the published one, the published file and URL are kept and
+browser and CDN caches stay valid. State is kept in
+``<out_dir>/images/manifest.json``.
+
+Superseded files are kept, since HTML cached by browsers and CDNs may
+still reference them; ``--prune-after DAYS`` deletes those superseded for
+longer than that.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+IMAGE_ROOT = "images"
+MANIFEST = "manifest.json"
+HASH_SIZE = 8
+THUMB_SIZE = 32
+
+
+def _dct_matrix(n):
+    k = np.arange(n)
+    return np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+
+
+_DCT = _dct_matrix(THUMB_SIZE)
+
+
+def phash(img):
+    """64-bit perceptual hash of a PIL image, as a hex string."""
+    from PIL import Image
+
+    thumb = img.convert("L").resize((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+    coeffs = _DCT @ np.asarray(thumb, dtype=np.float64) @ _DCT.T
+    low = coeffs[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _encode(img, max_width):
+    from PIL import Image
+
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA")
+    if img.width > max_width:
+        img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, "WEBP", quality=85, method=6)
+    return out.getvalue()
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, IMAGE_ROOT, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"max_width": None, "images": {}, "stale": {}}
+
+
+def _copy_name(file, data):
+    stem, ext = os.path.splitext(file)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def publish_images(out_dir, src=IMAGE_ROOT, max_width=1600, threshold=4, prune_after=None):
+    """Publish changed images; returns ``({target: {file: url}}, counts)``.
+
+    ``counts`` has ``unchanged`` (same bytes), ``similar`` (perceptually
+    identical, URL kept), ``published`` and ``removed`` files. Superseded
+    files are only removed once they have been superseded for
+    ``prune_after`` seconds; by default they are kept.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    os.makedirs(os.path.join(out_dir, IMAGE_ROOT), exist_ok=True)
+    manifest = load_manifest(out_dir)
+    previous = manifest["images"] if manifest["max_width"] == max_width else {}
+    entries = {}
+    counts = dict.fromkeys(("unchanged", "similar", "published", "removed"), 0)
+    for target in sorted(os.listdir(src)):
+        src_dir = os.path.join(src, target)
+        if not os.path.isdir(src_dir):
+            continue
+        dst_dir = os.path.join(out_dir, IMAGE_ROOT, target)
+        os.makedirs(dst_dir, exist_ok=True)
+        for file in sorted(os.listdir(src_dir)):
+            key = f"{target}/{file}"
+            with open(os.path.join(src_dir, file), "rb") as f:
+                data = f.read()
+            source = hashlib.sha256(data).hexdigest()
+            old = previous.get(key)
+            if old and not os.path.exists(os.path.join(out_dir, old["url"])):
+                old = None
+            if old and old["source"] == source:
+                entries[key] = old
+                counts["unchanged"] += 1
+                continue
+            try:
+                img = Image.open(io.BytesIO(data))
+            except UnidentifiedImageError:
+                # Not an image: published as is, under its content hash
+                encoded, fingerprint, name = data, None, _copy_name(file, data)
+            else:
+                with img:
+                    fingerprint = phash(img)
+                    if old and old["phash"] and hamming(old["phash"], fingerprint) <= threshold:
+                        # Keep the published file and the phash it was published with,
+                        # so slow drift still adds up to a republish
+                        entries[key] = {**old, "source": source}
+                        counts["similar"] += 1
+                        continue
+                    encoded = _encode(img, max_width)
+                name = _copy_name(os.path.splitext(file)[0] + ".webp", encoded)
+            with open(os.path.join(dst_dir, name), "wb") as f:
+                f.write(encoded)
+            entries[key] = {"source": source, "phash": fingerprint, "url": f"{IMAGE_ROOT}/{target}/{name}"}
+            counts["published"] += 1
+
+    # Superseded files, with the time they were first found superseded
+    now = time.time()
+    live = {entry["url"] for entry in entries.values()}
+    stale = {}
+    root = os.path.join(out_dir, IMAGE_ROOT)
+    for target in os.listdir(root):
+        target_dir = os.path.join(root, target)
+        if not os.path.isdir(target_dir):
+            continue
+        for name in os.listdir(target_dir):
+            url = f"{IMAGE_ROOT}/{target}/{name}"
+            if url in live:
+                continue
+            since = manifest.get("stale", {}).get(url, now)
+            if prune_after is not None and now - since >= prune_after:
+                os.remove(os.path.join(target_dir, name))
+                counts["removed"] += 1
+            else:
+                stale[url] = since
+
+    with open(os.path.join(out_dir, IMAGE_ROOT, MANIFEST), "w") as f:
+        json.dump({"max_width": max_width, "images": entries, "stale": stale}, f, indent=1)
+    urls = {}
+    for key, entry in entries.items():
+        target, file = key.split("/", 1)
+        urls.setdefault(target, {})[file] = entry["url"]
+    return urls, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish images, keeping URLs of unchanged plots.")
+    parser.add_argument("out_dir", nargs="?", default="site")
+    parser.add_argument("--threshold", type=int, default=4, help="max differing hash bits to treat as unchanged")
+    parser.add_argument("--max-width", type=int, default=1600, help="downscale wider images")
+    parser.add_argument("--prune-after", type=float, metavar="DAYS",
+                        help="delete files superseded for longer than this (default: keep them)")
+    args = parser.parse_args(argv)
+    prune_after = None if args.prune_after is None else args.prune_after * 86400
+    _, counts = publish_images(args.out_dir, max_width=args.max_width, threshold=args.threshold,
+                               prune_after=prune_after)
+    print(", ".join(f"{n} {kind}" for kind, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Gridded per-cell error rasters (RMSE, R², bias) on the regular lat/lon grid.
+
+Layout under ``data/<folder>/rasters/``::
+
+    grid.json            {"lat0", "lon0", "step", "shape": [n_lat, n_lon]}
+    <model_key>.npy      float32 (3, n_lat, n_lon), NaN where there is no cell
+
+Rasters are opened memory-mapped, so point and bounding-box queries read
+only the pages of the window they touch.
+
+Build rasters from stored predictions and ``data/<folder>/cells.npy``
+(lat/lon of every grid cell)::
+
+    python -m utils.rasters surface
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import MODELS, load_predictions, metrics_from_stats, sufficient_stats
+from utils.storage import local_path
+
+DATA_DIR = "data"
+METRICS = ("RMSE", "R²", "Bias")
+
+
+class ErrorRaster:
+    def __init__(self, grid_path, data_path):
+        with open(grid_path) as f:
+            grid = json.load(f)
+        self.lat0, self.lon0, self.step = grid["lat0"], grid["lon0"], grid["step"]
+        self.shape = tuple(grid["shape"])
+        self.data = np.load(data_path, mmap_mode="r")
+
+    @classmethod
+    def open(cls, folder, model_key, data_dir=DATA_DIR):
+        root = os.path.join(data_dir, folder, "rasters")
+        data_path = local_path(os.path.join(root, f"{model_key}.npy"))
+        grid_path = local_path(os.path.join(root, "grid.json"))
+        if data_path is None or grid_path is None:
+            return None
+        return cls(grid_path, data_path)
+
+    @property
+    def lats(self):
+        return self.lat0 + self.step * np.arange(self.shape[0])
+
+    @property
+    def lons(self):
+        return self.lon0 + self.step * np.arange(self.shape[1])
+
+    def index(self, lat, lon):
+        return (int(np.floor((lat - self.lat0) / self.step + 0.5)),
+                int(np.floor((lon - self.lon0) / self.step + 0.5)))
+
+    def point(self, lat, lon):
+        """Metrics of the cell containing ``(lat, lon)``, or ``None`` outside the grid."""
+        i, j = self.index(lat, lon)
+        if not (0 <= i < self.shape[0] and 0 <= j < self.shape[1]):
+            return None
+        return dict(zip(METRICS, (float(v) for v in self.data[:, i, j])))
+
+    def values_at(self, lat, lon):
+        """``(3, n)`` metrics at many coordinates; NaN outside the grid."""
+        i = np.floor((np.asarray(lat) - self.lat0) / self.step + 0.5).astype(np.int64)
+        j = np.floor((np.asarray(lon) - self.lon0) / self.step + 0.5).astype(np.int64)
+        inside = (i >= 0) & (i < self.shape[0]) & (j >= 0) & (j < self.shape[1])
+        out = np.full((len(METRICS), len(i)), np.nan)
+        out[:, inside] = self.data[:, i[inside], j[inside]]
+        return out
+
+    def window(self, lat_min, lat_max, lon_min, lon_max):
+        """View of the raster inside a bounding box, without copying.
+
+        Boxes partly outside the grid are clipped to it; a box with no cells
+        inside gives an empty ``(3, 0, 0)`` window.
+        """
+        n_lat, n_lon = self.shape
+        i0, j0 = self.index(lat_min, lon_min)
+        i1, j1 = self.index(lat_max, lon_max)
+        i0, i1 = min(max(i0, 0), n_lat), min(max(i1 + 1, 0), n_lat)
+        j0, j1 = min(max(j0, 0), n_lon), min(max(j1 + 1, 0), n_lon)
+        if i1 <= i0 or j1 <= j0:
+            return self.data[:, :0, :0]
+        return self.data[:, i0:i1, j0:j1]
+
+    def region_stats(self, lat_min, lat_max, lon_min, lon_max, r2_below=None):
+        """Summary of each metric over the cells inside a bounding box."""
+        window = np.asarray(self.window(lat_min, lat_max, lon_min, lon_max), dtype=np.float64)
+        values = window.reshape(len(METRICS), -1)
+        valid = np.isfinite(values[1])
+        values = values[:, valid]
+        rows = []
+        for name, v in zip(METRICS, values):
+            if len(v):
+                rows.append((name, len(v), v.mean(), v.std(), v.min(), v.max()))
+            else:
+                rows.append((name, 0, np.nan, np.nan, np.nan, np.nan))
+        stats = pd.DataFrame(rows, columns=["Metric", "Cells", "Mean", "Std", "Min", "Max"])
+        if r2_below is not None:
+            stats.attrs["cells_below"] = int((values[1] < r2_below).sum())
+        return stats
+
+    def downsampled(self, max_side=400):
+        """Strided view of the full raster small enough to draw as a heatmap."""
+        stride = max(1, int(np.ceil(max(self.shape) / max_side)))
+        return stride, self.data[:, ::stride, ::stride]
+
+
+def cell_metrics(predictions, n_cells):
+    """Per-cell ``(rmse, r2, bias)`` arrays from stored predictions."""
+    cells = np.asarray(predictions["cell"])
+    actual = np.asarray(predictions["actual"], dtype=np.float64)
+    predicted = np.asarray(predictions["predicted"], dtype=np.float64)
+    rmse, r2 = metrics_from_stats(sufficient_stats(cells, actual, predicted, n_cells))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bias = (np.bincount(cells, weights=predicted - actual, minlength=n_cells)
+                / np.bincount(cells, minlength=n_cells))
+    return rmse, r2, bias
+
+
+def build_raster(folder, model_key, step=None, data_dir=DATA_DIR):
+    """Rasterize one model's per-cell metrics; returns the output path or ``None``."""
+    predictions = load_predictions(folder, model_key, data_dir)
+    cells_path = os.path.join(data_dir, folder, "cells.npy")
+    if predictions is None or not os.path.exists(cells_path):
+        return None
+    coords = np.load(cells_path)
+    lat, lon = coords[:, 0], coords[:, 1]
+    if step is None:
+        step = float(np.diff(np.unique(lat)).min())
+    i = np.rint((lat - lat.min()) / step).astype(int)
+    j = np.rint((lon - lon.min()) / step).astype(int)
+    shape = (int(i.max()) + 1, int(j.max()) + 1)
+
+    raster = np.full((len(METRICS),) + shape, np.nan, dtype=np.float32)
+    for band, values in enumerate(cell_metrics(predictions, len(coords))):
+        raster[band, i, j] = values
+
+    # Both files are written to a temporary name and renamed into place, the
+    # grid last, so an interrupted build never leaves a partial file behind
+    root = os.path.join(data_dir, folder, "rasters")
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"{model_key}.npy")
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, raster)
+    os.replace(path + ".tmp", path)
+    grid_path = os.path.join(root, "grid.json")
+    with open(grid_path + ".tmp", "w") as f:
+        json.dump({"lat0": float(lat.min()), "lon0": float(lon.min()), "step": float(step),
+                   "shape": list(shape)}, f)
+    os.replace(grid_path + ".tmp", grid_path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build per-cell error rasters from stored predictions.")
+    parser.add_argument("folder", help="target folder, e.g. surface")
+    parser.add_argument("--step", type=float, help="grid spacing in degrees (inferred by default)")
+    args = parser.parse_args(argv)
+    for name, key in MODELS:
+        path = build_raster(args.folder, key, args.step)
+        print(f"{name}: {path or 'no predictions'}")
+
+
+if __name__ == "__main__":
+    main()
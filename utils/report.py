@@ -0,0 +1,111 @@
+"""Self-contained per-target reports built from the dashboard's tables and figures.
+
+Usage::
+
+    python -m utils.report reports/ [--format pdf] [--run 2025-06-retrain] [--workers 3]
+
+Each target gets one file with the model summary, the monthly and yearly
+XGBoost trends and the cluster performance, using the same table accessors
+and figure builders as the pages. Each target is rendered in its own
+worker process, and each process has its own
+:data:`utils.figures.figure_cache`, so figures are minimized once per
+report; nothing is shared with the app or between reports. HTML reports
+inline plotly.js and need no network; PDF reports need ``kaleido`` for
+static figures and ``weasyprint``.
+"""
+import argparse
+import base64
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import plotly.io as pio
+
+from utils import results
+from utils.figures import cached_spec, target_charts
+from utils.snapshot import PageWriter
+
+FORMATS = ("html", "pdf")
+
+
+class ReportWriter(PageWriter):
+    """A :class:`PageWriter` whose output has no external references."""
+
+    def __init__(self, title, static=False):
+        super().__init__(title, {})
+        self.static = static
+
+    def figure(self, builder, *args):
+        spec = cached_spec(builder, *args)
+        if not self.static:
+            self.figures += 1
+            div = f"fig{self.figures}"
+            return (f'<div id="{div}" class="figure"></div>'
+                    f'<script>(function(f){{Plotly.newPlot("{div}",f.data,f.layout,'
+                    f'{{responsive:true}});}})({json.dumps(spec)});</script>')
+        png = base64.b64encode(pio.to_image(spec, format="png", width=900, height=450)).decode()
+        return f'<img src="data:image/png;base64,{png}">'
+
+    def render(self):
+        # Static (PDF) reports have no interactive figures
+        script = "" if self.static else None
+        return super().render(script, nav=False, footer=f"Report generated {date.today():%Y-%m-%d}")
+
+
+def target_report(target, run=None, static=False):
+    label = results.TARGETS[target]
+    charts = target_charts(target, label, run)
+    page = ReportWriter(f"{label} Report" + (f" ({run})" if run else ""), static)
+    sections = [
+        ("📊 Model Performance Summary", results.model_performance(target, run=run), 5,
+         ["model_performance_r2"]),
+        ("📅 XGBoost Monthly Performance", results.monthly(target, run), 5, ["monthly_r2", "monthly_rmse"]),
+        ("📅 XGBoost Yearly Performance", results.yearly(target, run), 5, ["yearly_r2", "yearly_rmse"]),
+        ("📦 Clustering Performance", results.silhouette(target, run), 4, ["cluster_silhouette"]),
+        ("⚡ XGBoost Performance by Cluster", results.cluster_xgboost(target, run), 5, ["cluster_xgboost_r2"]),
+    ]
+    for title, df, decimals, names in sections:
+        page.heading(title)
+        page.row(page.table(df, decimals), "".join(page.figure(*charts[name]) for name in names))
+    return page
+
+
+def write_report(job):
+    target, out_dir, fmt, run = job
+    page = target_report(target, run, static=fmt == "pdf")
+    path = os.path.join(out_dir, f"{target}_report.{fmt}")
+    if fmt == "pdf":
+        from weasyprint import HTML
+
+        HTML(string=page.render()).write_pdf(path)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(page.render())
+    return path
+
+
+def build(out_dir, fmt="html", run=None, targets=None, workers=None):
+    """Render one report per target, each in its own process with its own figure cache."""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(target, out_dir, fmt, run) for target in targets or results.TARGETS]
+    with ProcessPoolExecutor(max_workers=workers or len(jobs)) as pool:
+        return list(pool.map(write_report, jobs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a standalone report per target.")
+    parser.add_argument("out_dir", nargs="?", default="reports")
+    parser.add_argument("--format", choices=FORMATS, default="html")
+    parser.add_argument("--run", help="model run to report on (default: the offline results)")
+    parser.add_argument("--target", action="append", choices=list(results.TARGETS),
+                        help="limit to this target; may be repeated")
+    parser.add_argument("--workers", type=int, help="report processes (default: one per target)")
+    args = parser.parse_args(argv)
+
+    for path in build(args.out_dir, args.format, args.run, args.target, args.workers):
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
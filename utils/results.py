@@ -0,0 +1,258 @@
+"""Offline evaluation results shown on the dashboard, for all three targets.
+
+These are the numbers produced by the training notebooks. Pages read them
+from here (or recompute them from stored predictions where available) so
+that the same tables can be exported or reported without running Streamlit.
+
+:func:`compact_metrics` holds every table in one long frame with
+categorical labels and float32 values; ``python -m utils.results`` compares
+its memory footprint with the plain tables.
+"""
+import numpy as np
+import pandas as pd
+
+TARGETS = {
+    "surface": "Surface Soil Moisture",
+    "root_zone": "Root Zone Soil Moisture",
+    "total": "Total Soil Moisture",
+}
+
+MODEL_NAMES = ['XGBoost', 'Gradient Boosting', 'Random Forest', 'Decision Tree',
+               'Linear Regression', 'CNN-LSTM', 'LSTM', 'CNN-GRU', 'CNN 1D']
+
+MODEL_PERFORMANCE = {
+    "surface": {
+        'Model': MODEL_NAMES,
+        'RMSE': [0.03359, 0.03649, 0.05272, 0.05309, 0.07063, 0.04525, 0.24283, 0.04335, 0.05829],
+        'R²': [0.91766, 0.90287, 0.82486, 0.79442, 0.63607, 0.90377, 0.85773, 0.88479, 0.81874]
+    },
+    "root_zone": {
+        'Model': MODEL_NAMES,
+        'RMSE': [0.03132, 0.03421, 0.05028, 0.05258, 0.06915, 0.03604, 0.22437, 0.04940, 0.04881],
+        'R²': [0.90477, 0.88641, 0.75459, 0.73157, 0.53577, 0.89259, 0.87811, 0.88335, 0.87635]
+    },
+    "total": {
+        'Model': MODEL_NAMES,
+        'RMSE': [0.02694, 0.02991, 0.06261, 0.04772, 0.06615, 0.06882, 0.24355, 0.06271, 0.05595],
+        'R²': [0.91110, 0.89046, 0.79556, 0.72112, 0.46417, 0.89974, 0.83889, 0.87385, 0.85728]
+    },
+}
+
+# XGBoost monthly/yearly metrics; the Mean summary row is computed by the accessors
+MONTHLY = {
+    "surface": {
+        "Month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                  "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"],
+        "RMSE": [0.042857, 0.031591, 0.030722, 0.027974, 0.032437, 0.032745,
+                 0.027635, 0.027368, 0.029675, 0.032624, 0.035653, 0.037435],
+        "R²": [0.748952, 0.870841, 0.886332, 0.913114, 0.905789, 0.925801,
+               0.92377, 0.927474, 0.925191, 0.915619, 0.866626, 0.844909]
+    },
+    "root_zone": {
+        "Month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                  "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"],
+        "RMSE": [0.02517, 0.0234, 0.02182, 0.02261, 0.02765, 0.0335,
+                 0.04522, 0.03431, 0.03085, 0.02935, 0.02825, 0.02808],
+        "R²": [0.8715, 0.8927, 0.9163, 0.9267, 0.9065, 0.8949,
+               0.8155, 0.8644, 0.8878, 0.888, 0.863, 0.8548]
+    },
+    "total": {
+        "Month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                  "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"],
+        "RMSE": [0.02361, 0.02271, 0.02156, 0.0211, 0.02315, 0.02509,
+                 0.0305, 0.03109, 0.03017, 0.02582, 0.02456, 0.02572],
+        "R²": [0.91031, 0.91371, 0.92066, 0.92892, 0.91878, 0.91649,
+               0.89804, 0.8973, 0.90285, 0.92343, 0.9166, 0.8967]
+    },
+}
+
+YEARLY = {
+    "surface": {
+        "Year": [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024],
+        "RMSE": [0.06259, 0.047557, 0.047202, 0.049984, 0.055594, 0.068118,
+                 0.056743, 0.071928, 0.052099, 0.048862],
+        "R²": [0.596767, 0.693501, 0.764806, 0.714968, 0.713004, 0.513201,
+               0.686846, 0.391223, 0.721574, 0.771139]
+    },
+    "root_zone": {
+        "Year": [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024],
+        "RMSE": [0.04654, 0.04667, 0.04548, 0.04418, 0.04526, 0.04891,
+                 0.04634, 0.04423, 0.04557, 0.04176],
+        "R²": [0.6731, 0.6281, 0.7047, 0.6821, 0.7195, 0.6516,
+               0.6851, 0.6745, 0.6583, 0.7201]
+    },
+    "total": {
+        "Year": [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024],
+        "RMSE": [0.0381, 0.03999, 0.03469, 0.03465, 0.03447, 0.03943,
+                 0.03612, 0.03342, 0.03539, 0.03272],
+        "R²": [0.7895, 0.78494, 0.84115, 0.83321, 0.85489, 0.80275,
+               0.83417, 0.84762, 0.83013, 0.84774]
+    },
+}
+
+SILHOUETTE = {
+    "surface": {
+        "Hierarchical": 0.3016,
+        "GMM": 0.4127,
+        "HMM": 0.2494,
+        "K-Shape": 0.0932,
+        "TS-KMeans": 0.3039,
+    },
+    "root_zone": {
+        "Hierarchical": 0.3016,
+        "GMM": 0.5211,
+        "HMM": 0.2842,
+        "K-Shape": -0.0544,
+        "TS-KMeans": 0.3466,
+    },
+    "total": {
+        "Hierarchical": 0.3025,
+        "GMM": 0.4226,
+        "HMM": 0.3089,
+        "K-Shape": -0.0452,
+        "TS-KMeans": 0.2984,
+    },
+}
+
+CLUSTER_XGBOOST = {
+    "surface": [
+        ("Without Cluster", 0.0336, 0.91766),
+        ("Cluster 0", 0.02389, 0.94181),
+        ("Cluster 1", 0.02917, 0.91871),
+        ("Cluster 2", 0.03181, 0.92861),
+        ("Cluster 3", 0.03088, 0.89771),
+    ],
+    "root_zone": [
+        ("Without Cluster", 0.03132, 0.90477),
+        ("Cluster 0", 0.02572, 0.95751),
+        ("Cluster 1", 0.02808, 0.89228),
+        ("Cluster 2", 0.02728, 0.9492),
+        ("Cluster 3", 0.03084, 0.88797),
+    ],
+    "total": [
+        ("Without Cluster", 0.02694, 0.9111),
+        ("Cluster 0", 0.02297, 0.93182),
+        ("Cluster 1", 0.0194, 0.96853),
+        ("Cluster 2", 0.02638, 0.89768),
+        ("Cluster 3", 0.03061, 0.89561),
+    ],
+}
+
+
+def _run_table(run, target, name):
+    from utils.runs import get_run_store
+
+    return get_run_store().table(run, target, name)
+
+
+def model_performance(target, n_models=None, run=None):
+    """Model comparison table, optionally limited to the first ``n_models`` rows.
+
+    Every table accessor takes an optional ``run`` id; without one the
+    offline numbers above are returned.
+    """
+    df = _run_table(run, target, "model_performance") if run else pd.DataFrame(MODEL_PERFORMANCE[target])
+    return df if n_models is None else df.head(n_models)
+
+
+def with_mean(df):
+    """``df`` with a trailing ``Mean`` row averaging the metric columns."""
+    label = df.columns[0]
+    mean = pd.DataFrame([{label: "Mean", **df.drop(columns=label).mean()}])
+    return pd.concat([df.astype({label: object}), mean], ignore_index=True)
+
+
+def _period(df, summary):
+    # Runs recorded before summaries were computed still store the Mean row
+    label = df.columns[0]
+    df = df[df[label].astype(str) != "Mean"].reset_index(drop=True)
+    if label == "Year":
+        df[label] = df[label].astype(np.int64)
+    return with_mean(df) if summary else df
+
+
+def monthly(target, run=None, summary=True):
+    """Monthly table; ``summary`` appends the computed ``Mean`` row shown on the pages."""
+    return _period(_run_table(run, target, "monthly") if run else pd.DataFrame(MONTHLY[target]), summary)
+
+
+def yearly(target, run=None, summary=True):
+    return _period(_run_table(run, target, "yearly") if run else pd.DataFrame(YEARLY[target]), summary)
+
+
+def silhouette(target, run=None):
+    if run:
+        return _run_table(run, target, "cluster_silhouette")
+    df = pd.DataFrame.from_dict(SILHOUETTE[target], orient='index', columns=['Silhouette Score'])
+    return df.reset_index().rename(columns={'index': 'Method'})
+
+
+def cluster_xgboost(target, run=None):
+    if run:
+        return _run_table(run, target, "cluster_xgboost")
+    return pd.DataFrame(CLUSTER_XGBOOST[target], columns=['Cluster', 'RMSE', 'R²'])
+
+
+# name -> table builder, for everything that can be exported per target
+TABLES = {
+    "model_performance": model_performance,
+    "monthly": monthly,
+    "yearly": yearly,
+    "cluster_silhouette": silhouette,
+    "cluster_xgboost": cluster_xgboost,
+}
+PERIOD_TABLES = ("monthly", "yearly")
+
+
+def raw_table(name, target, run=None):
+    """A table as stored, without computed summary rows."""
+    if name in PERIOD_TABLES:
+        return TABLES[name](target, run=run, summary=False)
+    return TABLES[name](target, run=run)
+
+
+def _long(frames):
+    out = pd.concat(frames, ignore_index=True)
+    out["value"] = pd.to_numeric(out["value"], errors="coerce")
+    return out
+
+
+def _melt(df, target, name):
+    row = df.columns[0]
+    long = df.melt(id_vars=row, var_name="metric", value_name="value").rename(columns={row: "row"})
+    long.insert(0, "table", name)
+    long.insert(0, "target", target)
+    return long
+
+
+def compact_metrics(run=None):
+    """Every table of a run as one long frame: ``target, table, row, metric, value``.
+
+    Labels are categorical and values float32; summary rows are left out
+    and can be recomputed with a groupby.
+    """
+    out = _long([_melt(raw_table(name, target, run), target, name)
+                 for target in TARGETS for name in TABLES])
+    for column in ("target", "table", "row", "metric"):
+        out[column] = out[column].astype(str).astype("category")
+    out["value"] = out["value"].astype(np.float32)
+    return out
+
+
+def memory_report(run=None):
+    """Deep memory use of the plain tables versus :func:`compact_metrics`."""
+    pairs = [(target, name) for target in TARGETS for name in TABLES]
+    tables = [TABLES[name](target, run=run) for target, name in pairs]
+    plain = _long([_melt(df, *pair) for df, pair in zip(tables, pairs)])
+    compact = compact_metrics(run)
+    rows = [
+        ("Per-table DataFrames, inline Mean rows", sum(map(len, tables)),
+         sum(df.memory_usage(deep=True).sum() for df in tables)),
+        ("Long frame, object labels", len(plain), plain.memory_usage(deep=True).sum()),
+        ("Compact long frame", len(compact), compact.memory_usage(deep=True).sum()),
+    ]
+    return pd.DataFrame(rows, columns=["Representation", "Rows", "Bytes"])
+
+
+if __name__ == "__main__":
+    print(memory_report().to_string(index=False))
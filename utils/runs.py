@@ -0,0 +1,296 @@
+"""Versioned model runs stored copy-on-write by content hash.
+
+Each run is a manifest mapping artifact keys (``images/surface/...png``,
+``metrics/surface/monthly.json``, ...) to the SHA-256 of their content::
+
+    runs/<run_id>/manifest.json
+    runs/objects/<hash[:2]>/<hash>
+
+An artifact that did not change between runs is stored once and shared by
+every manifest that lists it, and in-process caches are keyed by hash, so
+switching runs reuses whatever is already warm.
+
+Record the current tree as a run::
+
+    python -m utils.runs snapshot 2025-06-retrain [--parent 2025-01-baseline]
+    python -m utils.runs diff 2025-01-baseline 2025-06-retrain --threshold 0.005
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from utils import storage
+
+RUNS_PREFIX = "runs"
+OBJECTS_DIR = "objects"
+OBJECTS_PREFIX = f"{RUNS_PREFIX}/{OBJECTS_DIR}"
+# Memory budget of the in-process object cache; larger objects are not cached
+OBJECT_CACHE_BYTES = 256 * 1024 ** 2
+
+
+def object_key(digest):
+    return f"{OBJECTS_PREFIX}/{digest[:2]}/{digest}"
+
+
+def table_key(target, name):
+    return f"metrics/{target}/{name}.json"
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ObjectCache:
+    """LRU of artifact bytes bounded by their total size rather than their count."""
+
+    def __init__(self, max_bytes=OBJECT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, digest):
+        with self._lock:
+            if digest in self._data:
+                self._data.move_to_end(digest)
+                self.hits += 1
+                return self._data[digest]
+        data = storage.read(object_key(digest))
+        with self._lock:
+            self.misses += 1
+            if len(data) <= self.max_bytes and digest not in self._data:
+                self._data[digest] = data
+                self.bytes += len(data)
+                while self.bytes > self.max_bytes:
+                    _, old = self._data.popitem(last=False)
+                    self.bytes -= len(old)
+                    self.evictions += 1
+        return data
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._data)
+            self._data.clear()
+            self.bytes = 0
+        return removed
+
+    def __len__(self):
+        return len(self._data)
+
+
+object_cache = ObjectCache()
+
+
+def read_object(digest):
+    """Artifact bytes by content hash, cached across runs and sessions."""
+    return object_cache.get(digest)
+
+
+@lru_cache(maxsize=256)
+def _table(digest):
+    return pd.read_json(StringIO(read_object(digest).decode()), orient="split", dtype=False)
+
+
+def cache_stats():
+    """``{name: {entries, nbytes, hits, misses, evictions}}`` for the object and table caches."""
+    info = _table.cache_info()
+    return {
+        "run objects": {"entries": len(object_cache), "nbytes": object_cache.bytes, "hits": object_cache.hits,
+                        "misses": object_cache.misses, "evictions": object_cache.evictions},
+        # lru_cache does not count evictions; every miss beyond maxsize evicted one entry
+        "run tables": {"entries": info.currsize, "nbytes": None, "hits": info.hits, "misses": info.misses,
+                       "evictions": max(0, info.misses - info.maxsize)},
+    }
+
+
+def clear_caches():
+    """Empty the object and table caches; returns ``{name: entries removed}``."""
+    removed = {"run objects": object_cache.clear(), "run tables": _table.cache_info().currsize}
+    _table.cache_clear()
+    return removed
+
+
+class RunStore:
+    def __init__(self, backend=None):
+        self.backend = backend or storage.get_storage()
+        self._manifests = {}
+
+    def list_runs(self):
+        """Run ids, oldest first; only the run directories are listed, not the objects."""
+        runs = []
+        for run_id in self.backend.list_dirs(RUNS_PREFIX):
+            if run_id == OBJECTS_DIR:
+                continue
+            try:
+                runs.append(self.manifest(run_id))
+            except FileNotFoundError:
+                continue
+        return [m["run_id"] for m in sorted(runs, key=lambda m: m["created"])]
+
+    def manifest(self, run_id):
+        if run_id not in self._manifests:
+            data = self.backend.read(f"{RUNS_PREFIX}/{run_id}/manifest.json")
+            self._manifests[run_id] = json.loads(data)
+        return self._manifests[run_id]
+
+    def forget(self, run_id):
+        """Drop a cached manifest so it is re-read; returns whether one was cached."""
+        return self._manifests.pop(run_id, None) is not None
+
+    def digest(self, run_id, key):
+        return self.manifest(run_id)["artifacts"].get(key.replace(os.sep, "/"))
+
+    def read(self, run_id, key):
+        digest = self.digest(run_id, key)
+        if digest is None:
+            raise FileNotFoundError(key)
+        return read_object(digest)
+
+    def local_path(self, run_id, key):
+        """A local file holding the run's artifact ``key``, or ``None`` if the run has none.
+
+        Lets memory-mapped loaders map run objects instead of reading them whole.
+        """
+        digest = self.digest(run_id, key)
+        return None if digest is None else self.backend.local_path(object_key(digest))
+
+    def table(self, run_id, target, name):
+        digest = self.digest(run_id, table_key(target, name))
+        if digest is None:
+            raise KeyError(f"Run {run_id} has no {name} table for {target}")
+        return _table(digest).copy()
+
+    def commit(self, run_id, artifacts, parent=None):
+        """Store ``{key: bytes or local file path}`` as a run; only content not already stored is written.
+
+        Files are hashed and copied in chunks, never read whole.
+        """
+        entries = dict(self.manifest(parent)["artifacts"]) if parent else {}
+        written = 0
+        for key, data in artifacts.items():
+            is_file = isinstance(data, str)
+            digest = file_digest(data) if is_file else hashlib.sha256(data).hexdigest()
+            if not self.backend.exists(object_key(digest)):
+                if is_file:
+                    self.backend.write_file(object_key(digest), data)
+                else:
+                    self.backend.write(object_key(digest), data)
+                written += 1
+            entries[key] = digest
+        manifest = {"run_id": run_id, "parent": parent, "created": time.time(), "artifacts": entries}
+        self.backend.write(f"{RUNS_PREFIX}/{run_id}/manifest.json", json.dumps(manifest, indent=1).encode())
+        self._manifests[run_id] = manifest
+        return written
+
+
+def current_artifacts(image_root="images", data_dir="data"):
+    """The metric tables, images and stored predictions of the working tree as run artifacts.
+
+    Tables are serialized to bytes; images and predictions are given by path,
+    so :meth:`RunStore.commit` can stream them.
+    """
+    from utils import results
+
+    artifacts = {}
+    roots = [image_root]
+    for target in results.TARGETS:
+        for name in results.TABLES:
+            table = results.raw_table(name, target)
+            artifacts[table_key(target, name)] = table.to_json(orient="split", index=False).encode()
+        roots.append(os.path.join(data_dir, target, "predictions"))
+    for root, _, files in (entry for top in roots for entry in os.walk(top)):
+        for name in files:
+            path = os.path.join(root, name)
+            artifacts[path.replace(os.sep, "/")] = path
+    return artifacts
+
+
+# +1 where a higher value is better, -1 where lower is better
+DIRECTION = {"RMSE": -1, "MAE": -1, "R²": 1, "Silhouette Score": 1}
+DIFF_KEYS = ["target", "table", "row", "metric"]
+
+
+def diff_metrics(base, head):
+    """Join two :func:`utils.results.compact_metrics` frames and subtract,
+    largest relative change first.
+
+    ``change`` is the delta signed so that negative means worse, whatever
+    the direction of the metric, and ``relative`` is ``change`` as a
+    fraction of the baseline value, so RMSE and R² rows sort on one scale.
+    Rows present in only one run are dropped.
+    """
+    merged = base.merge(head, on=DIFF_KEYS, suffixes=("_base", "_head"))
+    merged["delta"] = merged["value_head"] - merged["value_base"]
+    merged["change"] = merged["delta"] * merged["metric"].astype(str).map(DIRECTION).fillna(-1)
+    scale = merged["value_base"].abs().to_numpy()
+    change = merged["change"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        merged["relative"] = np.where(scale > 0, change / scale,
+                                      np.where(change == 0, 0.0, np.copysign(np.inf, change)))
+    order = merged["relative"].abs().to_numpy().argsort(kind="stable")[::-1]
+    return merged.iloc[order].reset_index(drop=True)
+
+
+def regressions(diff, threshold=0.0):
+    """Boolean mask of rows that got worse by more than ``threshold``."""
+    return diff["change"] < -threshold
+
+
+_store = None
+
+
+def get_run_store():
+    global _store
+    if _store is None:
+        _store = RunStore()
+    return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage versioned model runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    snap = sub.add_parser("snapshot", help="record the current metrics and images as a run")
+    snap.add_argument("run_id")
+    snap.add_argument("--parent", help="run whose artifacts are inherited unless overwritten")
+    sub.add_parser("list", help="list recorded runs")
+    diff = sub.add_parser("diff", help="compare the metrics of two runs ('offline' for the built-in results)")
+    diff.add_argument("base")
+    diff.add_argument("head")
+    diff.add_argument("--threshold", type=float, default=0.0, help="minimum worsening to report")
+    args = parser.parse_args(argv)
+
+    store = get_run_store()
+    if args.command == "snapshot":
+        artifacts = current_artifacts()
+        written = store.commit(args.run_id, artifacts, args.parent)
+        print(f"Run {args.run_id}: {len(artifacts)} artifacts, {written} new objects stored")
+    elif args.command == "diff":
+        base, head = (None if r == "offline" else r for r in (args.base, args.head))
+        from utils.results import compact_metrics
+
+        result = diff_metrics(compact_metrics(base), compact_metrics(head))
+        worse = result[regressions(result, args.threshold)]
+        print(worse.to_string(index=False) if len(worse) else "No regressions")
+    else:
+        for run_id in store.list_runs():
+            manifest = store.manifest(run_id)
+            print(f"{run_id}\t{len(manifest['artifacts'])} artifacts\tparent={manifest['parent']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""Page sections and cached data shared by the dashboard pages."""
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from utils import results
+from utils.clustering import load_cluster_labels
+from utils.figures import cached_figure, compact_figure, model_bar, silhouette_bar
+from utils.inference import FEATURE_SET_SIZES, ModelRegistry, available_model_files, load_feature_spec
+from utils.metrics import (MODELS, available_models, feature_curve, filter_mask, load_predictions,
+                           period_table)
+from utils.rasters import METRICS, ErrorRaster
+from utils.runs import diff_metrics, get_run_store, regressions
+from utils.spatial import GridIndex, load_cells
+from utils.timeseries import TimeSeriesStore, lttb
+
+# st.fragment was st.experimental_fragment before Streamlit 1.37; without
+# either, sections simply rerun with the page
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+# Roughly the pixel width of a full-width chart; more points cannot be seen
+MAX_PLOT_POINTS = 1500
+
+
+NAV_PAGES = [
+    ("Home.py", "🏠 Home"),
+    ("pages/1_surface_analysis.py", "🔵 Detailed Surface Analysis"),
+    ("pages/2_root_zone_analysis.py", "🟢 Detailed Root Zone Analysis"),
+    ("pages/3_total_analysis.py", "🟠 Detailed Total Analysis"),
+    ("pages/5_cluster_analysis.py", "📦 Advanced Clustering Analysis"),
+]
+
+# Home page bar colours per target: (model performance, clustering)
+HOME_PALETTES = {
+    "surface": (px.colors.qualitative.Set1, px.colors.qualitative.Set3),
+    "root_zone": (px.colors.qualitative.Set2, None),
+    "total": (px.colors.qualitative.Pastel, None),
+}
+
+
+@st.cache_resource
+def get_navigation():
+    """Sidebar links for the pages present in this deployment, built once per process."""
+    return [(page, label) for page, label in NAV_PAGES if os.path.exists(page)]
+
+
+def render_navigation():
+    st.sidebar.title("Navigation")
+    for page, label in get_navigation():
+        st.sidebar.page_link(page, label=label)
+
+
+@st.cache_resource
+def get_home_summary(target, run=None):
+    """Home page tables and figures for one target, shared by every session.
+
+    Returns ``(model_df, model_fig, cluster_df, cluster_fig)``; the frames and
+    figures are only read by the page, never modified.
+    """
+    label = results.TARGETS[target]
+    model_palette, cluster_palette = HOME_PALETTES[target]
+    model_df = results.model_performance(target, run=run)
+    model_fig = cached_figure(model_bar, model_df, f'{label} - Model Performance (R² Score)',
+                              palette=model_palette)
+    silhouette = results.silhouette(target, run=run)
+    cluster_fig = cached_figure(silhouette_bar, silhouette, f'{label} - Clustering Performance',
+                                palette=cluster_palette)
+    cluster_df = (silhouette.rename(columns={'Method': 'Clustering Method'})
+                  .replace({'TS-KMeans': 'TimeSeriesKMeans'}))
+    return model_df, model_fig, cluster_df, cluster_fig
+
+
+@st.cache_data(ttl=60)
+def get_run_ids():
+    return get_run_store().list_runs()
+
+
+def select_run():
+    """Sidebar model-run selector shared by every page.
+
+    Returns the selected run id, or ``None`` for the offline results. The
+    choice is kept in session state so it survives page navigation.
+    """
+    runs = get_run_ids()
+    if not runs:
+        return None
+    options = ["Offline results"] + runs[::-1]
+    current = st.session_state.get("selected_run")
+    choice = st.sidebar.selectbox("Model run", options,
+                                  index=options.index(current) if current in options else 1)
+    st.session_state["selected_run"] = choice
+    return None if choice == options[0] else choice
+
+
+def run_reader(run):
+    """Asset read function for a run, or ``None`` for the working tree."""
+    if run is None:
+        return None
+    store = get_run_store()
+    return lambda path: store.read(run, path)
+
+
+def run_resolver(run):
+    """Local-file lookup for a run's assets, or ``None`` for the working tree."""
+    if run is None:
+        return None
+    store = get_run_store()
+    return lambda path: store.local_path(run, path)
+
+
+def run_exists(run):
+    """Asset existence check for a run, or ``None`` for the working tree."""
+    if run is None:
+        return None
+    store = get_run_store()
+    return lambda path: store.digest(run, path) is not None
+
+
+@st.cache_data
+def get_run_diff(base, head):
+    return diff_metrics(results.compact_metrics(base), results.compact_metrics(head))
+
+
+@st.cache_resource
+def get_timeseries_store(folder):
+    return TimeSeriesStore.open(folder)
+
+
+@st.cache_resource
+def get_predictions(folder, model_key, run=None):
+    return load_predictions(folder, model_key, resolve=run_resolver(run))
+
+
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry()
+
+
+@st.cache_resource
+def get_error_raster(folder, model_key):
+    return ErrorRaster.open(folder, model_key)
+
+
+@st.cache_resource
+def get_spatial_index(folder):
+    """Cell-centroid index, built once per process and shared by all sessions."""
+    coords = load_cells(folder)
+    return None if coords is None else GridIndex.from_coords(coords)
+
+
+@st.cache_data
+def get_feature_spec(folder):
+    return load_feature_spec(folder)
+
+
+@st.cache_data
+def get_feature_curve(folder, model_key):
+    return feature_curve(folder, model_key)
+
+
+@st.cache_data
+def get_available_models(folder, run=None):
+    """``[(name, key)]`` of the models with stored predictions in a run or the working tree."""
+    return available_models(folder, exists=run_exists(run))
+
+
+@st.cache_data
+def get_date_range(folder, model_key, run=None):
+    """First and last prediction date of a model, as ``datetime.date``."""
+    dates = np.asarray(get_predictions(folder, model_key, run)["date"])
+    return dates.min().astype(object), dates.max().astype(object)
+
+
+@st.cache_data
+def get_period_table(folder, model_key, period, run=None, start=None, end=None, cluster_method=None,
+                     cluster=None):
+    """Monthly/yearly metrics for one model of a run, or ``None`` without stored predictions."""
+    predictions = get_predictions(folder, model_key, run) if model_key else None
+    if predictions is None:
+        return None
+    cell_labels = load_cluster_labels(folder).get(cluster_method)
+    mask = filter_mask(predictions, start, end, cell_labels, cluster)
+    return period_table(predictions, period, mask)
+
+
+def temporal_controls(target, run=None):
+    """Model and filter selection for the monthly/yearly sections.
+
+    Returns ``(model_name, model_key, filters)`` where ``filters`` are keyword
+    arguments for :func:`get_period_table`. Without stored predictions in
+    the run (or working tree) the pages keep its stored XGBoost tables.
+    """
+    models = get_available_models(target, run)
+    if not models:
+        return "XGBoost", None, {}
+
+    filters = {}
+    with st.expander("⚙️ Temporal breakdown settings"):
+        names = [name for name, _ in models]
+        model_name = st.selectbox("Model", names, key=f"{target}_period_model")
+        model_key = dict(models)[model_name]
+
+        first, last = get_date_range(target, model_key, run)
+        date_range = st.date_input("Date range", value=(first, last), min_value=first,
+                                   max_value=last, key=f"{target}_period_range")
+        if date_range:
+            filters["start"], filters["end"] = date_range[0], date_range[-1]
+
+        labels = load_cluster_labels(target)
+        if labels:
+            method = st.selectbox("Restrict to cluster of", ["All grid cells"] + list(labels),
+                                  key=f"{target}_period_method")
+            if method != "All grid cells":
+                filters["cluster_method"] = method
+                filters["cluster"] = st.selectbox("Cluster", np.unique(labels[method]).tolist(),
+                                                  key=f"{target}_period_cluster")
+    return model_name, model_key, filters
+
+
+@fragment
+def render_timeseries_section(target, label):
+    st.header(f"📈 {label} Time Series")
+    store = get_timeseries_store(target)
+    if store is None:
+        st.info(f"No stored time series found for {label}.")
+        return
+
+    daily = store.dates["daily"]
+    first, last = daily[0].astype(object), daily[-1].astype(object)
+    labels = load_cluster_labels(target)
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        modes = ["Single grid cell", "Cluster average"] if labels else ["Single grid cell"]
+        mode = st.radio("Series", modes, key=f"{target}_ts_mode")
+        if mode == "Single grid cell":
+            cell = st.number_input("Grid cell", min_value=0, max_value=store.n_cells - 1,
+                                   value=0, key=f"{target}_ts_cell")
+        else:
+            method = st.selectbox("Clustering method", list(labels), key=f"{target}_ts_method")
+            cluster = st.selectbox("Cluster", np.unique(labels[method]).tolist(),
+                                   key=f"{target}_ts_cluster")
+        date_range = st.date_input("Date range", value=(first, last), min_value=first,
+                                   max_value=last, key=f"{target}_ts_range")
+
+    start, end = (date_range[0], date_range[-1]) if date_range else (first, last)
+    resolution = store.resolution_for(start, end, MAX_PLOT_POINTS)
+    if mode == "Single grid cell":
+        dates, values = store.read_cell(int(cell), resolution)
+        title = f"Grid cell {int(cell)}"
+    else:
+        dates, values = store.read_mean(np.flatnonzero(labels[method] == cluster), resolution)
+        title = f"{method} cluster {cluster} average"
+
+    mask = (dates >= np.datetime64(start, "D")) & (dates <= np.datetime64(end, "D"))
+    dates, values = lttb(dates[mask], values[mask], MAX_PLOT_POINTS)
+
+    with col2:
+        fig = px.line(
+            pd.DataFrame({"Date": dates, label: values}),
+            x="Date",
+            y=label,
+            title=f"{title} ({resolution})",
+            color_discrete_sequence=['#2e86ab'],
+            template='dashboard'
+        )
+        st.plotly_chart(compact_figure(fig), use_container_width=True)
+
+
+def render_feature_curve(target, label, tolerance=0.01):
+    st.subheader("📉 Accuracy vs. Number of Features (XGBoost)")
+    curve = get_feature_curve(target, "xgboost")
+    if curve.empty:
+        st.info(f"No per-feature-count predictions stored for {label}.")
+        return
+
+    # Cheapest feature set whose R² is within tolerance of the best one
+    cheapest = curve[curve["R²"] >= curve["R²"].max() - tolerance].iloc[0]
+    st.caption(f"Top {int(cheapest['Features'])} features reach R² = {cheapest['R²']:.4f}, "
+               f"within {tolerance} of the best ({curve['R²'].max():.4f}).")
+
+    tab1, tab2 = st.tabs(["R² Score", "RMSE"])
+    for tab, metric, color in ((tab1, "R²", '#3498db'), (tab2, "RMSE", '#e74c3c')):
+        with tab:
+            fig = px.line(
+                curve,
+                x="Features",
+                y=metric,
+                markers=True,
+                color_discrete_sequence=[color],
+                template='dashboard'
+            )
+            fig.add_vline(x=int(cheapest["Features"]), line_dash="dash", line_color="#7f8c8d")
+            fig.update_layout(
+                xaxis_title="Number of Top Features"
+            )
+            st.plotly_chart(compact_figure(fig), use_container_width=True)
+
+
+@fragment
+def render_whatif_panel(target, label):
+    st.subheader(f"🎛️ What-if {label} Prediction")
+    spec = get_feature_spec(target)
+    if spec is None:
+        st.info(f"No serialized models found for {label}.")
+        return
+
+    sizes = [k for k in FEATURE_SET_SIZES if str(k) in spec["feature_sets"]]
+    k = st.selectbox("Feature set", sizes, index=len(sizes) - 1,
+                     format_func=lambda n: f"Top {n} Features", key=f"{target}_whatif_k")
+    models = available_model_files(target, MODELS, k)
+    if not models:
+        st.info(f"No serialized models trained on the top {k} features.")
+        return
+    model_name = st.selectbox("Model", [name for name, _ in models], key=f"{target}_whatif_model")
+
+    # A form so that moving sliders does not trigger a prediction per change
+    features = spec["feature_sets"][str(k)]
+    with st.form(key=f"{target}_whatif_form"):
+        cols = st.columns(4)
+        values = []
+        for i, feature in enumerate(features):
+            stats = spec["features"][feature]
+            with cols[i % 4]:
+                values.append(st.slider(feature, float(stats["min"]), float(stats["max"]),
+                                        float(stats["mean"]), key=f"{target}_whatif_{k}_{feature}"))
+        submitted = st.form_submit_button("Predict")
+
+    if submitted:
+        # Quantize to a thousandth of each slider's range
+        step = [(spec["features"][f]["max"] - spec["features"][f]["min"]) / 1000 or 1e-6 for f in features]
+        registry = get_model_registry()
+        model_key = dict(models)[model_name]
+        prediction = registry.predict(target, model_key, k, [values], step=step)
+        st.metric(f"Predicted {label} ({model_name})", f"{float(prediction[0]):.5f}")
+        st.caption(f"Prediction cache hit rate for {model_name}: "
+                   f"{registry.cache.hit_rate((target, model_key, k)):.1%}")
+
+
+@fragment
+def render_grid_explorer(target, label):
+    st.subheader("🔎 Per-cell Error Explorer")
+    rasters = [(name, key) for name, key in MODELS if get_error_raster(target, key) is not None]
+    if not rasters:
+        st.info(f"No per-cell error rasters stored for {label}.")
+        return
+
+    model_name = st.selectbox("Model", [name for name, _ in rasters], key=f"{target}_grid_model")
+    raster = get_error_raster(target, dict(rasters)[model_name])
+    lats, lons = raster.lats, raster.lons
+
+    stride, preview = raster.downsampled()
+    fig = go.Figure(go.Heatmap(
+        z=preview[1],
+        x=lons[::stride],
+        y=lats[::stride],
+        customdata=np.stack([preview[0], preview[2]], axis=-1),
+        colorscale='RdYlGn',
+        zmin=0,
+        zmax=1,
+        colorbar_title="R²",
+        hovertemplate="Lat %{y:.2f}, Lon %{x:.2f}<br>R² %{z:.4f}<br>"
+                      "RMSE %{customdata[0]:.5f}<br>Bias %{customdata[1]:.5f}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f"{model_name} R² per Grid Cell",
+        xaxis_title="Longitude",
+        yaxis_title="Latitude",
+        yaxis_scaleanchor="x",
+        template='dashboard'
+    )
+    st.plotly_chart(compact_figure(fig), use_container_width=True)
+
+    st.markdown("**Region summary**")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        lat_range = st.slider("Latitude", float(lats[0]), float(lats[-1]),
+                              (float(lats[0]), float(lats[-1])), key=f"{target}_grid_lat")
+    with col2:
+        lon_range = st.slider("Longitude", float(lons[0]), float(lons[-1]),
+                              (float(lons[0]), float(lons[-1])), key=f"{target}_grid_lon")
+    with col3:
+        threshold = st.number_input("Count cells with R² below", 0.0, 1.0, 0.8, 0.05,
+                                    key=f"{target}_grid_threshold")
+    stats = raster.region_stats(*lat_range, *lon_range, r2_below=threshold)
+    st.dataframe(stats.style.format({'Mean': '{:.5f}', 'Std': '{:.5f}', 'Min': '{:.5f}', 'Max': '{:.5f}'}),
+                 use_container_width=True)
+    st.caption(f"{stats.attrs['cells_below']} of {int(stats['Cells'].iloc[1])} cells have R² below {threshold}.")
+
+    index = get_spatial_index(target)
+    if index is not None:
+        cells = index.query_bbox(*lat_range, *lon_range)
+        values = raster.values_at(index.lat[cells], index.lon[cells])
+        below = values[1] < threshold
+        worst = pd.DataFrame({"Cell": cells[below], "Latitude": index.lat[cells[below]],
+                              "Longitude": index.lon[cells[below]],
+                              **{m: values[k, below] for k, m in enumerate(METRICS)}})
+        with st.expander(f"Cells with R² below {threshold} ({len(worst)})"):
+            st.dataframe(worst.sort_values("R²").style.format({m: '{:.5f}' for m in METRICS}),
+                         use_container_width=True)
+
+
+@fragment
+def render_run_diff():
+    runs = get_run_ids()
+    if not runs:
+        return
+    st.header("🔁 Run Comparison")
+    options = ["Offline results"] + runs[::-1]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        base = st.selectbox("Baseline run", options, index=2 if len(options) > 2 else 0, key="diff_base")
+    with col2:
+        head = st.selectbox("Compared run", options, index=1, key="diff_head")
+    with col3:
+        threshold = st.number_input("Regression threshold", min_value=0.0, value=0.001,
+                                    step=0.001, format="%.4f", key="diff_threshold")
+    if base == head:
+        st.info("Select two different runs to compare.")
+        return
+
+    diff = get_run_diff(*(None if r == options[0] else r for r in (base, head)))
+    worse = regressions(diff, threshold)
+    st.metric("Regressions", int(worse.sum()), delta=f"of {len(diff)} metrics", delta_color="off")
+    shown = diff[worse] if st.checkbox("Regressions only", value=True, key="diff_only") else diff
+    st.dataframe(shown.style.format({"value_base": "{:.5f}", "value_head": "{:.5f}",
+                                     "delta": "{:+.5f}", "change": "{:+.5f}", "relative": "{:+.1%}"}),
+                 use_container_width=True, hide_index=True)
@@ -0,0 +1,312 @@
+"""Static snapshot of the dashboard for read-only hosting.
+
+Usage::
+
+    python -m utils.snapshot site/ [--force] [--max-width 1600]
+
+Writes one HTML file per page (Home, the three target pages and the cluster
+page) with Plotly figures embedded as JSON and re-encoded images, which any
+plain file server can host. plotly.js is written once next to the pages
+under a content-hash name, so browsers fetch and cache it once for the
+whole site and pages need no other network. Images keep their content-hash URLs across builds unless they
+visibly changed. The build is skipped when the content of the metrics,
+``images/``, the recorded runs and the code that renders them is unchanged
+since the last snapshot.
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+from functools import lru_cache
+
+from utils import results, runs
+from utils.runs import file_digest
+from utils.figures import cached_spec, cluster_bar, model_bar, silhouette_bar, trend_line
+from utils.publish import publish_images
+
+IMAGE_ROOT = "images"
+FINGERPRINT_FILE = ".snapshot-fingerprint"
+METRIC_SOURCES = ("utils/results.py", "data")
+CODE_SOURCES = ("utils/figures.py", "utils/sections.py", "utils/snapshot.py", "utils/publish.py")
+
+PAGES = [
+    ("index.html", "🏠 Home"),
+    ("surface.html", "🔵 Detailed Surface Analysis"),
+    ("root_zone.html", "🟢 Detailed Root Zone Analysis"),
+    ("total.html", "🟠 Detailed Total Analysis"),
+    ("clusters.html", "📦 Advanced Clustering Analysis"),
+]
+
+FEATURE_MODELS = [
+    ("Linear Regression", "linear_regression"),
+    ("Decision Tree", "decision_tree"),
+    ("Random Forest", "random_forest"),
+    ("Gradient Boosting", "gradient_boosting"),
+    ("XGBoost", "xgboost"),
+]
+
+GRID_MODELS = [
+    ("XGBoost", "Grid_wise_Plot_XGboost"),
+    ("Gradient Boosting", "Grid_wise_Plot_GBR"),
+    ("Random Forest", "Grid_wise_Plot_RF"),
+    ("Decision Tree", "Grid_wise_Plot_DT"),
+    ("Linear Regression", "Grid_wise_Plot_LR"),
+]
+
+
+def image_sections(target):
+    """The image tabs of a target page as ``[(title, [(file, caption), ...])]``."""
+    return [
+        ("📊 Feature Importance", [
+            (f"{key}_importance{suffix}.png", f"{name} {kind}")
+            for name, key in FEATURE_MODELS
+            for suffix, kind in (("", "Feature Importance"), ("_%_pie_chart", "Feature Contribution"))
+        ]),
+        ("📈 Actual vs. Predicted", [
+            ("xgboost_actual_vs_pred_28.png", "All 28 Features"),
+            ("xgboost_actual_vs_pred_15.png", "Top 15 Features"),
+            ("xgboost_actual_vs_pred_8.png", "Top 8 Features"),
+            ("xgboost_actual_vs_pred_5.png", "Top 5 Features"),
+            ("xgboost_actual_vs_pred_combined.png", "Combined Analysis"),
+        ]),
+        ("🗓️ Yearly Features", [
+            ("top15_yearly_bar.png", "Top 15 Features - Bar Chart"),
+            ("top10_yearly_pie.png", "Top 10 Features - Pie Chart"),
+            ("yearly_heatmap.png", "Feature Importance Heatmap (Years)"),
+            ("yearly_stacked_bar.png", "Top 10 Feature Contributions (Stacked Bar)"),
+        ]),
+        ("📅 Monthly Features", [
+            ("top15_monthly_bar.png", "Top 15 Features - Bar Chart"),
+            ("top10_monthly_pie.png", "Top 10 Features - Pie Chart"),
+            ("monthly_heatmap.png", "Feature Importance Heatmap (Months)"),
+            ("monthly_stacked_bar.png", "Top 10 Feature Contributions (Stacked Bar)"),
+        ]),
+        ("🔍 SHAP Analysis", [
+            ("shap_with_10year_Summary_Plot.png", "SHAP Summary Plot (10 Years Data)"),
+            ("shap_with_10year_Waterfall_Plot.png", "SHAP Waterfall Plot (10 Years Data)"),
+        ]),
+        ("🌐 Grid-wise Performance", [
+            (f"{key} R2score Performance ({target}_soil_moisture).png", f"{name} R² Score Distribution")
+            for name, key in GRID_MODELS
+        ]),
+    ]
+
+
+def cluster_images(target):
+    prefix = f"{target}_soil_moisture"
+    maps = [(f"{prefix}_cluster_{i}.png", "All India" if i == 1 else f"Cluster {i - 1}") for i in range(1, 6)]
+    features = [(f"{prefix}_feature_{kind}_cluster_{i}.png", f"Feature {title} - Cluster {i - 1}")
+                for i in range(1, 5) for kind, title in (("bar", "Importance (Bar)"), ("pie", "Contribution (Pie)"))]
+    return maps, features
+
+
+@lru_cache(maxsize=1)
+def plotly_js():
+    from plotly.offline import get_plotlyjs
+
+    return get_plotlyjs()
+
+
+def plotly_script():
+    """plotly.js inlined, for single-file output."""
+    return f"<script>{plotly_js()}</script>"
+
+
+def write_plotly(out_dir):
+    """Write ``plotly.<hash>.min.js`` to ``out_dir`` unless present; returns a tag loading it."""
+    data = plotly_js().encode()
+    name = f"plotly.{hashlib.sha256(data).hexdigest()[:12]}.min.js"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+    return f'<script src="{name}"></script>'
+
+
+def fingerprint(sources=(IMAGE_ROOT,) + METRIC_SOURCES + CODE_SOURCES):
+    """Hash of the path and content of every input file and of every run manifest."""
+    digest = hashlib.sha256()
+    for source in sources:
+        for root, _, files in sorted(os.walk(source)) if os.path.isdir(source) else [("", [], [source])]:
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if os.path.exists(path):
+                    digest.update(f"{path}:{file_digest(path)}".encode())
+    store = runs.get_run_store()
+    for run_id in store.list_runs():
+        digest.update(f"{run_id}:{json.dumps(store.manifest(run_id)['artifacts'], sort_keys=True)}".encode())
+    return digest.hexdigest()
+
+
+class PageWriter:
+    """Accumulates the HTML body of one static page."""
+
+    def __init__(self, title, image_dir):
+        self.title = title
+        self.image_dir = image_dir
+        self.parts = []
+        self.figures = 0
+
+    def add(self, *parts):
+        self.parts.extend(parts)
+
+    def heading(self, text, level=2):
+        self.add(f"<h{level}>{html.escape(text)}</h{level}>")
+
+    def table(self, df, decimals=5):
+        return df.to_html(index=False, classes="metrics", border=0,
+                          float_format=lambda v: f"{v:.{decimals}f}")
+
+    def figure(self, builder, *args):
+        """``builder(*args)`` embedded as JSON, via the shared figure cache."""
+        self.figures += 1
+        div = f"fig{self.figures}"
+        return (f'<div id="{div}" class="figure"></div>'
+                f'<script>(function(f){{Plotly.newPlot("{div}",f.data,f.layout,'
+                f'{{responsive:true}});}})({json.dumps(cached_spec(builder, *args))});</script>')
+
+    def row(self, left, right):
+        """Table on the left, figures on the right, like ``st.columns([1, 2])``."""
+        self.add(f'<div class="row"><div class="cell">{left}</div><div class="cell">{right}</div></div>')
+
+    def images(self, entries, columns=2):
+        tiles = []
+        for file, caption in entries:
+            src = self.image_dir.get(file)
+            if src is None:
+                tiles.append(f'<p class="missing">Image not found: {html.escape(file)}</p>')
+            else:
+                tiles.append(f'<figure><img src="{src}" loading="lazy" alt="{html.escape(caption)}">'
+                             f'<figcaption>{html.escape(caption)}</figcaption></figure>')
+        self.add(f'<div class="grid" style="--cols:{columns}">' + "".join(tiles) + "</div>")
+
+    def render(self, script=None, nav=True, footer="Static snapshot"):
+        script = plotly_script() if script is None else script
+        links = "".join(f'<a href="{href}">{html.escape(label)}</a>' for href, label in PAGES)
+        nav = f"<nav>{links}</nav>" if nav else ""
+        return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(self.title)}</title>
+{script}
+<style>
+body {{ font-family: sans-serif; margin: 0; display: flex; }}
+nav {{ width: 240px; padding: 1rem; background: #f0f2f6; min-height: 100vh; }}
+nav a {{ display: block; padding: 6px 0; color: #31333f; text-decoration: none; }}
+main {{ flex: 1; padding: 1rem 2rem; max-width: 1400px; }}
+.row {{ display: flex; gap: 1rem; }} .cell:first-child {{ flex: 1; }} .cell:last-child {{ flex: 2; }}
+.grid {{ display: grid; grid-template-columns: repeat(var(--cols), 1fr); gap: 1rem; }}
+figure {{ margin: 0; }} img {{ width: 100%; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
+figcaption {{ text-align: center; color: #6c757d; font-size: 14px; }}
+table.metrics {{ border-collapse: collapse; }} table.metrics td, table.metrics th {{ padding: 4px 10px; border: 1px solid #dee2e6; }}
+.missing {{ color: #856404; background: #fff3cd; padding: 8px; }}
+@media (max-width: 800px) {{ body {{ display: block; }} nav {{ width: auto; min-height: 0; }}
+.row {{ display: block; }} .grid {{ grid-template-columns: 1fr; }} }}
+</style></head>
+<body>{nav}<main><h1>{html.escape(self.title)}</h1>{"".join(self.parts)}
+<hr><p>Soil Moisture Analysis Dashboard | {footer}</p></main></body></html>"""
+
+
+def optimize_images(out_dir, max_width=1600):
+    """Publish ``images/`` and return ``{target: {file: url}}``; see :mod:`utils.publish`."""
+    urls, _ = publish_images(out_dir, IMAGE_ROOT, max_width)
+    return urls
+
+
+def home_page(urls):
+    page = PageWriter("🌱 Soil Moisture Prediction Dashboard", {})
+    page.heading("🏆 Model Performance Comparison")
+    for target, label in results.TARGETS.items():
+        page.heading(label, 3)
+        df = results.model_performance(target)
+        page.row(page.table(df), page.figure(model_bar, df, f"{label} - Model Performance (R² Score)"))
+    page.heading("📦 Clustering Analysis")
+    for target, label in results.TARGETS.items():
+        page.heading(label, 3)
+        df = results.silhouette(target)
+        page.row(page.table(df, 4), page.figure(silhouette_bar, df, f"{label} - Clustering Performance"))
+    return page
+
+
+def target_page(target, label, urls):
+    page = PageWriter(f"{label} Analysis", urls.get(target, {}))
+    n_models = 6 if target == "total" else 5
+    sections = [
+        ("📊 Model Performance Summary", results.model_performance(target, n_models),
+         [(model_bar, results.model_performance(target, n_models), "Model Performance (R² Score)")]),
+        ("📅 XGBoost Monthly Performance", results.monthly(target),
+         [(trend_line, results.monthly(target), "Month", "R²"),
+          (trend_line, results.monthly(target), "Month", "RMSE")]),
+        ("📅 XGBoost Yearly Performance", results.yearly(target),
+         [(trend_line, results.yearly(target), "Year", "R²"),
+          (trend_line, results.yearly(target), "Year", "RMSE")]),
+    ]
+    for title, df, figures in sections:
+        page.heading(title)
+        page.row(page.table(df), "".join(page.figure(*call) for call in figures))
+    for title, entries in image_sections(target):
+        page.heading(title)
+        page.images(entries, columns=1 if title.startswith("🌐") else 2)
+    return page
+
+
+def cluster_page(urls):
+    page = PageWriter("🌍 Clustering Analysis - All India Region", {})
+    for target, label in results.TARGETS.items():
+        page.image_dir = urls.get(target, {})
+        page.heading(label)
+        page.heading("📊 Clustering Performance", 3)
+        page.row(page.table(results.silhouette(target), 4),
+                 page.figure(silhouette_bar, results.silhouette(target), f"Silhouette Scores - {label}"))
+        maps, features = cluster_images(target)
+        page.heading("🗺️ India Cluster Maps", 3)
+        page.images(maps, columns=3)
+        page.heading("⚡ XGBoost Performance by Cluster", 3)
+        page.row(page.table(results.cluster_xgboost(target)),
+                 page.figure(cluster_bar, results.cluster_xgboost(target), f"XGBoost R² by Cluster - {label}"))
+        page.heading("🔍 Feature Contribution Analysis", 3)
+        page.images(features)
+    return page
+
+
+def build(out_dir, force=False, max_width=1600):
+    """Write the snapshot; returns ``False`` if it was already up to date."""
+    stamp_path = os.path.join(out_dir, FINGERPRINT_FILE)
+    stamp = fingerprint()
+    if not force and os.path.exists(stamp_path):
+        with open(stamp_path) as f:
+            if f.read() == stamp:
+                return False
+
+    os.makedirs(out_dir, exist_ok=True)
+    urls = optimize_images(out_dir, max_width)
+    script = write_plotly(out_dir)
+    pages = [home_page(urls)]
+    pages += [target_page(target, label, urls) for target, label in results.TARGETS.items()]
+    pages.append(cluster_page(urls))
+    for (file, _), page in zip(PAGES, pages):
+        with open(os.path.join(out_dir, file), "w", encoding="utf-8") as f:
+            f.write(page.render(script))
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump({"fingerprint": stamp, "pages": [file for file, _ in PAGES]}, f, indent=2)
+    with open(stamp_path, "w") as f:
+        f.write(stamp)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the dashboard to a static site.")
+    parser.add_argument("out_dir", nargs="?", default="site")
+    parser.add_argument("--force", action="store_true", help="rebuild even if inputs are unchanged")
+    parser.add_argument("--max-width", type=int, default=1600, help="downscale wider images")
+    args = parser.parse_args(argv)
+    if build(args.out_dir, args.force, args.max_width):
+        print(f"Snapshot written to {args.out_dir}")
+    else:
+        print(f"Snapshot in {args.out_dir} is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Uniform-grid spatial index over grid-cell centroids.
+
+Cell centroids are read from ``data/<folder>/cells.npy`` (``(n, 2)`` lat/lon,
+in the same cell order as predictions and cluster labels). Cells are bucketed
+into square bins and stored bin-sorted, so a bounding-box query only touches
+the bins it overlaps.
+
+Benchmark against a brute-force scan::
+
+    python -m utils.spatial surface --queries 1000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from utils.storage import local_path
+
+DATA_DIR = "data"
+
+
+def load_cells(folder, data_dir=DATA_DIR):
+    path = local_path(os.path.join(data_dir, folder, "cells.npy"))
+    if path is None:
+        return None
+    return np.load(path)
+
+
+class GridIndex:
+    def __init__(self, lat, lon, bin_size=1.0):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.bin_size = bin_size
+        self.lat0, self.lon0 = self.lat.min(), self.lon.min()
+        self.n_rows = int((self.lat.max() - self.lat0) // bin_size) + 1
+        self.n_cols = int((self.lon.max() - self.lon0) // bin_size) + 1
+
+        bins = self._bin(self.lat, self.lat0, self.n_rows) * self.n_cols \
+            + self._bin(self.lon, self.lon0, self.n_cols)
+        self.order = np.argsort(bins, kind="stable")
+        # offsets[b]:offsets[b + 1] are the positions in ``order`` of bin b
+        self.offsets = np.r_[0, np.cumsum(np.bincount(bins, minlength=self.n_rows * self.n_cols))]
+
+    @classmethod
+    def from_coords(cls, coords, bin_size=1.0):
+        return cls(coords[:, 0], coords[:, 1], bin_size)
+
+    def _bin(self, values, origin, n):
+        return np.clip(((np.asarray(values) - origin) // self.bin_size).astype(np.int64), 0, n - 1)
+
+    def query_bbox(self, lat_min, lat_max, lon_min, lon_max):
+        """Sorted indices of the cells inside the (inclusive) bounding box."""
+        if lat_max < max(lat_min, self.lat0) or lon_max < max(lon_min, self.lon0):
+            return np.empty(0, dtype=np.int64)
+        r0, r1 = self._bin([lat_min, lat_max], self.lat0, self.n_rows)
+        c0, c1 = self._bin([lon_min, lon_max], self.lon0, self.n_cols)
+        rows = np.arange(r0, r1 + 1)
+        starts = self.offsets[rows * self.n_cols + c0]
+        ends = self.offsets[rows * self.n_cols + c1 + 1]
+        candidates = np.concatenate([self.order[s:e] for s, e in zip(starts, ends)])
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        return np.sort(candidates[inside])
+
+    def brute_force(self, lat_min, lat_max, lon_min, lon_max):
+        inside = (self.lat >= lat_min) & (self.lat <= lat_max) & (self.lon >= lon_min) & (self.lon <= lon_max)
+        return np.flatnonzero(inside)
+
+
+def benchmark(index, n_queries=1000, max_extent=5.0, seed=0):
+    """Mean query latency (ms) of the index and of a brute-force scan."""
+    rng = np.random.default_rng(seed)
+    lat_min = rng.uniform(index.lat.min(), index.lat.max(), n_queries)
+    lon_min = rng.uniform(index.lon.min(), index.lon.max(), n_queries)
+    extent = rng.uniform(0.1, max_extent, (n_queries, 2))
+    boxes = np.column_stack([lat_min, lat_min + extent[:, 0], lon_min, lon_min + extent[:, 1]])
+
+    timings = {}
+    for name, query in (("index", index.query_bbox), ("brute_force", index.brute_force)):
+        start = time.perf_counter()
+        found = [query(*box) for box in boxes]
+        timings[name] = 1000 * (time.perf_counter() - start) / n_queries
+        timings[f"{name}_cells"] = sum(len(f) for f in found)
+    if timings["index_cells"] != timings["brute_force_cells"]:
+        raise AssertionError("Index and brute-force results differ")
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the grid-cell spatial index.")
+    parser.add_argument("folder", help="target folder with data/<folder>/cells.npy")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--bin-size", type=float, default=1.0, help="bin edge in degrees")
+    args = parser.parse_args(argv)
+
+    coords = load_cells(args.folder)
+    if coords is None:
+        parser.error(f"no cells.npy for {args.folder}")
+    start = time.perf_counter()
+    index = GridIndex.from_coords(coords, args.bin_size)
+    print(f"Built index over {len(coords):,} cells in {1000 * (time.perf_counter() - start):.1f} ms")
+    result = benchmark(index, args.queries)
+    print(f"Index:       {result['index']:.3f} ms/query")
+    print(f"Brute force: {result['brute_force']:.3f} ms/query")
+    print(f"Speedup:     {result['brute_force'] / result['index']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Storage backends for images, metrics and model artifacts.
+
+Keys are repository-relative paths such as ``images/surface/xgboost_importance.png``
+or ``data/surface/cluster_labels.npz``. The backend is chosen from the
+environment:
+
+``DASHBOARD_STORAGE``
+    ``s3://bucket/prefix`` for an S3-compatible store; local files otherwise.
+``DASHBOARD_S3_ENDPOINT``
+    Endpoint URL for S3-compatible servers such as MinIO.
+``DASHBOARD_CACHE_DIR`` / ``DASHBOARD_CACHE_BYTES``
+    Local read-through cache for remote stores (default ``.cache/storage``, 2 GiB).
+
+Loaders that need a real file (memory-mapped arrays, joblib models) ask for
+:func:`local_path`, which downloads into the cache on first use.
+"""
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "storage")
+DEFAULT_CACHE_BYTES = 2 * 1024 ** 3
+# Suffix of partly downloaded cache files
+TEMP_SUFFIX = ".part"
+
+
+def _key(path):
+    return os.path.normpath(path).replace(os.sep, "/").lstrip("/")
+
+
+class LocalBackend:
+    def __init__(self, root="."):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, _key(key))
+
+    def read(self, key):
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def download(self, key, fileobj):
+        """Copy the object into an open binary file, in chunks."""
+        with open(self.path(key), "rb") as f:
+            shutil.copyfileobj(f, fileobj)
+
+    def write(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def write_file(self, key, source):
+        """Store the local file ``source`` under ``key``, in chunks."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        shutil.copyfile(source, path)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def list(self, prefix=""):
+        base = self.path(prefix)
+        keys = []
+        for root, _, files in os.walk(base):
+            for name in files:
+                keys.append(_key(os.path.relpath(os.path.join(root, name), self.root)))
+        return sorted(keys)
+
+    def list_dirs(self, prefix=""):
+        """Names of the directories directly under ``prefix``."""
+        base = self.path(prefix)
+        if not os.path.isdir(base):
+            return []
+        return sorted(name for name in os.listdir(base) if os.path.isdir(os.path.join(base, name)))
+
+    def local_path(self, key):
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+
+def _missing(err):
+    """Whether a botocore ``ClientError`` means the object does not exist."""
+    return err.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+class S3Backend:
+    """S3-compatible object store; pass ``endpoint_url`` for MinIO and friends."""
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, client=None):
+        if client is None:
+            import boto3
+
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _object(self, key):
+        key = _key(key) if key else ""
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def read(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object(key))
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key) from None
+        return response["Body"].read()
+
+    def download(self, key, fileobj):
+        """Stream the object into an open binary file (multipart for large objects)."""
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.download_fileobj(self.bucket, self._object(key), fileobj)
+        except ClientError as err:
+            if _missing(err):
+                raise FileNotFoundError(key) from None
+            raise
+
+    def write(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self._object(key), Body=data)
+
+    def write_file(self, key, source):
+        """Upload the local file ``source`` (multipart for large files)."""
+        self.client.upload_file(source, self.bucket, self._object(key))
+
+    def exists(self, key):
+        """Whether the object exists; errors other than "not found" (auth, network) are raised."""
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object(key))
+            return True
+        except ClientError as err:
+            if _missing(err):
+                return False
+            raise
+
+    def list(self, prefix=""):
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object(prefix)):
+            for item in page.get("Contents", []):
+                keys.append(item["Key"][len(self.prefix) + 1:] if self.prefix else item["Key"])
+        return sorted(keys)
+
+    def list_dirs(self, prefix=""):
+        """Names of the common prefixes directly under ``prefix``, without listing the objects."""
+        base = self._object(prefix).rstrip("/")
+        base = base + "/" if base else ""
+        names = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=base, Delimiter="/"):
+            for item in page.get("CommonPrefixes", []):
+                names.append(item["Prefix"][len(base):].rstrip("/"))
+        return sorted(names)
+
+
+class CachedBackend:
+    """Read-through local disk cache in front of another backend.
+
+    Cached files are evicted least-recently-used first once their total size
+    exceeds ``max_bytes``. Downloads stream into a temporary file that is
+    renamed into place, so a cached file is never seen half-written. A file
+    is pinned against eviction only while :meth:`read` copies it; files
+    handed out by :meth:`local_path` are opened or memory-mapped right away,
+    and evicting them later unlinks the name while open handles and maps stay
+    valid on POSIX.
+    """
+
+    def __init__(self, backend, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+        self.backend = backend
+        self.cache = LocalBackend(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = OrderedDict()
+        self._pins = {}
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        entries = []
+        for key in self.cache.list():
+            path = self.cache.path(key)
+            if os.path.basename(path).endswith(TEMP_SUFFIX):
+                # Left over from an interrupted download
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_atime, key, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self.bytes += size
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def _download(self, key):
+        path = self.cache.path(key)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=TEMP_SUFFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                self.backend.download(key, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return os.path.getsize(path)
+
+    def _fetch(self, key):
+        """Cache key of ``key``, downloading it on a miss; the caller holds one pin until :meth:`_release`."""
+        key = _key(key)
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+                self._pins[key] = self._pins.get(key, 0) + 1
+                self.hits += 1
+                return key
+        size = self._download(key)
+        with self._lock:
+            self.misses += 1
+            self.bytes += size - self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            self._pins[key] = self._pins.get(key, 0) + 1
+            for old in list(self._sizes):
+                if self.bytes <= self.max_bytes:
+                    break
+                if self._pins.get(old):
+                    continue
+                self.bytes -= self._sizes.pop(old)
+                try:
+                    os.remove(self.cache.path(old))
+                except FileNotFoundError:
+                    pass
+                self.evictions += 1
+        return key
+
+    def _release(self, key):
+        with self._lock:
+            if self._pins.get(key, 0) > 1:
+                self._pins[key] -= 1
+            else:
+                self._pins.pop(key, None)
+
+    def read(self, key):
+        key = self._fetch(key)
+        try:
+            with open(self.cache.path(key), "rb") as f:
+                return f.read()
+        finally:
+            self._release(key)
+
+    def write(self, key, data):
+        self.backend.write(key, data)
+        self.invalidate(key)
+
+    def write_file(self, key, source):
+        self.backend.write_file(key, source)
+        self.invalidate(key)
+
+    def exists(self, key):
+        return _key(key) in self._sizes or self.backend.exists(key)
+
+    def list(self, prefix=""):
+        return self.backend.list(prefix)
+
+    def list_dirs(self, prefix=""):
+        return self.backend.list_dirs(prefix)
+
+    def local_path(self, key):
+        """Cached file for ``key``, or ``None`` if it does not exist; open it straight away."""
+        try:
+            key = self._fetch(key)
+        except FileNotFoundError:
+            return None
+        self._release(key)
+        return self.cache.path(key)
+
+    def invalidate(self, prefix=""):
+        """Drop cached files under ``prefix``, including any being read; returns how many were removed.
+
+        Open handles and memory maps of removed files stay valid on POSIX;
+        the next access downloads a fresh copy.
+        """
+        prefix = _key(prefix) if prefix else ""
+        with self._lock:
+            doomed = [k for k in self._sizes if k.startswith(prefix)]
+            for key in doomed:
+                self.bytes -= self._sizes.pop(key)
+                self._pins.pop(key, None)
+                try:
+                    os.remove(self.cache.path(key))
+                except FileNotFoundError:
+                    pass
+        return len(doomed)
+
+
+_storage = None
+
+
+def get_storage():
+    """The process-wide backend configured from the environment."""
+    global _storage
+    if _storage is None:
+        location = os.environ.get("DASHBOARD_STORAGE", "")
+        if location.startswith("s3://"):
+            bucket, _, prefix = location[len("s3://"):].partition("/")
+            remote = S3Backend(bucket, prefix, endpoint_url=os.environ.get("DASHBOARD_S3_ENDPOINT"))
+            _storage = CachedBackend(
+                remote,
+                os.environ.get("DASHBOARD_CACHE_DIR", DEFAULT_CACHE_DIR),
+                int(os.environ.get("DASHBOARD_CACHE_BYTES", DEFAULT_CACHE_BYTES)),
+            )
+        else:
+            _storage = LocalBackend(location or ".")
+    return _storage
+
+
+def read(path):
+    return get_storage().read(path)
+
+
+def exists(path):
+    return get_storage().exists(path)
+
+
+def local_path(path):
+    """A local file for ``path`` (downloaded if needed), or ``None`` if it does not exist."""
+    return get_storage().local_path(path)
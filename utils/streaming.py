@@ -0,0 +1,117 @@
+"""Streaming RMSE/R² evaluation for prediction files larger than memory.
+
+Files are read in chunks (CSV) or record batches (Parquet) and only the
+per-group sufficient statistics ``(n, Σe², Σy, Σy²)`` are kept, so memory use
+depends on the number of groups, never on the file size. Metrics are derived
+with the same functions as :mod:`utils.metrics`, so the tables match the
+pages exactly.
+
+Usage::
+
+    python -m utils.streaming predictions.parquet --group month --output monthly.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import metrics_from_stats, period_frame, period_keys, sufficient_stats
+from utils.results import with_mean
+
+GROUPS = ("overall", "month", "year", "cluster")
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def iter_prediction_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield DataFrames of at most ``chunk_rows`` rows from a CSV or Parquet file."""
+    columns = ["date", "cell", "actual", "predicted"]
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        available = [c for c in columns if c in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=available):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows, parse_dates=["date"],
+                               usecols=lambda c: c in columns)
+
+
+class StreamingEvaluator:
+    """Accumulates per-group sufficient statistics over prediction chunks."""
+
+    def __init__(self, groups=GROUPS, cell_labels=None):
+        if "cluster" in groups and cell_labels is None:
+            groups = tuple(g for g in groups if g != "cluster")
+        self.groups = tuple(groups)
+        self.cell_labels = None if cell_labels is None else np.asarray(cell_labels)
+        self.stats = {group: {} for group in self.groups}
+        self.rows = 0
+
+    def _group_keys(self, group, chunk):
+        if group == "overall":
+            return np.zeros(len(chunk), dtype=np.int64)
+        if group == "cluster":
+            return self.cell_labels[chunk["cell"].to_numpy()]
+        return period_keys(chunk["date"].to_numpy(), group)
+
+    def update(self, chunk):
+        actual = chunk["actual"].to_numpy()
+        predicted = chunk["predicted"].to_numpy()
+        for group in self.groups:
+            keys, codes = np.unique(self._group_keys(group, chunk), return_inverse=True)
+            chunk_stats = sufficient_stats(codes, actual, predicted, len(keys))
+            running = self.stats[group]
+            for key, row in zip(keys.tolist(), chunk_stats):
+                running[key] = running[key] + row if key in running else row
+        self.rows += len(chunk)
+        return self
+
+    def consume(self, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+        for chunk in iter_prediction_chunks(path, chunk_rows):
+            self.update(chunk)
+        return self
+
+    def table(self, group):
+        """Metrics table for one group, in the shape of :func:`utils.metrics.period_table`."""
+        running = self.stats[group]
+        keys = sorted(running)
+        stats = np.array([running[k] for k in keys]).reshape(len(keys), 4)
+        if group in ("month", "year"):
+            return period_frame(group, np.array(keys, dtype=np.int64), stats)
+        rmse, r2 = metrics_from_stats(stats)
+        label = "Cluster" if group == "cluster" else "Scope"
+        names = [f"Cluster {k}" for k in keys] if group == "cluster" else ["All"]
+        return pd.DataFrame({label: names, "RMSE": rmse, "R²": r2})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream RMSE/R² from a prediction file.")
+    parser.add_argument("path", help="CSV or Parquet file with date, cell, actual, predicted columns")
+    parser.add_argument("--group", choices=GROUPS, default="overall")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--labels", help="cluster_labels.npz, required for --group cluster")
+    parser.add_argument("--method", help="clustering method inside --labels")
+    parser.add_argument("--output", help="write the table to this CSV instead of printing it")
+    args = parser.parse_args(argv)
+
+    cell_labels = None
+    if args.group == "cluster":
+        if not (args.labels and args.method):
+            parser.error("--group cluster needs --labels and --method")
+        with np.load(args.labels) as archive:
+            cell_labels = archive[args.method]
+
+    evaluator = StreamingEvaluator((args.group,), cell_labels).consume(args.path, args.chunk_rows)
+    table = evaluator.table(args.group)
+    if args.group in ("month", "year"):
+        table = with_mean(table)
+    if args.output:
+        table.to_csv(args.output, index=False)
+    else:
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
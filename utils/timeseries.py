@@ -0,0 +1,162 @@
+"""Chunked time-series store for daily soil-moisture values.
+
+Layout under ``data/<folder>/timeseries/``::
+
+    index.json                 start date, shape and chunk size
+    daily_00000.npy ...        float32 (cells, days) per chunk of cells
+    weekly_00000.npy ...       precomputed weekly means
+    monthly_00000.npy ...      precomputed monthly means
+
+Each chunk is cell-major so reading one cell touches one contiguous row of a
+single memory-mapped file.
+"""
+import json
+import os
+
+import numpy as np
+
+from utils.storage import local_path
+
+DATA_DIR = "data"
+RESOLUTIONS = ("daily", "weekly", "monthly")
+
+
+def _period_starts(dates, resolution):
+    """Index of the first day of every period and the period start dates."""
+    if resolution == "daily":
+        return np.arange(len(dates)), dates
+    if resolution == "weekly":
+        # 1970-01-01 was a Thursday, shift so weeks start on Monday
+        periods = (dates.astype("int64") + 3) // 7
+    else:
+        periods = dates.astype("datetime64[M]").astype("int64")
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return starts, dates[starts]
+
+
+def _rollup(values, starts):
+    """NaN-aware mean of each period along the day axis."""
+    finite = np.isfinite(values)
+    sums = np.add.reduceat(np.where(finite, values, 0.0), starts, axis=1)
+    counts = np.add.reduceat(finite, starts, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums / counts).astype(np.float32)
+
+
+def build_store(root, start_date, values, chunk_cells=1024):
+    """Write a ``(cells, days)`` array of daily values and its rollups to ``root``."""
+    values = np.asarray(values, dtype=np.float32)
+    n_cells, n_days = values.shape
+    dates = np.datetime64(start_date, "D") + np.arange(n_days)
+    os.makedirs(root, exist_ok=True)
+
+    starts = {res: _period_starts(dates, res) for res in RESOLUTIONS}
+    for chunk, first in enumerate(range(0, n_cells, chunk_cells)):
+        block = values[first:first + chunk_cells]
+        np.save(os.path.join(root, f"daily_{chunk:05d}.npy"), block)
+        for res in RESOLUTIONS[1:]:
+            np.save(os.path.join(root, f"{res}_{chunk:05d}.npy"), _rollup(block, starts[res][0]))
+
+    index = {
+        "start_date": str(dates[0]),
+        "n_days": n_days,
+        "n_cells": n_cells,
+        "chunk_cells": chunk_cells,
+    }
+    with open(os.path.join(root, "index.json"), "w") as f:
+        json.dump(index, f)
+    return TimeSeriesStore(root, resolve=lambda path: path)
+
+
+class TimeSeriesStore:
+    """Read access to a store written by :func:`build_store`.
+
+    Files are resolved through :func:`utils.storage.local_path`, so a store
+    kept in remote storage is downloaded chunk by chunk as cells are read.
+    """
+
+    def __init__(self, root, resolve=local_path):
+        self.root = root
+        self.resolve = resolve
+        with open(resolve(os.path.join(root, "index.json"))) as f:
+            index = json.load(f)
+        self.n_cells = index["n_cells"]
+        self.chunk_cells = index["chunk_cells"]
+        days = np.datetime64(index["start_date"], "D") + np.arange(index["n_days"])
+        self.dates = {res: _period_starts(days, res)[1] for res in RESOLUTIONS}
+        self._chunks = {}
+
+    @classmethod
+    def open(cls, folder, data_dir=DATA_DIR):
+        """Open the store for a target folder, or return ``None`` if absent."""
+        root = os.path.join(data_dir, folder, "timeseries")
+        if local_path(os.path.join(root, "index.json")) is None:
+            return None
+        return cls(root)
+
+    def _chunk(self, resolution, chunk):
+        key = (resolution, chunk)
+        if key not in self._chunks:
+            path = os.path.join(self.root, f"{resolution}_{chunk:05d}.npy")
+            self._chunks[key] = np.load(self.resolve(path), mmap_mode="r")
+        return self._chunks[key]
+
+    def resolution_for(self, start, end, max_points):
+        """Finest resolution with at most ``max_points`` samples in ``[start, end]``."""
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+        for res in RESOLUTIONS:
+            dates = self.dates[res]
+            if np.count_nonzero((dates >= start) & (dates <= end)) <= max_points:
+                return res
+        return RESOLUTIONS[-1]
+
+    def read_cell(self, cell, resolution="daily"):
+        """``(dates, values)`` for one grid cell."""
+        if not 0 <= cell < self.n_cells:
+            raise IndexError(f"Grid cell {cell} out of range")
+        chunk, offset = divmod(cell, self.chunk_cells)
+        return self.dates[resolution], np.asarray(self._chunk(resolution, chunk)[offset])
+
+    def read_mean(self, cells, resolution="daily"):
+        """``(dates, values)`` averaged over several cells, e.g. one cluster."""
+        cells = np.unique(np.asarray(cells))
+        totals = np.zeros(len(self.dates[resolution]))
+        counts = np.zeros(len(self.dates[resolution]))
+        for chunk in np.unique(cells // self.chunk_cells):
+            rows = self._chunk(resolution, chunk)[cells[cells // self.chunk_cells == chunk] % self.chunk_cells]
+            finite = np.isfinite(rows)
+            totals += np.where(finite, rows, 0.0).sum(axis=0)
+            counts += finite.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.dates[resolution], totals / counts
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of a series to ``n_out`` points.
+
+    ``x`` may be datetimes; the selected indices are returned alongside the
+    downsampled values so callers can index any parallel arrays.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        idx = np.arange(n)
+        return np.asarray(x)[idx], y[idx]
+    xs = np.asarray(x)
+    xf = xs.astype("datetime64[D]").astype(np.float64) if np.issubdtype(xs.dtype, np.datetime64) \
+        else xs.astype(np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[nxt_lo:nxt_hi].mean()
+        avg_y = np.nanmean(y[nxt_lo:nxt_hi]) if np.isfinite(y[nxt_lo:nxt_hi]).any() else y[prev]
+        area = np.abs((xf[prev] - avg_x) * (y[lo:hi] - y[prev])
+                      - (xf[prev] - xf[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        selected[i + 1] = prev
+    return xs[selected], y[selected]
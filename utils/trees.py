@@ -0,0 +1,241 @@
+"""Flattened tree-ensemble predictor for the tree models on the dashboard.
+
+Every tree of a Decision Tree, Random Forest, Gradient Boosting or XGBoost
+regressor is packed into shared node arrays. Prediction walks all rows
+through all trees at once, one vectorised step per tree level.
+
+The native predictors are compiled code and usually win; the flat form
+only pays off for some ensembles and batch shapes, so
+:func:`fastest_predictor` measures both on the loaded model and keeps
+the compiled path only when it is faster and agrees with the model.
+
+Benchmark against the reference predictor::
+
+    python -m utils.trees models/surface/xgboost_28.joblib --rows 500000
+"""
+import argparse
+import time
+
+import numpy as np
+
+
+class FlatForest:
+    """Sum of regression trees stored as flat node arrays.
+
+    ``predict(X) = bias + scale * Σ_t leaf_value_t(X)``. Leaves point to
+    themselves so a fixed number of steps (the maximum depth) reaches every
+    leaf. ``strict`` selects ``x < threshold`` (XGBoost) instead of
+    ``x <= threshold`` (scikit-learn) for going left. Both libraries see
+    the features as float32, and XGBoost also stores float32 thresholds;
+    inputs and thresholds are rounded the same way so ties split alike.
+    """
+
+    def __init__(self, trees, bias=0.0, scale=1.0, strict=False):
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        self.max_depth = 0
+        for tree in trees:
+            n = len(tree["value"])
+            is_leaf = tree["left"] < 0
+            own = np.arange(n) + offset
+            roots.append(offset)
+            feature.append(np.where(is_leaf, 0, tree["feature"]))
+            threshold.append(np.where(is_leaf, 0.0, tree["threshold"]))
+            left.append(np.where(is_leaf, own, tree["left"] + offset))
+            right.append(np.where(is_leaf, own, tree["right"] + offset))
+            default_left.append(tree["default_left"])
+            value.append(tree["value"])
+            self.max_depth = max(self.max_depth, _depth(tree["left"], tree["right"]))
+            offset += n
+        self.feature = np.concatenate(feature).astype(np.int32)
+        threshold = np.concatenate(threshold)
+        if strict:
+            threshold = threshold.astype(np.float32)
+        self.threshold = threshold.astype(np.float64)
+        self.left = np.concatenate(left).astype(np.int32)
+        self.right = np.concatenate(right).astype(np.int32)
+        self.default_left = np.concatenate(default_left).astype(bool)
+        self.value = np.concatenate(value).astype(np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.bias = float(bias)
+        self.scale = float(scale)
+        self.strict = strict
+
+    def predict(self, X, block_rows=16384):
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        out = np.empty(len(X))
+        for start in range(0, len(X), block_rows):
+            out[start:start + block_rows] = self._predict_block(X[start:start + block_rows])
+        return out
+
+    def _predict_block(self, X):
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            threshold = self.threshold[node]
+            go_left = x < threshold if self.strict else x <= threshold
+            go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.bias + self.scale * self.value[node].sum(axis=1)
+
+
+def _depth(left, right):
+    depth = np.zeros(len(left), dtype=np.int64)
+    for i in range(len(left)):
+        if left[i] >= 0:
+            depth[left[i]] = depth[right[i]] = depth[i] + 1
+    return int(depth.max())
+
+
+def _sklearn_tree(estimator):
+    tree = estimator.tree_
+    return {
+        "feature": tree.feature,
+        "threshold": tree.threshold,
+        "left": tree.children_left,
+        "right": tree.children_right,
+        "default_left": getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool)),
+        "value": tree.value[:, 0, 0],
+    }
+
+
+def _xgboost_trees(booster):
+    frame = booster.trees_to_dataframe()
+    names = booster.feature_names or []
+    index = {name: i for i, name in enumerate(names)}
+    trees = []
+    for _, nodes in frame.groupby("Tree", sort=True):
+        nodes = nodes.sort_values("Node")
+        position = {node_id: i for i, node_id in enumerate(nodes["ID"])}
+        is_leaf = (nodes["Feature"] == "Leaf").to_numpy()
+        feature = [0 if leaf else index[f] if f in index else int(f[1:])
+                   for leaf, f in zip(is_leaf, nodes["Feature"])]
+        trees.append({
+            "feature": np.asarray(feature),
+            "threshold": nodes["Split"].fillna(0.0).to_numpy(),
+            "left": np.array([-1 if leaf else position[y] for leaf, y in zip(is_leaf, nodes["Yes"])]),
+            "right": np.array([-1 if leaf else position[n] for leaf, n in zip(is_leaf, nodes["No"])]),
+            "default_left": (nodes["Missing"] == nodes["Yes"]).to_numpy(),
+            "value": np.where(is_leaf, nodes["Gain"].to_numpy(), 0.0),
+        })
+    return trees
+
+
+def compile_model(model):
+    """Return a :class:`FlatForest` equivalent to ``model``, or ``None`` if unsupported."""
+    kind = type(model).__name__
+    if kind == "DecisionTreeRegressor":
+        return FlatForest([_sklearn_tree(model)])
+    if kind in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        trees = [_sklearn_tree(est) for est in model.estimators_]
+        return FlatForest(trees, scale=1.0 / len(trees))
+    if kind == "GradientBoostingRegressor":
+        trees = [_sklearn_tree(est) for est in model.estimators_[:, 0]]
+        init = model.init_
+        bias = 0.0 if init == "zero" else float(np.ravel(init.predict(np.zeros((1, model.n_features_in_))))[0])
+        return FlatForest(trees, bias=bias, scale=model.learning_rate)
+    if kind in ("XGBRegressor", "Booster"):
+        import json
+
+        booster = model.get_booster() if kind == "XGBRegressor" else model
+        config = json.loads(booster.save_config())
+        objective = config["learner"]["objective"]["name"]
+        gbm = config["learner"]["gradient_booster"]
+        # dart scales trees at prediction time and gblinear has none
+        if objective not in ("reg:squarederror", "reg:linear") or gbm["name"] != "gbtree":
+            return None
+        trees = _xgboost_trees(booster)
+        if kind == "XGBRegressor":
+            # The sklearn wrapper predicts with the early-stopping best iteration
+            try:
+                best = model.best_iteration
+            except AttributeError:
+                best = None
+            if best is not None:
+                per_round = int(gbm["gbtree_model_param"]["num_parallel_tree"])
+                trees = trees[:(best + 1) * per_round]
+        bias = float(config["learner"]["learner_model_param"]["base_score"].strip("[]"))
+        return FlatForest(trees, bias=bias, strict=True)
+    return None
+
+
+def reference_predict(model):
+    """The model's own predict, taking a feature matrix."""
+    if type(model).__name__ == "Booster":
+        import xgboost
+
+        return lambda X: model.predict(xgboost.DMatrix(np.asarray(X)))
+    return model.predict
+
+
+def n_features(model):
+    return model.num_features() if type(model).__name__ == "Booster" else model.n_features_in_
+
+
+def benchmark(model, X, repeat=3, compiled=None):
+    """Rows/second of the reference and compiled predictors on the same batch."""
+    compiled = compiled or compile_model(model)
+    if compiled is None:
+        raise TypeError(f"Unsupported model type: {type(model).__name__}")
+
+    def rate(predict):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = predict(X)
+            best = min(best, time.perf_counter() - start)
+        return len(X) / best, np.asarray(result, dtype=np.float64)
+
+    reference_rate, expected = rate(reference_predict(model))
+    compiled_rate, actual = rate(compiled.predict)
+    return {
+        "rows": len(X),
+        "reference_rows_per_s": reference_rate,
+        "compiled_rows_per_s": compiled_rate,
+        "speedup": compiled_rate / reference_rate,
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+    }
+
+
+def fastest_predictor(model, X=None, rows=4096, repeat=2, rtol=1e-5):
+    """The compiled predictor when it beats ``model.predict`` on ``X`` and
+    matches it there; otherwise the model's own predict.
+
+    Which one is faster depends on the paths rows take through the trees, so
+    ``X`` should look like real inputs; without it ``rows`` uniform random
+    rows in [0, 1) are used.
+    """
+    reference = reference_predict(model)
+    compiled = compile_model(model)
+    if compiled is None:
+        return reference
+    if X is None:
+        X = np.random.default_rng(0).random((rows, n_features(model)))
+    result = benchmark(model, X, repeat, compiled)
+    expected = np.asarray(reference(X), dtype=np.float64)
+    agrees = np.allclose(compiled.predict(X), expected, rtol=rtol, atol=rtol * np.abs(expected).max())
+    return compiled.predict if agrees and result["speedup"] > 1 else reference
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark compiled tree-ensemble inference.")
+    parser.add_argument("model", help="serialized estimator (.joblib)")
+    parser.add_argument("--features", help=".npy feature matrix; random rows are used if omitted")
+    parser.add_argument("--rows", type=int, default=200_000, help="size of the synthetic full-grid batch")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    model = joblib.load(args.model)
+    if args.features:
+        X = np.load(args.features)
+    else:
+        X = np.random.default_rng(0).random((args.rows, n_features(model)))
+    for key, value in benchmark(model, X, args.repeat).items():
+        print(f"{key:>22}: {value:,.6g}")
+
+
+if __name__ == "__main__":
+    main()